@@ -0,0 +1,80 @@
+'''
+So sánh chi phí mỗi lần gọi log giữa cách cũ (`inspect.stack()` + `print`) và `Utility.logger` hiện tại
+(`sys._getframe` + `LogWriter`).
+
+Console được chuyển vào os.devnull để chỉ đo chi phí của hàm log. Log JSON được ghi vào thư mục tạm.
+
+Cách chạy (từ thư mục gốc của tool):
+    python benchmark/bench_logger.py --calls 20000 --threads 4
+'''
+import argparse
+import contextlib
+import inspect
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import utils
+from utils import LogWriter, Utility
+
+def old_logger(profile_name: str = 'System', message: str = 'Chưa có mô tả nhật ký', show_log: bool = True):
+    # Cách cũ của Utility.logger
+    if show_log:
+        func_name = inspect.stack()[2].function
+        print(f'[{profile_name}][{func_name}]: {message}')
+
+class FakeNode:
+    '''Mô phỏng độ sâu call stack của Node.log được gọi từ một action.'''
+    def __init__(self, profile_name: str, logger) -> None:
+        self.profile_name = profile_name
+        self.logger = logger
+
+    def log(self, message: str):
+        self.logger(profile_name=self.profile_name, message=message)
+
+    def find(self, index: int):
+        self.log(f'Tìm thấy phần tử (xpath, //button[{index}])')
+
+def bench(logger, calls: int, threads: int) -> float:
+    '''Trả về số micro giây trung bình mỗi lần gọi.'''
+    per_thread = calls // threads
+
+    def worker(number: int):
+        node = FakeNode(f'profile_{number}', logger)
+        for index in range(per_thread):
+            node.find(index)
+
+    workers = [threading.Thread(target=worker, args=(number,)) for number in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return (time.perf_counter() - start) / (per_thread * threads) * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description='So sánh chi phí Utility.logger cũ và mới')
+    parser.add_argument('--calls', type=int, default=20000, help='Tổng số lần gọi log mỗi cách')
+    parser.add_argument('--threads', type=int, default=4, help='Số luồng gọi log song song')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as log_dir:
+        utils.LOG_WRITER = LogWriter(Path(log_dir))
+        with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+            old = bench(old_logger, args.calls, args.threads)
+            new = bench(Utility.logger, args.calls, args.threads)
+            start = time.perf_counter()
+            utils.LOG_WRITER.flush()
+            drain = time.perf_counter() - start
+
+    print(f"{'Cách':<36}{'µs/lần gọi':>12}")
+    print(f"{'inspect.stack() + print (cũ)':<36}{old:>12.1f}")
+    print(f"{'sys._getframe + LogWriter (mới)':<36}{new:>12.1f}")
+    print(f'Nhanh hơn {old / new:.1f} lần, luồng nền ghi nốt file trong {drain:.2f}s')
+
+if __name__ == '__main__':
+    main()
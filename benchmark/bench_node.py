@@ -0,0 +1,263 @@
+'''
+Đo các thao tác của `Node` và toàn bộ luồng `Auto._run` trên trang mô phỏng HaHa Wallet (`benchmark/fixture`),
+chạy Chrome headless, không cần mạng và không cần extension thật.
+
+Mỗi bước ghi: thời gian thực (wall), thời gian ngủ chủ động (`Utility.wait_time`), thời gian còn lại (active = wall - ngủ)
+và số lệnh WebDriver. Kết quả so sánh với baseline đã lưu, bước chậm hơn ngưỡng hoặc tăng số lệnh được báo là regression
+(thoát với mã 1).
+
+Baseline, ảnh snapshot và log của lần chạy được ghi vào `report/bench` (không ghi vào thư mục mã nguồn).
+
+Cách chạy (từ thư mục gốc của tool):
+    python benchmark/bench_node.py --save-baseline      # lưu baseline trên máy hiện tại
+    python benchmark/bench_node.py                      # chạy lại và so sánh với baseline
+    python benchmark/bench_node.py --only primitives --repeat 5 --wait 0
+'''
+import argparse
+import functools
+import json
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options as ChromeOptions
+from selenium.webdriver.common.by import By
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import index
+from browser_automation import Node
+from monitoring import TRACER
+from utils import LOG_WRITER
+
+FIXTURE_DIR = Path(__file__).resolve().parent / 'fixture'
+OUTPUT_DIR = Path(__file__).resolve().parent.parent / 'report' / 'bench'
+BASELINE_PATH = OUTPUT_DIR / 'baseline_node.json'
+PIN = '123456'
+ADDRESSES = ['0x' + f'{index:040x}' for index in range(1, 4)]
+
+def start_fixture() -> tuple[ThreadingHTTPServer, str]:
+    '''Web server nội bộ phục vụ `benchmark/fixture`, trả về (server, url gốc).'''
+    class Handler(SimpleHTTPRequestHandler):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=str(FIXTURE_DIR), **kwargs)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+def create_driver(user_data_dir: str, chrome: str|None = None) -> webdriver.Chrome:
+    options = ChromeOptions()
+    if chrome:
+        options.binary_location = chrome
+    options.add_argument('--headless=new')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-gpu')
+    options.add_argument('--window-size=1000,800')
+    options.add_argument(f'--user-data-dir={user_data_dir}')
+    # Không ra mạng: mọi tên miền trừ 127.0.0.1 đều không phân giải được
+    options.add_argument('--host-resolver-rules=MAP * ~NOTFOUND , EXCLUDE 127.0.0.1')
+    return webdriver.Chrome(options=options)
+
+class CommandCounter:
+    '''Đếm lệnh WebDriver bằng cách bọc `driver.execute` (WebElement cũng gửi lệnh qua hàm này).'''
+    def __init__(self, driver: webdriver.Chrome) -> None:
+        self.count = 0
+        execute = driver.execute
+
+        @functools.wraps(execute)
+        def counted(*args, **kwargs):
+            self.count += 1
+            return execute(*args, **kwargs)
+        driver.execute = counted
+
+class StepRecorder:
+    '''Ghi wall/ngủ/số lệnh của từng bước, thời gian ngủ lấy từ span của TRACER (`Utility.wait_time` cộng vào).'''
+    def __init__(self, counter: CommandCounter) -> None:
+        self.counter = counter
+        self.samples: dict[str, list[dict]] = {}
+        self._active: set[str] = set()
+
+    def measure(self, name: str, func, *args, **kwargs):
+        if name in self._active:
+            # Lời gọi đệ quy (unlock, change_chain) được tính vào lần gọi ngoài cùng
+            return func(*args, **kwargs)
+        self._active.add(name)
+        commands = self.counter.count
+        start = time.perf_counter()
+        try:
+            with TRACER.span(name, 'bench', 'bench') as span:
+                return func(*args, **kwargs)
+        finally:
+            wall = time.perf_counter() - start
+            self._active.discard(name)
+            self.samples.setdefault(name, []).append({
+                'wall': wall,
+                'sleep': span.sleep,
+                'active': max(wall - span.sleep, 0),
+                'commands': self.counter.count - commands,
+            })
+
+    def wrap(self, obj, *names: str):
+        '''Đo các phương thức `names` của đối tượng `obj` (gán lại trên instance).'''
+        for name in names:
+            method = getattr(obj, name)
+            setattr(obj, name, functools.partial(self.measure, name, method))
+
+    def results(self) -> dict[str, dict]:
+        '''Trung vị của mỗi bước qua các lần lặp.'''
+        return {
+            name: {
+                key: round(statistics.median(sample[key] for sample in samples), 3 if key != 'commands' else None)
+                for key in ('wall', 'sleep', 'active', 'commands')
+            } | {'runs': len(samples)}
+            for name, samples in self.samples.items()
+        }
+
+class SendLimit:
+    '''Thay `TxTracker` trong luồng Auto: chỉ cho gửi `limit` giao dịch mỗi lần chạy.'''
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.sent = 0
+
+    def wait_for_capacity(self, profile_name: str, timeout: float = 0) -> bool:
+        return self.sent < self.limit
+
+    def pending(self, profile_name: str) -> int:
+        return self.sent
+
+    def record_send(self, profile_name: str, wallet: str, tx_hash: str|None = None):
+        self.sent += 1
+
+def close_extra_tabs(driver: webdriver.Chrome):
+    handles = driver.window_handles
+    for handle in handles[1:]:
+        driver.switch_to.window(handle)
+        driver.close()
+    driver.switch_to.window(handles[0])
+
+def run_primitives(node: Node, recorder: StepRecorder, base: str, repeat: int):
+    home = f'{base}/home.html'
+    for _ in range(repeat):
+        measure = recorder.measure
+        measure('new_tab', node.new_tab, home, 'get')
+        measure('find', node.find, By.XPATH, '//html[contains(@class, "haha-loaded")]')
+        measure('find_all', node.find_all, By.TAG_NAME, 'button')
+        measure('find_and_input', node.find_and_input, By.TAG_NAME, 'input', PIN)
+        measure('find_and_click', node.find_and_click, By.XPATH, '//button[contains(text(), "Unlock")]')
+        measure('find_wait_render', node.find, By.XPATH, '//button[contains(text(), "0x")]')
+        measure('get_text', node.get_text, By.CSS_SELECTOR, '[class="text-nowrap mr-2"]')
+        measure('go_to', node.go_to, f'{home}#quests', 'get')
+        measure('reload_tab', node.reload_tab)
+        close_extra_tabs(node._driver)
+
+def run_flow(node: Node, recorder: StepRecorder, base: str, repeat: int, sends: int, work_dir: Path):
+    # Auto mở trang theo PROJECT_URL, trỏ sang trang mô phỏng; ngày check-in ghi vào thư mục tạm
+    index.PROJECT_URL = base
+    index.CHECKIN_PATH = work_dir / 'checkin.json'
+    for _ in range(repeat):
+        node.tx_tracker = SendLimit(sends)
+        profile = {'profile_name': node.profile_name, 'pin': PIN, 'wallet': ADDRESSES[0], 'recieve_addresses': ADDRESSES}
+        auto = index.Auto(node, profile)
+        recorder.wrap(auto, 'unlock', 'check_in', 'send_eth')
+        recorder.measure('auto_run', auto._run)
+        close_extra_tabs(node._driver)
+
+def compare(results: dict, baseline: dict, time_threshold: float, command_threshold: int, min_delta: float) -> list[str]:
+    '''
+    Returns:
+        list[str]: các bước bị regression (active chậm hơn `time_threshold` và hơn `min_delta` giây, hoặc tăng số lệnh).
+    '''
+    regressions = []
+    for name, row in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        delta = row['active'] - base['active']
+        if delta > min_delta and row['active'] > base['active'] * (1 + time_threshold):
+            regressions.append(f"{name}: active {base['active']:.3f}s -> {row['active']:.3f}s")
+        if row['commands'] > base['commands'] + command_threshold:
+            regressions.append(f"{name}: số lệnh WebDriver {base['commands']} -> {row['commands']}")
+    return regressions
+
+def print_results(results: dict, baseline: dict):
+    print(f"{'Bước':<20}{'Wall (s)':>10}{'Ngủ (s)':>10}{'Active (s)':>12}{'Lệnh':>7}{'Baseline active':>17}{'Baseline lệnh':>15}")
+    for name, row in results.items():
+        base = baseline.get(name, {})
+        base_active = f"{base['active']:.3f}" if base else '-'
+        print(f"{name:<20}{row['wall']:>10.3f}{row['sleep']:>10.3f}{row['active']:>12.3f}{row['commands']:>7}"
+              f"{base_active:>17}{base.get('commands', '-'):>15}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark các thao tác Node và luồng Auto trên trang mô phỏng')
+    parser.add_argument('--only', choices=['primitives', 'flow'], help='Chỉ chạy một phần của bộ benchmark')
+    parser.add_argument('--repeat', type=int, default=3, help='Số lần lặp mỗi phần (lấy trung vị)')
+    parser.add_argument('--sends', type=int, default=2, help='Số giao dịch mỗi lần chạy luồng Auto')
+    parser.add_argument('--wait', type=float, default=None, help='Ghi đè Node.wait (giây), mặc định giữ như khi chạy thật')
+    parser.add_argument('--chrome', default=None, help='Đường dẫn Chrome/Chromium, mặc định để Selenium tự tìm')
+    parser.add_argument('--baseline', type=Path, default=BASELINE_PATH, help='File baseline')
+    parser.add_argument('--save-baseline', action='store_true', help='Ghi kết quả lần chạy này làm baseline')
+    parser.add_argument('--time-threshold', type=float, default=0.2, help='Regression khi active chậm hơn baseline quá tỉ lệ này')
+    parser.add_argument('--min-delta', type=float, default=0.05, help='Bỏ qua chênh lệch active nhỏ hơn (giây)')
+    parser.add_argument('--command-threshold', type=int, default=0, help='Regression khi số lệnh WebDriver tăng quá số này')
+    args = parser.parse_args()
+
+    # Log JSON của profile `bench` không lẫn vào logs/ của tool
+    LOG_WRITER.log_dir = OUTPUT_DIR / 'logs'
+    server, base = start_fixture()
+    TRACER.start()
+    with tempfile.TemporaryDirectory() as work_dir:
+        driver = create_driver(str(Path(work_dir) / 'chrome'), args.chrome)
+        try:
+            recorder = StepRecorder(CommandCounter(driver))
+            node = Node(driver, 'bench')
+            node.snapshot_dir = OUTPUT_DIR / 'snapshot'
+            if args.wait is not None:
+                node.wait = args.wait
+            if args.only in (None, 'primitives'):
+                run_primitives(node, recorder, base, args.repeat)
+            if args.only in (None, 'flow'):
+                run_flow(node, recorder, base, args.repeat, args.sends, Path(work_dir))
+        finally:
+            driver.quit()
+            server.shutdown()
+    TRACER.stop()
+
+    results = recorder.results()
+    baseline = {}
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding='utf-8')).get('steps', {})
+    print_results(results, baseline)
+
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps({
+            'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'wait': args.wait,
+            'repeat': args.repeat,
+            'sends': args.sends,
+            'steps': results,
+        }, ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f'Đã lưu baseline: {args.baseline}')
+        return
+
+    if not baseline:
+        print('Chưa có baseline, chạy với --save-baseline để tạo')
+        return
+    regressions = compare(results, baseline, args.time_threshold, args.command_threshold, args.min_delta)
+    if regressions:
+        print('❌ Regression:')
+        for line in regressions:
+            print(f'   {line}')
+        sys.exit(1)
+    print('✅ Không có regression so với baseline')
+
+if __name__ == '__main__':
+    main()
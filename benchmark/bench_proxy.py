@@ -0,0 +1,177 @@
+'''
+So sánh CPU và RAM giữa proxy relay (proxy_relay.py) và seleniumwire.
+
+Chạy hoàn toàn trên máy: một web server nội bộ làm trang đích và một proxy có xác thực
+giả lập upstream proxy. Mỗi chế độ chạy trong tiến trình riêng, chỉ đo tiến trình proxy đó.
+
+Cách chạy (từ thư mục gốc của tool):
+    python benchmark/bench_proxy.py --requests 500 --size 256 --concurrency 8
+'''
+import argparse
+import asyncio
+import base64
+import multiprocessing
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import psutil
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from proxy_relay import ProxyRelay
+
+USER, PASSWORD = 'bench', 'secret'
+
+def start_target(size_kb: int) -> int:
+    payload = b'x' * size_kb * 1024
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.server_address[1]
+
+def start_upstream() -> int:
+    '''Proxy có xác thực giả lập upstream proxy (hỗ trợ CONNECT và HTTP thường).'''
+    expected = 'Basic ' + base64.b64encode(f'{USER}:{PASSWORD}'.encode()).decode()
+    ready = threading.Event()
+    port_holder = []
+
+    async def pipe(reader, writer):
+        try:
+            while data := await reader.read(65536):
+                writer.write(data)
+                await writer.drain()
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle(reader, writer):
+        try:
+            head = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1')
+        except Exception:
+            writer.close()
+            return
+        request_line, *headers = head.split('\r\n')
+        auth = next((line.split(':', 1)[1].strip() for line in headers if line.lower().startswith('proxy-authorization:')), None)
+        if auth != expected:
+            writer.write(b'HTTP/1.1 407 Proxy Authentication Required\r\nContent-Length: 0\r\n\r\n')
+            writer.close()
+            return
+        method, target, version = request_line.split(' ')
+        if method.upper() == 'CONNECT':
+            host, port = target.rsplit(':', 1)
+            target_reader, target_writer = await asyncio.open_connection(host, int(port))
+            writer.write(b'HTTP/1.1 200 Connection Established\r\n\r\n')
+        else:
+            address, _, path = target.split('://', 1)[1].partition('/')
+            host, port = address.rsplit(':', 1)
+            target_reader, target_writer = await asyncio.open_connection(host, int(port))
+            headers = [line for line in headers if line and not line.lower().startswith('proxy-')]
+            target_writer.write(('\r\n'.join([f'{method} /{path} {version}', *headers]) + '\r\n\r\n').encode('latin-1'))
+        await asyncio.gather(pipe(reader, target_writer), pipe(target_reader, writer))
+
+    def run():
+        async def main():
+            server = await asyncio.start_server(handle, '127.0.0.1', 0)
+            port_holder.append(server.sockets[0].getsockname()[1])
+            ready.set()
+            await server.serve_forever()
+        asyncio.run(main())
+
+    threading.Thread(target=run, daemon=True).start()
+    ready.wait()
+    return port_holder[0]
+
+def _run_seleniumwire(upstream: str, queue):
+    from seleniumwire import backend
+    proxy = backend.create(addr='127.0.0.1', port=0, options={
+        'proxy': {'http': f'http://{upstream}', 'https': f'https://{upstream}'},
+        'verify_ssl': False,
+    })
+    queue.put(proxy.address()[1])
+    threading.Event().wait()
+
+def start_proxy(mode: str, upstream: str) -> tuple[int, psutil.Process, callable]:
+    '''Khởi chạy proxy cần đo. Trả về (cổng, tiến trình, hàm dừng).'''
+    if mode == 'relay':
+        relay = ProxyRelay()
+        port = int(relay.get_proxy_server(upstream).rsplit(':', 1)[1])
+        return port, psutil.Process(relay._process.pid), relay.stop
+
+    queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_run_seleniumwire, args=(upstream, queue), daemon=True)
+    process.start()
+    port = queue.get(timeout=30)
+    return port, psutil.Process(process.pid), process.terminate
+
+def bench(mode: str, upstream: str, target_port: int, total: int, concurrency: int) -> dict:
+    port, process, stop = start_proxy(mode, upstream)
+    proxies = {'http': f'http://127.0.0.1:{port}'}
+    url = f'http://127.0.0.1:{target_port}/payload'
+    peak_rss = process.memory_info().rss
+    cpu_start = process.cpu_times()
+    errors = 0
+
+    def fetch(_):
+        session = requests.Session()
+        session.trust_env = False
+        try:
+            return session.get(url, proxies=proxies, timeout=30).status_code == 200
+        except requests.RequestException:
+            return False
+        finally:
+            session.close()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(fetch, i) for i in range(total)]
+        for future in futures:
+            errors += 0 if future.result() else 1
+            peak_rss = max(peak_rss, process.memory_info().rss)
+    elapsed = time.perf_counter() - start
+    cpu_end = process.cpu_times()
+    stop()
+    return {
+        'mode': mode,
+        'seconds': elapsed,
+        'cpu': (cpu_end.user - cpu_start.user) + (cpu_end.system - cpu_start.system),
+        'peak_rss_mb': peak_rss / 1024 / 1024,
+        'errors': errors,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='So sánh proxy relay với seleniumwire')
+    parser.add_argument('--requests', type=int, default=500, help='Số request mỗi chế độ')
+    parser.add_argument('--size', type=int, default=256, help='Kích thước response (KB)')
+    parser.add_argument('--concurrency', type=int, default=8, help='Số request song song')
+    parser.add_argument('--modes', nargs='+', default=['relay', 'seleniumwire'])
+    args = parser.parse_args()
+
+    target_port = start_target(args.size)
+    upstream = f'{USER}:{PASSWORD}@127.0.0.1:{start_upstream()}'
+
+    print(f"{'Chế độ':<14}{'Thời gian (s)':>15}{'CPU (s)':>10}{'RAM đỉnh (MB)':>16}{'Lỗi':>6}")
+    for mode in args.modes:
+        try:
+            result = bench(mode, upstream, target_port, args.requests, args.concurrency)
+        except Exception as e:
+            print(f'{mode:<14} lỗi: {e}')
+            continue
+        print(f"{result['mode']:<14}{result['seconds']:>15.2f}{result['cpu']:>10.2f}{result['peak_rss_mb']:>16.1f}{result['errors']:>6}")
+
+if __name__ == '__main__':
+    main()
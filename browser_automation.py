@@ -1,11 +1,16 @@
+import os
 import sys
 import glob
+import json
 import time
 import shutil
 import re
+import subprocess
+import threading
 from pathlib import Path
 from math import ceil
 from datetime import datetime
+from collections import deque
 from concurrent.futures import ThreadPoolExecutor
 from typing import cast
 
@@ -22,10 +27,22 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException, ElementClickInterceptedException, ElementNotInteractableException, ElementNotVisibleException, NoSuchWindowException, WebDriverException
 
-from utils import Utility, Chromium, TeleHelper, AIHelper
+from utils import LOG_WRITER, Utility, Chromium, TeleHelper, AIHelper, RunReport, ProxyChecker
+from profile_tools import ProfileStager, ProfileCleaner, ProfileCloner
+from proxy_relay import ProxyRelay
+from network_tools import NetworkMonitor
+from rpc_cache import CachingProxy
+from eth_rpc import EthRpc, TxTracker
+from rate_limit import RateLimiter
+from clock import PACER
+from command_trace import CommandRecorder
+from monitoring import TRACER, METRICS, RUN_METRICS, PROFILER, PERF_CAPTURE_SCRIPT, ProgressView, summarize_performance, trace_methods
+from circuit_breaker import CircuitBreaker
+from extension_tools import ServiceWorkerKeepAlive
 
 DIR_PATH = Path(__file__).parent
 
+@trace_methods('node', exclude=('log', 'enable_log_buffer', 'dump_log_buffer', 'keep_extension_alive', 'capture_performance', 'record_commands'))
 class Node:
     def __init__(self, driver: webdriver.Chrome, profile_name: str, tele_bot: TeleHelper|None = None, ai_bot: AIHelper|None = None) -> None:
         '''
@@ -42,6 +59,149 @@ class Node:
         # Khoảng thời gian đợi mặc định giữa các hành động (giây)
         self.wait = 3
         self.timeout = 30  # Thời gian chờ mặc định (giây) cho các thao tác
+        # Chế độ shared browser: chỉ làm việc trên các tab thuộc profile này (None = mọi tab)
+        self.owned_handles: list[str]|None = None
+        # Rule chặn request và thống kê mạng của profile (None = tắt)
+        self.network: NetworkMonitor|None = None
+        # Theo dõi giao dịch đã gửi, dùng chung cho mọi profile (None = tắt)
+        self.tx_tracker: TxTracker|None = None
+        # Giới hạn tốc độ các thao tác gọi backend/RPC, dùng chung cho mọi profile (None = không giới hạn)
+        self.rate_limiter: RateLimiter|None = None
+        # Circuit breaker theo loại lỗi, dùng chung cho mọi profile (None = tắt)
+        self.breaker: CircuitBreaker|None = None
+        # Theo dõi/giữ service worker của extension (None = tắt)
+        self.sw_keepalive: ServiceWorkerKeepAlive|None = None
+        # Thư mục lưu ảnh snapshot và log của ring buffer
+        self.snapshot_dir = DIR_PATH / 'snapshot'
+        # Ring buffer các sự kiện log gần nhất, chỉ in ra khi profile lỗi (None = in ngay từng dòng)
+        self.log_buffer: deque|None = None
+        # Đọc Performance API của trang ở ranh giới mỗi bước (False = tắt)
+        self.perf_capture = False
+        self.perf_captures: list[dict] = []
+        self._perf_last_step: str|None = None
+        # Ghi chuỗi lệnh WebDriver để phát lại/so sánh (None = tắt)
+        self.command_recorder: CommandRecorder|None = None
+
+    def enable_log_buffer(self, size: int = 300):
+        '''
+        Giữ `size` dòng log gần nhất trong bộ nhớ thay vì in ngay. Chạy thành công chỉ in dòng tóm tắt,
+        toàn bộ buffer được ghi ra (cùng ảnh snapshot) ở mỗi lần `snapshot()` hoặc khi profile bị lỗi.
+        '''
+        self.log_buffer = deque(maxlen=size)
+
+    def dump_log_buffer(self, reason: str) -> Path|None:
+        '''
+        Ghi các dòng log trong buffer ra `<snapshot_dir>/<profile>_<thời gian>.log` (cạnh ảnh snapshot)
+        và vào file JSON-lines của profile, sau đó làm rỗng buffer.
+
+        Returns:
+            Path | None: đường dẫn file log, None nếu buffer rỗng hoặc đang tắt.
+        '''
+        if not self.log_buffer:
+            return None
+        events = list(self.log_buffer)
+        self.log_buffer.clear()
+        file_path = self.snapshot_dir / f"{self.profile_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+        try:
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(file_path, 'w', encoding='utf-8') as f:
+                for ts, func_name, message in events:
+                    f.write(f"{datetime.fromtimestamp(ts).strftime('%H:%M:%S.%f')[:-3]} [{func_name}]: {message}\n")
+        except Exception as e:
+            Utility.logger(self.profile_name, f'❌ Không thể ghi file log: {e}')
+            file_path = None
+        for ts, func_name, message in events:
+            LOG_WRITER.write(self.profile_name, func_name, message, console=False, event_ts=ts)
+        Utility.logger(self.profile_name, f'📄 {len(events)} dòng log gần nhất ({reason}): {file_path}')
+        return file_path
+    
+    def keep_extension_alive(self, extension_id: str|None = None, keep_alive: bool = True) -> bool:
+        '''
+        Theo dõi service worker (MV3) của extension trong suốt phiên và giữ cho nó không bị Chrome tắt khi rảnh.
+
+        Args:
+            extension_id (str, optional): ID extension cần giữ. Mặc định None (mọi extension).
+            keep_alive (bool, optional): False, chỉ đếm số lần worker bị tắt/cold start (để so sánh). Mặc định True.
+
+        Returns:
+            bool: False nếu không kết nối được CDP của trình duyệt.
+        '''
+        address = self._driver.capabilities.get('goog:chromeOptions', {}).get('debuggerAddress')
+        if not address:
+            return False
+        # Đang thống kê lưu lượng: tính cả request của service worker
+        network = self.network if self.network and self.network.stats else None
+        # Trình duyệt dùng chung: chỉ theo dõi worker thuộc profile (browser context) của node
+        page_target_id = self.owned_handles[0] if self.owned_handles else None
+        self.sw_keepalive = ServiceWorkerKeepAlive(address, extension_id, keep_alive, profile_name=self.profile_name,
+                                                   network=network, page_target_id=page_target_id)
+        if not self.sw_keepalive.start():
+            self.sw_keepalive = None
+            return False
+        return True
+
+    def record_commands(self, redact_keys: bool = True) -> CommandRecorder:
+        '''
+        Ghi mọi lệnh WebDriver của trình duyệt (thời điểm, thời lượng, tham số, kết quả rút gọn) để phát lại
+        hoặc so sánh bằng `command_trace.py`. Gọi `self.command_recorder.save()` để ghi file.
+
+        Args:
+            redact_keys (bool, optional): True, che nội dung nhập (pin, địa chỉ ví) trong bản ghi. Mặc định True.
+        '''
+        if not self.command_recorder:
+            self.command_recorder = CommandRecorder(self._driver, self.profile_name, redact_keys).attach()
+        return self.command_recorder
+
+    def capture_performance(self, step: str) -> dict|None:
+        '''
+        Đọc số liệu Performance API của tab hiện tại (navigation, paint, resource, long task) trong một lần `execute_script`.
+
+        Số liệu resource/long task là phần phát sinh từ lần đọc trước (`since`) đến ranh giới `step`, dùng để tách
+        thời gian của chính trang/extension (tải trang, fetch RPC, long task) khỏi thời gian của tool.
+        Kết quả được gắn vào span đang mở (`--trace`) và lưu trong báo cáo của profile.
+
+        Returns:
+            dict | None: None nếu chưa bật `perf_capture` hoặc không đọc được.
+        '''
+        if not self.perf_capture:
+            return None
+        start = time.perf_counter()
+        try:
+            data = self._driver.execute_script(PERF_CAPTURE_SCRIPT)
+        except Exception:
+            return None
+        if not isinstance(data, dict):
+            return None
+        data.update(step=step, since=self._perf_last_step, capture_ms=round((time.perf_counter() - start) * 1000, 1))
+        self._perf_last_step = step
+        self.perf_captures.append(data)
+        TRACER.annotate(perf=data)
+        return data
+
+    def _apply_network_rules(self):
+        '''
+        Áp dụng rule chặn request cho tab hiện tại (rule CDP gắn theo từng tab).
+        '''
+        if self.network:
+            self.network.apply(self._driver)
+
+    def _drain_network(self):
+        '''
+        Đọc performance log giữa chừng ở ranh giới bước, tránh buffer của chromedriver bị tràn.
+        '''
+        if self.network:
+            self.network.drain(self._driver)
+
+    def _window_handles(self) -> list[str]:
+        '''
+        Danh sách tab của profile. Ở chế độ shared browser, bỏ qua tab của các profile khác
+        đang mở trong cùng trình duyệt.
+        '''
+        handles = self._driver.window_handles
+        if self.owned_handles is None:
+            return handles
+        self.owned_handles = [handle for handle in self.owned_handles if handle in handles]
+        return list(self.owned_handles)
     
     def _get_wait(self, wait: float|None = None):
         if wait is None:
@@ -54,7 +214,7 @@ class Node:
         return timeout
     
     def _save_screenshot(self) -> str|None:
-        snapshot_dir = DIR_PATH / 'snapshot'
+        snapshot_dir = self.snapshot_dir
         screenshot_png = self.take_screenshot()
         
         if screenshot_png is None:
@@ -157,7 +317,11 @@ class Node:
                     f"Lỗi - {action} phải là một function hoặc tuple chứa function.")
                 return False
 
-            if not self._execute_node(func, *args):
+            with TRACER.span(f"chain:{getattr(func, '__name__', func)}", 'chain', self.profile_name) as span:
+                ok = self._execute_node(func, *args)
+                if not ok:
+                    span.outcome = 'fail'
+            if not ok:
                 self.log(
                     f'Lỗi {["skip "] if not stop_on_failure else ""}- {message_error}')
                 if stop_on_failure:
@@ -178,7 +342,11 @@ class Node:
 
         Mô tả:
             - Phương thức sử dụng tiện ích `Utility.logger` để ghi lại thông tin nhật ký kèm theo tên hồ sơ (`profile_name`) của phiên làm việc hiện tại.
+            - Khi bật `enable_log_buffer()`, dòng log chỉ được giữ trong ring buffer (không in, không ghi file).
         '''
+        if show_log and self.log_buffer is not None:
+            self.log_buffer.append((time.time(), sys._getframe(1).f_code.co_name, message))
+            return
         Utility.logger(profile_name=self.profile_name,
                        message=message, show_log=show_log)
     
@@ -208,12 +376,15 @@ class Node:
             Phương thức này sẽ ghi lại thông điệp vào log và chụp ảnh màn hình trình duyệt.
             Nếu `stop=True`, phương thức sẽ quăng lỗi `ValueError`, dừng quá trình thực thi.
             Nếu `data_tele` tồn tại, ảnh chụp sẽ được gửi lên Telegram. Nếu không, ảnh sẽ được lưu cục bộ.
+            Nếu bật ring buffer log (`enable_log_buffer()`), thông điệp luôn được in và các dòng log gần nhất
+            được ghi ra cạnh ảnh (`dump_log_buffer()`) ở mọi lần snapshot.
         '''
-        self.log(message)
+        Utility.logger(self.profile_name, message, func_name='snapshot')
         if self.tele_bot and self.tele_bot.valid:
             self._send_screenshot_to_telegram(message)
         else:
             self._save_screenshot()
+        self.dump_log_buffer(message)
 
         if stop:
             raise ValueError(f'{message}')
@@ -252,7 +423,15 @@ class Node:
         Utility.wait_time(wait)
 
         try:
-            self._driver.switch_to.new_window(WindowTypes.TAB)
+            if self.owned_handles is None:
+                self._driver.switch_to.new_window(WindowTypes.TAB)
+            else:
+                # Shared browser: mở tab bằng window.open để tab thuộc đúng profile hiện tại
+                window_name = f'tab_{time.time_ns()}'
+                self._driver.execute_script("window.open('about:blank', arguments[0]);", window_name)
+                self._driver.switch_to.window(window_name)
+                self.owned_handles.append(self._driver.current_window_handle)
+            self._apply_network_rules()
 
             if url:
                 return self.go_to(url=url, method=method, wait=1, timeout=timeout)
@@ -297,6 +476,8 @@ class Node:
                 lambda driver: driver.execute_script(
                     "return document.readyState") == 'complete'
             )
+            self.capture_performance('go_to')
+            self._drain_network()
             self.log(f'Trang {url} đã tải thành công.')
             return True
 
@@ -336,10 +517,10 @@ class Node:
         Utility.wait_time(wait)
         search_context = parent_element if parent_element else self._driver
 
-        start_time = time.time()
+        start_time = PACER.now()
         wait_log = True
         try:
-            while time.time() - start_time < timeout:
+            while PACER.now() - start_time < timeout:
                 try:
                     element = search_context.find_element(by, value)
                     if not element.is_displayed():
@@ -356,7 +537,7 @@ class Node:
                         self.log(f"✅ Phần tử ({by}, {value}) không còn trong DOM.")
                     return True
 
-                Utility.wait_time(0.5)
+                Utility.wait_time(0.5, kind='poll')
 
             if show_log:
                 self.log(f"⏰ Timeout - Phần tử ({by}, {value}) vẫn còn sau {timeout}s.")
@@ -588,6 +769,9 @@ class Node:
             if element is None:
                 self.log('❌ Không có phần tử để click (element is None)')
                 return False
+            # Ranh giới bước: số liệu của trang từ bước trước đến trước khi click
+            self.capture_performance('click')
+            self._drain_network()
             element.click()
             self.log(f'Click phần tử thành công')
             return True
@@ -893,14 +1077,14 @@ class Node:
         except Exception as e:
             # Tab hiện tịa đã đóng, chuyển đến tab đầu tiên
             try:
-                current_handle = self._driver.window_handles[0]
+                current_handle = self._window_handles()[0]
             except Exception as e:
                 self.log(f'Lỗi không xác đinh: current_handle {e}')
 
         try:
-            end_time = time.time() + timeout
-            while time.time() < end_time:
-                for handle in self._driver.window_handles:
+            end_time = PACER.now() + timeout
+            while PACER.now() < end_time:
+                for handle in self._window_handles():
                     self._driver.switch_to.window(handle)
 
                     if type == 'title':
@@ -912,13 +1096,14 @@ class Node:
 
                     if match_found:
                         found = True
+                        self._apply_network_rules()
                         self.log(
                             message=f'Đã chuyển sang tab: {self._driver.title} ({self._driver.current_url})',
                             show_log=show_log
                         )
                         return found
 
-                Utility.wait_time(2)
+                Utility.wait_time(2, kind='poll')
 
             # Không tìm thấy → Quay lại tab cũ
             self._driver.switch_to.window(current_handle)
@@ -951,6 +1136,8 @@ class Node:
         except:
             self._driver.execute_script("window.location.reload();")
         
+        self.capture_performance('reload_tab')
+        self._drain_network()
         self.log('Tab đã reload')
 
 
@@ -972,7 +1159,7 @@ class Node:
         wait = self._get_wait(wait)
 
         current_handle = self._driver.current_window_handle
-        all_handles = self._driver.window_handles
+        all_handles = self._window_handles()
 
         Utility.wait_time(wait)
         # Nếu chỉ có 1 tab, không thể đóng
@@ -1082,13 +1269,13 @@ class Node:
         return result
         
     def check_window_handles(self):
-        Utility.wait_time(5, True)
+        Utility.wait_time(5, True, 'settle')
         original_handle = self._driver.current_window_handle
-        window_handles = self._driver.window_handles
+        window_handles = self._window_handles()
 
         print("Danh sách các cửa sổ/tab đang hoạt động:", window_handles)
         # handle là ID, ví dụ có 2 page ['433E0A85799F602DFA5CE74CA1D00682', '2A6FD93FC931056CCF842DF11782C45B']
-        for handle in self._driver.window_handles:
+        for handle in window_handles:
             self._driver.switch_to.window(handle)
             print(f'{self._driver.title} - {self._driver.current_url}')
 
@@ -1096,13 +1283,15 @@ class Node:
         print(f'Hiện đang ở {self._driver.title}')
 
 class BrowserManager:                                                                                                                                                                              # Anh em cứ yên tâm chạy nhé, không có mã độc đâu! :D Chỉ giả vờ đánh lừa người ngoài chút thôi! 🚀
-    def __init__(self, AutoHandlerClass=None, SetupHandlerClass=None) -> None:
+    def __init__(self, AutoHandlerClass=None, SetupHandlerClass=None, PreflightHandlerClass=None) -> None:
         '''
         Khởi tạo đối tượng BrowserManager để quản lý trình duyệt.
 
         Tham số:
         - AutoHandlerClass (class, optional): Lớp xử lý tự động các tác vụ trên trình duyệt.
         - SetupHandlerClass (class, optional): Lớp xử lý thiết lập môi trường trình duyệt.
+        - PreflightHandlerClass (class, optional): Lớp kiểm tra trước khi chạy auto (không mở trình duyệt).
+          Khởi tạo với `BrowserManager`, phương thức `run(profiles)` trả về danh sách profile cần chạy.
 
         Chức năng:
         - Cho phép tùy chỉnh cách quản lý trình duyệt bằng cách truyền vào các lớp xử lý tương ứng.
@@ -1115,14 +1304,56 @@ class BrowserManager:
         '''
         self.AutoHandlerClass = AutoHandlerClass
         self.SetupHandlerClass = SetupHandlerClass
+        self.PreflightHandlerClass = PreflightHandlerClass
 
         self.headless = False
         self.disable_gpu = False
+        # Giữ trình duyệt mở sau khi chạy, lần sau gắn lại qua remote debugging
+        self.keep_browser = False
+        # Giữ service worker của extension không bị tắt (luôn đếm số lần cold start)
+        self.extension_keepalive = False
+        # Chạy auto in mọi dòng log (mặc định chỉ in khi profile lỗi)
+        self.verbose_log = False
+        # In bảng tiến độ khi chạy auto
+        self.progress = False
+        # Đọc Performance API của trang ở mỗi bước
+        self.perf_capture = False
+        # Ghi chuỗi lệnh WebDriver của mỗi profile
+        self.record_commands = False
+        # Số profile tối đa dùng chung một trình duyệt (--profile-directory). 0 = mỗi profile một trình duyệt
+        self.shared_group_size = 0
+        self._shared_browsers: dict[int, dict] = {}
+        self._shared_lock = threading.RLock()
+        # Chạy profile từ RAM (None = tắt)
+        self.stager: ProfileStager|None = None
+        self.cleaner = ProfileCleaner()
+        self.cloner = ProfileCloner()
+        # Proxy có xác thực: 'relay' (mặc định, một tiến trình relay dùng chung) hoặc 'seleniumwire'
+        proxy_mode = Utility.read_config('PROXY_MODE')
+        self.proxy_mode = proxy_mode[0].strip().lower() if proxy_mode else 'relay'
+        self.proxy_relay = ProxyRelay()
+        self.proxy_checker = ProxyChecker()
+        # Rule chặn request qua CDP: bộ rule có sẵn (--block) và mẫu URL tự thêm (BLOCK_URL trong config.txt)
+        self.block_presets: list[str] = []
+        self.block_patterns = [pattern.strip() for pattern in Utility.read_config('BLOCK_URL') or [] if pattern.strip()]
+        # Bật performance log của chromedriver để thống kê lưu lượng (--network-stats)
+        self.network_stats = False
+        # Cache JSON-RPC dùng chung cho TxTracker và pre-flight (None = tắt), không áp vào trình duyệt
+        self.rpc_cache: CachingProxy|None = None
+        # Theo dõi xác nhận giao dịch của các profile trong lần chạy auto
+        self.tx_tracker: TxTracker|None = None
+        # Token bucket cho các thao tác claim/send (RATE_LIMIT trong config.txt)
+        self.rate_limiter = RateLimiter.from_config()
+        # Circuit breaker của lần chạy auto, tạo mới trong run_multi
+        self.breaker: CircuitBreaker|None = None
+        self.report = RunReport()
         self.user_data_dir = self._get_user_data_dir()
         self.path_chromium = Chromium().path
         self.tele_bot = TeleHelper()
         self.ai_bot = AIHelper()
         self.matrix: list[list[str | None]] = [[None]]
+        # Số giây chờ kiểm tra lại khi hết ô trống trong run_multi
+        self.poll_interval = 10
         self.extensions = []
 
         # lấy kích thước màn hình
@@ -1217,25 +1448,91 @@ class BrowserManager:
                     self.matrix[row][col] = None
                     return True
         return False
-        
-    def _browser(self, profile_name: str, proxy_info: str|None = None, block_media: bool = False) -> webdriver.Chrome:
+
+    def _get_debug_path(self, profile_name: str) -> Path:
         '''
-        Phương thức khởi tạo trình duyệt Chrome (browser) với các cấu hình cụ thể, tự động khởi chạy khi gọi `BrowserManager.run_browser()`.
+        Đường dẫn file lưu endpoint remote debugging của profile (dùng cho chế độ `keep_browser`).
+        '''
+        return self.user_data_dir / f'''{re.sub(r'[^a-zA-Z0-9_\-]', '_', profile_name)}.debug'''
+
+    def _attach_browser(self, profile_name: str) -> webdriver.Chrome|None:
+        '''
+        Gắn vào trình duyệt đang chạy của profile qua `debuggerAddress` (chế độ `keep_browser`).
 
         Args:
-            profile_name (str): tên hồ sơ. Được tự động thêm vào khi chạy phương thức `BrowserManager.run_browser()`
+            profile_name (str): tên hồ sơ.
 
         Returns:
-            driver (webdriver.Chrome): Đối tượng trình duyệt được khởi tạo.
+            webdriver.Chrome | None: driver đã gắn vào trình duyệt cũ, hoặc None nếu
+            chưa có endpoint, trình duyệt đã tắt hoặc gắn thất bại (khi đó cần khởi chạy mới).
+        '''
+        debug_path = self._get_debug_path(profile_name)
+        if not debug_path.exists():
+            return None
 
-        Mô tả:
-            - Dựa trên thông tin hồ sơ (`profile_data`), hàm sẽ thiết lập và khởi tạo trình duyệt Chrome với các tùy chọn cấu hình sau:
-                - Chạy browser với dữ liệu người dùng (`--user-data-dir`).
-                - Tùy chọn tỉ lệ hiển thị trình duyệt (`--force-device-scale-factor`)
-                - Tắt các thông báo tự động và hạn chế các tính năng tự động hóa của trình duyệt.
-                - Vô hiệu hóa dịch tự động của Chrome.
-                - Vô hiệu hóa tính năng lưu mật khẩu (chỉ áp dụng khi sử dụng hồ sơ mặc định).
-            - Các tiện ích mở rộng (extensions) được thêm vào trình duyệt (Nếu có).       
+        try:
+            address = json.loads(debug_path.read_text(encoding='utf-8'))['address']
+        except Exception as e:
+            self._log(profile_name, f'File debug lỗi, khởi chạy mới: {e}')
+            debug_path.unlink(missing_ok=True)
+            return None
+
+        if not Utility.is_debugger_alive(address):
+            self._log(profile_name, f'Trình duyệt cũ ({address}) đã tắt, khởi chạy mới')
+            debug_path.unlink(missing_ok=True)
+            return None
+
+        chrome_options = ChromeOptions()
+        if self.path_chromium:
+            chrome_options.binary_location = str(self.path_chromium)
+        chrome_options.add_experimental_option('debuggerAddress', address)
+        if self.network_stats:
+            NetworkMonitor.configure_options(chrome_options)
+
+        try:
+            driver = webdriver.Chrome(service=Service(log_path='NUL'), options=chrome_options)
+        except Exception as e:
+            self._log(profile_name, f'Không thể gắn vào trình duyệt cũ ({address}): {e}')
+            debug_path.unlink(missing_ok=True)
+            return None
+
+        # Đóng các tab còn sót lại từ lần chạy trước, giữ lại tab đầu tiên
+        try:
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+        except Exception as e:
+            self._log(profile_name, f'Lỗi khi dọn tab cũ: {e}')
+
+        self._log(profile_name, f'Đã gắn vào trình duyệt đang chạy ({address})')
+        return driver
+
+    def _close_browser(self, driver: webdriver.Chrome, profile_name: str):
+        '''
+        Đóng trình duyệt sau khi chạy xong.
+
+        Với `keep_browser`, chỉ dừng chromedriver và giữ trình duyệt mở để lần sau gắn lại;
+        ngược lại gọi `driver.quit()` như bình thường.
+        '''
+        if self.keep_browser and self._get_debug_path(profile_name).exists():
+            try:
+                driver.service.stop()
+                self._log(profile_name, 'Giữ trình duyệt mở cho lần chạy sau')
+                return
+            except Exception as e:
+                self._log(profile_name, f'Lỗi khi tách khỏi trình duyệt: {e}')
+        driver.quit()
+
+    def _get_chrome_options(self, user_data_dir: Path, block_media: bool = False, profile_directory: str|None = None) -> ChromeOptions:
+        '''
+        Tạo `ChromeOptions` dùng chung cho mọi cách khởi chạy trình duyệt.
+
+        Args:
+            user_data_dir (Path): thư mục truyền cho `--user-data-dir`.
+            block_media (bool, optional): True, block image và video để tăng hiệu suất. Mặc định `False`.
+            profile_directory (str, optional): tên profile truyền cho `--profile-directory` (chế độ shared browser).
         '''
         rows = len(self.matrix)
         scale = 1 if (rows == 1) else 0.5
@@ -1244,8 +1541,10 @@ class BrowserManager:
 
         if self.path_chromium:
             chrome_options.binary_location = str(self.path_chromium)
-        chrome_options.add_argument(
-            f'--user-data-dir={self.user_data_dir}/{profile_name}')
+        chrome_options.add_argument(f'--user-data-dir={user_data_dir}')
+        if profile_directory:
+            # Chế độ shared browser: nhiều profile chung một user-data-dir
+            chrome_options.add_argument(f'--profile-directory={profile_directory}')
         # chrome_options.add_argument(f'--profile-directory={profile_name}') # tắt để sử dụng profile default trong profile_name
         chrome_options.add_argument('--lang=en')
         chrome_options.add_argument("--mute-audio")
@@ -1291,11 +1590,54 @@ class BrowserManager:
             chrome_options.add_argument("--disable-gpu")  # Tắt GPU, dành cho máy không có GPU vật lý
         if self.headless:
             chrome_options.add_argument("--headless=new") # ẩn UI khi đang chạy
-        
+
+        # performance log để thống kê request (NetworkMonitor)
+        if self.network_stats:
+            NetworkMonitor.configure_options(chrome_options)
+
         # add extensions
         for ext in self.extensions:
             chrome_options.add_extension(ext)
 
+        return chrome_options
+
+    def _browser(self, profile_name: str, proxy_info: str|None = None, block_media: bool = False, profile_path: Path|None = None) -> webdriver.Chrome:
+        '''
+        Phương thức khởi tạo trình duyệt Chrome (browser) với các cấu hình cụ thể, tự động khởi chạy khi gọi `BrowserManager.run_browser()`.
+
+        Args:
+            profile_name (str): tên hồ sơ. Được tự động thêm vào khi chạy phương thức `BrowserManager.run_browser()`
+            profile_path (Path, optional): thư mục user data thay thế (ví dụ bản sao trên RAM). Mặc định `user_data_dir/profile_name`.
+
+        Returns:
+            driver (webdriver.Chrome): Đối tượng trình duyệt được khởi tạo.
+
+        Mô tả:
+            - Dựa trên thông tin hồ sơ (`profile_data`), hàm sẽ thiết lập và khởi tạo trình duyệt Chrome với các tùy chọn cấu hình sau:
+                - Chạy browser với dữ liệu người dùng (`--user-data-dir`).
+                - Tùy chọn tỉ lệ hiển thị trình duyệt (`--force-device-scale-factor`)
+                - Tắt các thông báo tự động và hạn chế các tính năng tự động hóa của trình duyệt.
+                - Vô hiệu hóa dịch tự động của Chrome.
+                - Vô hiệu hóa tính năng lưu mật khẩu (chỉ áp dụng khi sử dụng hồ sơ mặc định).
+            - Các tiện ích mở rộng (extensions) được thêm vào trình duyệt (Nếu có).       
+        '''
+        # Chế độ keep_browser: ưu tiên gắn vào trình duyệt còn sống từ lần chạy trước
+        # (profile có proxy luôn khởi chạy mới vì proxy gắn với tiến trình Python hiện tại)
+        keep_browser = self.keep_browser and not proxy_info
+        if keep_browser:
+            driver = self._attach_browser(profile_name)
+            if driver:
+                Utility.lock_profile(self.user_data_dir / f'''{re.sub(r'[^a-zA-Z0-9_\-]', '_', profile_name)}.lock''')
+                return driver
+
+        chrome_options = self._get_chrome_options(profile_path or self.user_data_dir / profile_name, block_media)
+        debug_port = None
+        if keep_browser:
+            # Mở cổng debug cố định và không để chromedriver tắt trình duyệt khi dừng
+            debug_port = Utility.get_free_port()
+            chrome_options.add_argument(f'--remote-debugging-port={debug_port}')
+            chrome_options.add_experimental_option('detach', True)
+
         service = Service(log_path='NUL')
 	  
         # # run proxy
@@ -1303,9 +1645,16 @@ class BrowserManager:
         path_lock = self.user_data_dir / f'''{re.sub(r'[^a-zA-Z0-9_\-]', '_', profile_name)}.lock'''
         if proxy_info:
             self._log(profile_name, 'Kiểm tra proxy')
-            use_proxy = Utility.is_proxy_working(proxy_info)
+            use_proxy = self.proxy_checker.is_working(proxy_info)
+        use_seleniumwire = use_proxy and self.proxy_mode == 'seleniumwire'
+        if use_proxy and not use_seleniumwire:
+            try:
+                chrome_options.add_argument(f'--proxy-server={self.proxy_relay.get_proxy_server(proxy_info)}')
+            except Exception as e:
+                self._log(profile_name, f'Lỗi khi khởi chạy proxy relay, dùng seleniumwire: {e}')
+                use_seleniumwire = True
         self._log(profile_name, 'Đang mở Chrome...')
-        if use_proxy:
+        if use_seleniumwire:
             try:
                 from seleniumwire import webdriver
                 seleniumwire_options = {
@@ -1333,8 +1682,401 @@ class BrowserManager:
                 Utility.unlock_profile(path_lock)
                 self._log(profile_name, f'Lỗi khi không sử dụng proxy: {e}')
                 exit()
+
+        if debug_port:
+            # Ghi lại endpoint để các lần chạy sau gắn lại
+            self._get_debug_path(profile_name).write_text(
+                json.dumps({'address': f'127.0.0.1:{debug_port}', 'created': time.time()}),
+                encoding='utf-8'
+            )
         return driver
 
+    def _get_shared_group(self, profile_name: str) -> int:
+        '''
+        Lấy nhóm shared browser của profile (chế độ `shared_group_size > 0`).
+
+        Nhóm được lưu cố định trong `user_data/_shared/groups.json` để dữ liệu profile luôn nằm
+        trong cùng một user-data-dir qua các lần chạy. Profile mới được xếp vào nhóm đầu tiên còn chỗ.
+        '''
+        groups_path = self.user_data_dir / '_shared' / 'groups.json'
+        with self._shared_lock:
+            groups: dict[str, int] = {}
+            if groups_path.exists():
+                try:
+                    groups = json.loads(groups_path.read_text(encoding='utf-8'))
+                except Exception as e:
+                    self._log(profile_name, f'File {groups_path} lỗi, tạo lại: {e}')
+
+            if profile_name not in groups:
+                counts: dict[int, int] = {}
+                for group in groups.values():
+                    counts[group] = counts.get(group, 0) + 1
+                group = 0
+                while counts.get(group, 0) >= self.shared_group_size:
+                    group += 1
+                groups[profile_name] = group
+                groups_path.parent.mkdir(parents=True, exist_ok=True)
+                groups_path.write_text(json.dumps(groups, ensure_ascii=False, indent=2), encoding='utf-8')
+
+            return groups[profile_name]
+
+    def _get_shared_dir(self, group: int) -> Path:
+        return self.user_data_dir / '_shared' / f'group_{group}'
+
+    def _import_shared_profile(self, profile_name: str, profile_dir: Path):
+        '''
+        Lần đầu profile chạy ở chế độ dùng chung: chép dữ liệu của profile riêng (`user_data/<profile>/Default`:
+        extension, dữ liệu ví, cookies...) vào `user_data/_shared/group_<số>/<profile>`, bỏ qua cache.
+        Sau đó hai bản chạy độc lập, thay đổi ở chế độ dùng chung không được ghi ngược về profile riêng.
+        '''
+        if profile_dir.exists():
+            return
+        source = self.user_data_dir / profile_name / 'Default'
+        if not source.is_dir():
+            return
+        # File khóa của Chrome và cache có thể tái tạo
+        skip = {'SingletonLock', 'SingletonCookie', 'SingletonSocket', 'lockfile', 'LOCK',
+                'Cache', 'Code Cache', 'GPUCache', 'DawnCache', 'DawnGraphiteCache', 'DawnWebGPUCache'}
+        # Chép vào thư mục tạm rồi đổi tên, tránh để lại bản chép dở dang
+        tmp_dir = profile_dir.with_name(f'.{profile_dir.name}.importing')
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        profile_dir.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copytree(source, tmp_dir, ignore=lambda _, names: [name for name in names if name in skip])
+        os.replace(tmp_dir, profile_dir)
+        self._log(profile_name, f'Đã chép dữ liệu profile vào Chrome dùng chung: {profile_dir}')
+
+    @staticmethod
+    def _write_profile_prefs(profile_dir: Path, prefs: dict):
+        '''
+        Gộp `prefs` (khóa dạng `a.b.c` như option `prefs` của chromedriver) vào file `Preferences` của profile.
+        Ghi qua file tạm + `os.replace` để Chrome không bao giờ đọc phải file ghi dở.
+        '''
+        if not prefs:
+            return
+        preferences_path = profile_dir / 'Preferences'
+        data = {}
+        if preferences_path.exists():
+            try:
+                data = json.loads(preferences_path.read_text(encoding='utf-8'))
+            except (OSError, ValueError) as e:
+                Utility.logger(profile_dir.name, f'File Preferences lỗi, tạo lại: {e}')
+                data = {}
+
+        def merge(target: dict, key: str, value):
+            *parents, leaf = key.split('.')
+            for part in parents:
+                if not isinstance(target.get(part), dict):
+                    target[part] = {}
+                target = target[part]
+            if isinstance(value, dict) and isinstance(target.get(leaf), dict):
+                for child_key, child_value in value.items():
+                    merge(target[leaf], child_key, child_value)
+            else:
+                target[leaf] = value
+
+        for key, value in prefs.items():
+            merge(data, key, value)
+        profile_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = preferences_path.with_name('Preferences.tmp')
+        tmp_path.write_text(json.dumps(data), encoding='utf-8')
+        os.replace(tmp_path, preferences_path)
+
+    def _get_chrome_binary(self) -> str|None:
+        '''
+        Đường dẫn file chạy Chrome/Chromium, dùng để mở thêm profile vào trình duyệt đang chạy.
+        '''
+        if self.path_chromium:
+            return str(self.path_chromium)
+        for name in ('chrome', 'google-chrome', 'chromium', 'chromium-browser'):
+            found = shutil.which(name)
+            if found:
+                return found
+        for path in (r'C:\Program Files\Google\Chrome\Application\chrome.exe',
+                     r'C:\Program Files (x86)\Google\Chrome\Application\chrome.exe'):
+            if Path(path).exists():
+                return path
+        return None
+
+    def _shared_browser(self, profile_name: str, block_media: bool = False) -> tuple[webdriver.Chrome, str]|None:
+        '''
+        Mở profile dưới dạng `--profile-directory` trong trình duyệt dùng chung của nhóm.
+
+        - Profile đầu tiên của nhóm khởi chạy trình duyệt qua chromedriver (mở cổng remote debugging).
+        - Các profile sau gọi lại file chạy Chrome với cùng `--user-data-dir` để trình duyệt đang chạy
+          mở thêm cửa sổ của profile đó, rồi gắn chromedriver qua `debuggerAddress`.
+        - `prefs` được ghi trực tiếp vào `Preferences` của từng profile, vì option `prefs` của chromedriver
+          chỉ áp dụng cho profile Default.
+        - Lần đầu, dữ liệu của profile riêng (`user_data/<profile>`) được chép vào thư mục dùng chung.
+
+        Returns:
+            tuple[webdriver.Chrome, str] | None: (driver, handle cửa sổ của profile), None nếu không mở được
+            (khi đó dùng chế độ mỗi profile một trình duyệt).
+        '''
+        group = self._get_shared_group(profile_name)
+        shared_dir = self._get_shared_dir(group)
+        chrome_options = self._get_chrome_options(shared_dir, block_media, profile_directory=profile_name)
+        self._import_shared_profile(profile_name, shared_dir / profile_name)
+        self._write_profile_prefs(shared_dir / profile_name, chrome_options.experimental_options.get('prefs', {}))
+
+        with self._shared_lock:
+            state = self._shared_browsers.get(group)
+            if state and not Utility.is_debugger_alive(state['address']):
+                self._log(profile_name, f'Trình duyệt nhóm {group} đã tắt, khởi chạy lại')
+                state = None
+
+            if state is None:
+                debug_port = Utility.get_free_port()
+                chrome_options.add_argument(f'--remote-debugging-port={debug_port}')
+                self._log(profile_name, f'Đang mở Chrome dùng chung (nhóm {group})...')
+                try:
+                    driver = webdriver.Chrome(service=Service(log_path='NUL'), options=chrome_options)
+                except Exception as e:
+                    self._log(profile_name, f'Lỗi khi mở Chrome dùng chung: {e}')
+                    return None
+                state = {'address': f'127.0.0.1:{debug_port}', 'leader': driver, 'profiles': set()}
+                self._shared_browsers[group] = state
+                state['profiles'].add(profile_name)
+                return driver, driver.current_window_handle
+
+            chrome_binary = self._get_chrome_binary()
+            if not chrome_binary:
+                self._log(profile_name, 'Không tìm thấy file chạy Chrome để mở thêm profile')
+                return None
+
+            # Tiêu đề đánh dấu để tìm đúng cửa sổ của profile trong trình duyệt chung
+            marker = f'shared-profile-{re.sub(r"[^a-zA-Z0-9_-]", "_", profile_name)}-{time.time_ns()}'
+            try:
+                subprocess.Popen(
+                    [chrome_binary, f'--user-data-dir={shared_dir}', f'--profile-directory={profile_name}',
+                     '--new-window', f'data:text/html,<title>{marker}</title>'],
+                    stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+                )
+                attach_options = ChromeOptions()
+                attach_options.binary_location = chrome_binary
+                attach_options.add_experimental_option('debuggerAddress', state['address'])
+                if self.network_stats:
+                    NetworkMonitor.configure_options(attach_options)
+                driver = webdriver.Chrome(service=Service(log_path='NUL'), options=attach_options)
+            except Exception as e:
+                self._log(profile_name, f'Lỗi khi mở profile trong Chrome dùng chung: {e}')
+                return None
+
+            timeout = Utility.timeout(30)
+            while timeout():
+                for handle in driver.window_handles:
+                    try:
+                        driver.switch_to.window(handle)
+                        if driver.title == marker:
+                            state['profiles'].add(profile_name)
+                            self._log(profile_name, f'Đã mở profile trong Chrome dùng chung (nhóm {group})')
+                            return driver, handle
+                    except Exception:
+                        continue
+                Utility.wait_time(1, True, 'poll')
+
+            self._log(profile_name, 'Không tìm thấy cửa sổ của profile trong Chrome dùng chung')
+            try:
+                driver.service.stop()
+            except Exception:
+                pass
+            return None
+
+    def _close_shared_browser(self, driver: webdriver.Chrome, node: 'Node', profile_name: str):
+        '''
+        Đóng các cửa sổ của profile trong trình duyệt dùng chung.
+        Trình duyệt chỉ bị tắt khi profile cuối cùng của nhóm kết thúc.
+        '''
+        group = self._get_shared_group(profile_name)
+        for handle in list(node.owned_handles or []):
+            try:
+                driver.switch_to.window(handle)
+                driver.close()
+            except Exception:
+                pass
+
+        with self._shared_lock:
+            state = self._shared_browsers.get(group)
+            if not state:
+                driver.quit()
+                return
+            state['profiles'].discard(profile_name)
+            leader = state['leader']
+            if not state['profiles']:
+                self._shared_browsers.pop(group, None)
+                if driver is not leader:
+                    try:
+                        driver.service.stop()
+                    except Exception:
+                        pass
+                self._log(profile_name, f'Đóng Chrome dùng chung (nhóm {group})')
+                leader.quit()
+            elif driver is not leader:
+                # chromedriver gắn thêm, chỉ dừng service; trình duyệt vẫn do leader giữ
+                try:
+                    driver.service.stop()
+                except Exception:
+                    pass
+
+    def _record_memory(self, profile_name: str, profile_path: Path, shared_with: int = 1):
+        '''
+        Ghi RAM (RSS) của trình duyệt vào báo cáo. Ở chế độ shared browser,
+        RSS của cả cây tiến trình được chia đều cho số profile đang mở trong trình duyệt đó.
+        '''
+        rss = Utility.get_browser_rss(profile_path)
+        if rss is None:
+            return
+        per_profile = rss / max(shared_with, 1)
+        self.report.update(
+            profile_name,
+            browser_mode='shared' if shared_with > 1 or self.shared_group_size else 'dedicated',
+            rss_mb=round(per_profile / 1024 / 1024, 1),
+            browser_rss_mb=round(rss / 1024 / 1024, 1),
+            profiles_in_browser=shared_with,
+        )
+        self._log(profile_name, f'RAM trình duyệt: {per_profile / 1024 / 1024:.0f} MB/profile ({shared_with} profile)')
+
+    def _print_memory_report(self):
+        '''
+        In bảng RAM theo từng profile sau khi chạy xong.
+        '''
+        rows = [(name, data) for name, data in self.report.profiles.items() if 'rss_mb' in data]
+        if not rows:
+            return
+        print(f"{'Profile':<20} {'Chế độ':<10} {'RAM/profile (MB)':>17} {'RAM trình duyệt (MB)':>21}")
+        for name, data in rows:
+            print(f"{name:<20} {data['browser_mode']:<10} {data['rss_mb']:>17} {data['browser_rss_mb']:>21}")
+        average = sum(data['rss_mb'] for _, data in rows) / len(rows)
+        self.report.summary['avg_rss_mb'] = round(average, 1)
+        print(f"Trung bình: {average:.0f} MB/profile")
+
+    def _finish_tx_tracker(self):
+        '''
+        Kiểm tra giao dịch lần cuối, dừng luồng theo dõi và ghi kết quả theo từng profile vào báo cáo.
+        '''
+        if not self.tx_tracker:
+            return
+        try:
+            self.tx_tracker.poll()
+        except Exception as e:
+            self._log(message=f'Lỗi khi kiểm tra giao dịch: {e}')
+        self.tx_tracker.stop()
+        rows = [(name, self.tx_tracker.summary(name)) for name in self.tx_tracker.profiles()]
+        rows = [(name, summary) for name, summary in rows if summary]
+        if not rows:
+            return
+        print(f"{'Profile':<20} {'Đã gửi':>7} {'Xác nhận':>9} {'Chờ':>5} {'Thất bại':>9} {'Drop':>5}")
+        for name, summary in rows:
+            self.report.update(name, **summary)
+            print(f"{name:<20} {summary['tx_submitted']:>7} {summary['tx_confirmed']:>9} {summary['tx_pending']:>5} "
+                  f"{summary['tx_failed']:>9} {summary['tx_dropped']:>5}")
+
+    def _save_trace(self):
+        '''
+        Ghi trace của lần chạy (nếu bật `--trace`) ra thư mục `report`, mở bằng Perfetto hoặc chrome://tracing.
+        '''
+        if not TRACER.enabled:
+            return
+        file_path = TRACER.save(self.report.name)
+        if file_path:
+            print(f'Trace: {file_path} (mở bằng https://ui.perfetto.dev hoặc chrome://tracing)')
+            self.report.summary['trace'] = str(file_path)
+        TRACER.start()
+
+    def _save_profile(self):
+        '''
+        Ghi collapsed stack của profiler lấy mẫu (nếu bật `--profiler`) ra thư mục `report` và in top hàm theo self time.
+        '''
+        if not PROFILER.enabled:
+            return
+        file_path, summary = PROFILER.save(self.report.name)
+        if not file_path:
+            return
+        unit = 'ms CPU' if summary['unit'] == 'cpu_ms' else 'mẫu'
+        print(f"Profiler: {file_path} (vẽ flamegraph bằng https://speedscope.app hoặc flamegraph.pl)")
+        print(f"{'Hàm (self time)':<60}{unit:>10}{'%':>7}")
+        for row in summary['top']:
+            print(f"{row['function'][:59]:<60}{row['self']:>10}{row['percent']:>7}")
+        print('Theo luồng: ' + ', '.join(f'{tag} {weight}' for tag, weight in summary['threads'].items()))
+        self.report.summary['profiler'] = {'file': str(file_path), **summary}
+        PROFILER.start()
+
+    def _print_extension_report(self):
+        '''
+        In tổng số lần service worker của extension bị tắt và khởi động lại (cold start) của lần chạy.
+        '''
+        rows = [data for data in self.report.profiles.values() if 'sw_cold_starts' in data]
+        if not rows:
+            return
+        stops = sum(data['sw_stops'] for data in rows)
+        cold_starts = sum(data['sw_cold_starts'] for data in rows)
+        mode = 'bật' if self.extension_keepalive else 'tắt'
+        print(f'Service worker extension (giữ: {mode}): {stops} lần bị tắt, {cold_starts} lần cold start trên {len(rows)} profile')
+        self.report.summary['sw_stops'] = stops
+        self.report.summary['sw_cold_starts'] = cold_starts
+
+    def _print_pacing_report(self):
+        '''
+        In tổng thời gian chờ chủ động (qua `PACER`) của từng profile so với thời gian chạy, theo từng loại chờ.
+        '''
+        rows = [(name, data) for name, data in self.report.profiles.items() if 'sleep_s' in data]
+        if not rows:
+            return
+        kinds = sorted({key[6:-2] for _, data in rows for key in data if key.startswith('sleep_') and key != 'sleep_s'})
+        print(f"Chính sách chờ: {PACER.policy_name}")
+        print(f"{'Profile':<20}{'Chạy (s)':>10}{'Chờ (s)':>10}{'Tỉ lệ':>8}" + ''.join(f'{kind:>10}' for kind in kinds))
+        for name, data in rows:
+            share = data['sleep_s'] / data['run_s'] if data['run_s'] else 0
+            print(f"{name:<20}{data['run_s']:>10}{data['sleep_s']:>10}{share:>8.0%}"
+                  + ''.join(f"{data.get(f'sleep_{kind}_s', 0):>10}" for kind in kinds))
+        run_total = sum(data['run_s'] for _, data in rows)
+        sleep_total = sum(data['sleep_s'] for _, data in rows)
+        self.report.summary['pacing'] = {
+            'policy': PACER.policy_name,
+            'run_s': round(run_total, 1),
+            'sleep_s': round(sleep_total, 1),
+            'by_kind': {kind: round(sum(data.get(f'sleep_{kind}_s', 0) for _, data in rows), 1) for kind in kinds},
+        }
+
+    def _print_perf_report(self):
+        '''
+        In số liệu Performance API của trang theo từng profile (bật bằng `--perf`).
+        '''
+        rows = [(name, data) for name, data in self.report.profiles.items() if 'perf_steps' in data]
+        if not rows:
+            return
+        print(f"{'Profile':<20}{'Trang':>6}{'Load TB (ms)':>14}{'FCP TB (ms)':>13}{'Fetch':>7}{'Fetch max (ms)':>16}{'Long task':>11}{'Long task (ms)':>16}{'Đọc (ms)':>10}")
+        for name, data in rows:
+            print(f"{name:<20}{data['perf_pages']:>6}{data['perf_load_ms_avg'] or '-':>14}{data['perf_fcp_ms_avg'] or '-':>13}"
+                  f"{data['perf_fetches']:>7}{data['perf_fetch_ms_max']:>16}{data['perf_long_tasks']:>11}{data['perf_long_task_ms']:>16}{data['perf_capture_ms']:>10}")
+        self.report.summary['perf_long_task_ms'] = sum(data['perf_long_task_ms'] for _, data in rows)
+        self.report.summary['perf_fetch_ms_max'] = max(data['perf_fetch_ms_max'] for _, data in rows)
+
+    def _print_network_report(self):
+        '''
+        In lưu lượng theo từng profile (số request, MB, tên miền tốn nhất, request bị chặn, dung lượng tiết kiệm ước tính)
+        và tổng theo từng proxy. Tổng theo proxy được lưu vào `summary['network_by_proxy']` của báo cáo.
+        '''
+        rows = [(name, data) for name, data in self.report.profiles.items() if 'requests' in data]
+        if not rows:
+            return
+        print(f"{'Profile':<20} {'Request':>8} {'MB':>9} {'Tên miền tốn nhất':<30} {'Bị chặn':>8} {'Tiết kiệm MB (ước tính)':>24}")
+        by_proxy: dict[str, dict] = {}
+        for name, data in rows:
+            top_domain = next(iter(data['top_domains']), '-')
+            print(f"{name:<20} {data['requests']:>8} {data['bytes'] / 1024 / 1024:>9.2f} {top_domain[:30]:<30} "
+                  f"{data['blocked_requests']:>8} {data['saved_bytes'] / 1024 / 1024:>24.2f}")
+            proxy = by_proxy.setdefault(data['proxy'], {'profiles': 0, 'requests': 0, 'bytes': 0, 'saved_bytes': 0})
+            proxy['profiles'] += 1
+            for key in ('requests', 'bytes', 'saved_bytes'):
+                proxy[key] += data[key]
+
+        print(f"{'Proxy':<24} {'Profile':>8} {'Request':>8} {'MB':>9} {'MB/profile':>11}")
+        for proxy, stats in sorted(by_proxy.items(), key=lambda item: item[1]['bytes'], reverse=True):
+            print(f"{proxy:<24} {stats['profiles']:>8} {stats['requests']:>8} {stats['bytes'] / 1024 / 1024:>9.2f} "
+                  f"{stats['bytes'] / stats['profiles'] / 1024 / 1024:>11.2f}")
+        self.report.summary['network_by_proxy'] = by_proxy
+        self.report.summary['saved_bytes'] = sum(stats['saved_bytes'] for stats in by_proxy.values())
+
     def config_extension(self, *args: str):
         '''
         Cấu hình trình duyệt với các tiện ích mở rộng (extensions).
@@ -1383,7 +2125,7 @@ class BrowserManager:
         else:
             self._log(
                 f"⚠ Không thể sử dụng input() trong môi trường này. Đóng tự động sau 10 giây.")
-            Utility.wait_time(10)
+            Utility.wait_time(10, kind='settle')
 
     def run_browser(self, profile: dict, row: int = 0, col: int = 0, block_media: bool = False, stop_flag: bool = False):
         '''
@@ -1414,45 +2156,189 @@ class BrowserManager:
         profile_name = profile['profile_name']
         proxy_info = profile.get('proxy_info')
         path_lock = self.user_data_dir / f'''{re.sub(r'[^a-zA-Z0-9_\-]', '_', profile_name)}.lock'''
-        
-        # Chờ profile được giải phóng nếu đang bị khóa
+        run_start = time.perf_counter()
+        launched = False
         try:
-            Utility.wait_until_profile_free(profile_name, path_lock)
-        except TimeoutError as e:
-            return
-
-        
-        driver = self._browser(profile_name, proxy_info, block_media)
-        self._arrange_window(driver, row, col)
-        node = Node(driver, profile_name, self.tele_bot, self.ai_bot)
-
-        try:
-            # Khi chạy chương trình với phương thức run_stop. Duyệt trình sẽ duy trì trạng thái
-            if stop_flag:
-                # Nếu có SetupHandlerClass thì thực hiện
-                if self.SetupHandlerClass:
-                    self.SetupHandlerClass(node, profile)._run()
-                self._listen_for_enter(profile_name)
-            else:
-                # Nếu có AutoHandlerClass thì thực hiện
-                if self.AutoHandlerClass:
-                    self.AutoHandlerClass(node, profile)._run()
-                    
-        except ValueError as e:
-            # Node.snapshot() quăng lỗi ra đây
-            pass
-        except Exception as e:
-            # Lỗi bất kỳ khác
-            self._log(profile_name, str(e))
+            # Gắn profile cho luồng trong try để finally luôn gỡ, kể cả khi thoát sớm
+            PROFILER.tag_thread(profile_name)
+            PACER.bind(profile_name)
 
+            # Chờ profile được giải phóng nếu đang bị khóa
+            try:
+                with TRACER.span('wait_profile_free', 'manager', profile_name):
+                    Utility.wait_until_profile_free(profile_name, path_lock)
+            except TimeoutError as e:
+                return
+
+            launch_start = time.perf_counter()
+            with TRACER.span('launch', 'manager', profile_name):
+                # Chế độ shared browser (profile có proxy vẫn dùng trình duyệt riêng)
+                shared = None
+                if self.shared_group_size > 0 and not proxy_info:
+                    Utility.lock_profile(path_lock)
+                    try:
+                        with TRACER.span('start_shared_browser', 'manager', profile_name):
+                            shared = self._shared_browser(profile_name, block_media)
+                    except Exception as e:
+                        self._log(profile_name, f'Lỗi khi mở profile trong Chrome dùng chung: {e}')
+                    if not shared:
+                        # Không mở trình duyệt riêng vì dữ liệu profile nằm trong thư mục dùng chung
+                        Utility.unlock_profile(path_lock)
+                        self._log(profile_name, 'Bỏ qua profile vì không mở được Chrome dùng chung')
+                        return
+
+                # Chế độ RAM: chép profile vào RAM, chạy xong ghi ngược dữ liệu cần giữ
+                ram_path = None
+                if self.stager and not shared and not self.keep_browser:
+                    with TRACER.span('stage_ram', 'manager', profile_name):
+                        ram_path = self.stager.stage(profile_name, self.user_data_dir / profile_name)
+
+                if shared:
+                    driver, handle = shared
+                    profile_path = self._get_shared_dir(self._get_shared_group(profile_name))
+                else:
+                    with TRACER.span('start_browser', 'manager', profile_name):
+                        driver = self._browser(profile_name, proxy_info, block_media, ram_path)
+                    profile_path = ram_path or self.user_data_dir / profile_name
+                self._arrange_window(driver, row, col)
+                node = Node(driver, profile_name, self.tele_bot, self.ai_bot)
+                if shared:
+                    node.owned_handles = [handle]
+                node.network = NetworkMonitor(profile_name, self.block_presets, self.block_patterns, self.network_stats, own_tabs_only=bool(shared))
+                node.tx_tracker = self.tx_tracker
+                node.rate_limiter = self.rate_limiter
+                node.breaker = self.breaker
+                node._apply_network_rules()
+                if self.extension_keepalive or self.network_stats:
+                    # Tắt cả hai thì không mở thêm kết nối CDP theo dõi service worker
+                    node.keep_extension_alive(keep_alive=self.extension_keepalive)
+                node.perf_capture = self.perf_capture
+                if self.record_commands:
+                    if shared:
+                        # Các profile dùng chung một driver, lệnh của chúng không tách được theo profile
+                        self._log(profile_name, 'Bỏ qua ghi lệnh WebDriver ở chế độ trình duyệt dùng chung')
+                    else:
+                        node.record_commands()
+                if not stop_flag and not self.verbose_log:
+                    # Chạy auto: chỉ in log chi tiết khi profile lỗi
+                    node.enable_log_buffer()
+            METRICS.observe('airdrop_launch_seconds', time.perf_counter() - launch_start, mode='shared' if shared else 'dedicated')
+            METRICS.inc('airdrop_active_slots')
+            launched = True
+
+            result = 'ok'
+            try:
+                # Khi chạy chương trình với phương thức run_stop. Duyệt trình sẽ duy trì trạng thái
+                if stop_flag:
+                    # Nếu có SetupHandlerClass thì thực hiện
+                    if self.SetupHandlerClass:
+                        with TRACER.span('setup', 'manager', profile_name):
+                            self.SetupHandlerClass(node, profile)._run()
+                    self._listen_for_enter(profile_name)
+                else:
+                    # Nếu có AutoHandlerClass thì thực hiện
+                    if self.AutoHandlerClass:
+                        with TRACER.span('auto', 'manager', profile_name):
+                            self.AutoHandlerClass(node, profile)._run()
+
+            except ValueError as e:
+                # Node.snapshot() quăng lỗi ra đây
+                result = 'failed'
+            except Exception as e:
+                # Lỗi bất kỳ khác
+                result = 'failed'
+                self._log(profile_name, str(e))
+                node.dump_log_buffer(str(e))
+
+            finally:
+                METRICS.inc('airdrop_active_slots', -1)
+                METRICS.inc('airdrop_profiles_completed_total', result=result)
+                Utility.wait_time(5, True, 'settle')
+                node.capture_performance('end')
+                if node.perf_captures:
+                    self.report.update(profile_name, **summarize_performance(node.perf_captures))
+                if node.command_recorder:
+                    node.command_recorder.detach()
+                    commands_file = node.command_recorder.save()
+                    self.report.update(profile_name, commands_file=commands_file.name if commands_file else None, **node.command_recorder.summary())
+                node.network.collect(driver)
+                if node.sw_keepalive:
+                    node.sw_keepalive.stop()
+                    self.report.update(profile_name, **node.sw_keepalive.summary())
+                # Proxy ghi theo ip:port (không lưu user/password vào báo cáo)
+                self.report.update(profile_name, proxy=proxy_info.rpartition('@')[2] if proxy_info else 'direct', **node.network.summary())
+                if shared:
+                    with self._shared_lock:
+                        state = self._shared_browsers.get(self._get_shared_group(profile_name), {})
+                        shared_with = len(state.get('profiles', ())) or 1
+                    self._record_memory(profile_name, profile_path, shared_with)
+                else:
+                    self._record_memory(profile_name, profile_path)
+                self._log(profile_name, 'Đóng... wait')
+                with TRACER.span('close', 'manager', profile_name):
+                    Utility.wait_time(1, True, 'settle')
+                    if shared:
+                        self._close_shared_browser(driver, node, profile_name)
+                    else:
+                        try:
+                            self._close_browser(driver, profile_name)
+                            if ram_path and self.stager:
+                                # Chỉ ghi ngược khi trình duyệt đã đóng hẳn
+                                if self.stager.sync_back(profile_name, self.user_data_dir / profile_name, ram_path):
+                                    self.stager.release(profile_name, ram_path)
+                                else:
+                                    self._log(profile_name, f'Giữ bản profile trên RAM do đồng bộ lỗi: {ram_path}')
+                        except Exception as e:
+                            self._log(profile_name, f'Lỗi khi đóng trình duyệt, bỏ qua đồng bộ RAM: {e}')
+                # Giải phóng profile
+                Utility.unlock_profile(path_lock)
         finally:
-            Utility.wait_time(5, True)
-            self._log(profile_name, 'Đóng... wait')
-            Utility.wait_time(1, True)
-            driver.quit()
-            # Giải phóng profile
-            Utility.unlock_profile(path_lock)
+            if not launched:
+                # Không mở được trình duyệt (chờ khóa quá lâu, lỗi khi mở) vẫn tính là một profile lỗi
+                METRICS.inc('airdrop_profiles_completed_total', result='failed')
+            self.report.update(profile_name, run_s=round(time.perf_counter() - run_start, 1), **PACER.summary(profile_name))
+            PACER.unbind()
             self._release_position(profile_name, row, col)
+            PROFILER.untag_thread()
+
+    def _check_proxies(self, profiles: list[dict]):
+        '''
+        Kiểm tra song song các proxy khác nhau của danh sách profile trước khi chạy,
+        `_browser` dùng lại kết quả đã lưu thay vì kiểm tra lần lượt từng profile.
+        '''
+        proxies = [profile.get('proxy_info') for profile in profiles]
+        if any(proxies):
+            results = self.proxy_checker.check_all(proxies)
+            for profile in profiles:
+                result = results.get(profile.get('proxy_info'))
+                if result:
+                    self.report.update(profile['profile_name'], proxy_ok=result['ok'], proxy_latency=result['latency'], proxy_ip=result['ip'])
+
+    def _executor(self, max_workers: int):
+        return ThreadPoolExecutor(max_workers=max_workers)
+
+    def _run_queue(self, queue: list[dict], max_concurrent_profiles: int, delay_between_profiles: float, block_media: bool = False):
+        '''
+        Vòng lập lịch của `run_multi`: mở profile đầu hàng đợi khi có ô trống trong `matrix`,
+        chờ `delay_between_profiles` giây giữa hai lần mở, hết ô trống thì `poll_interval` giây kiểm tra lại.
+        Chạy xong khi mọi profile đã đóng. Mô phỏng (`simulation.py`) dùng lại đúng vòng lặp này.
+        '''
+        with self._executor(max_concurrent_profiles) as executor:
+            while len(queue) > 0:
+                METRICS.set('airdrop_queue_depth', len(queue))
+                profile = queue[0]
+                profile_name = profile['profile_name']
+                row, col = self._get_position(profile_name)
+
+                if row is not None and col is not None:
+                    queue.pop(0)
+                    executor.submit(self.run_browser, profile, row, col, block_media)
+                    # Thời gian chờ mở profile kế
+                    Utility.wait_time(delay_between_profiles, True, 'schedule')
+                else:
+                    # Thời gian chờ check lại
+                    Utility.wait_time(self.poll_interval, True, 'schedule')
+            METRICS.set('airdrop_queue_depth', 0)
 
     def run_multi(self, profiles: list[dict], max_concurrent_profiles: int = 1, delay_between_profiles: int = 10, block_media: bool = False):
         '''
@@ -1471,26 +2357,43 @@ class BrowserManager:
             - Khi có vị trí trống, hồ sơ sẽ được khởi chạy thông qua phương thức `run`.
             - Nếu không có vị trí nào trống, chương trình chờ 10 giây trước khi kiểm tra lại.
         '''
+        self.report = RunReport('auto')
+        self.tx_tracker = TxTracker(EthRpc(self.rpc_cache.url if self.rpc_cache else None))
+        self.breaker = CircuitBreaker()
+        if self.PreflightHandlerClass:
+            profiles = self.PreflightHandlerClass(self).run(profiles)
         queue = [profile for profile in profiles]
+        # Bảng tiến độ và /metrics chỉ tính lần chạy này, không cộng dồn từ lần chạy trước trong cùng phiên
+        METRICS.reset(*RUN_METRICS)
+        METRICS.set('airdrop_profiles', len(queue))
+        METRICS.set('airdrop_run_started_seconds', time.time())
+        progress = ProgressView(METRICS) if self.progress else None
+        if progress:
+            progress.start()
+        self._check_proxies(profiles)
         self._get_matrix(
             max_concurrent_profiles=max_concurrent_profiles,
             number_profiles=len(queue)
         )
 
-        with ThreadPoolExecutor(max_workers=max_concurrent_profiles) as executor:
-            while len(queue) > 0:
-                profile = queue[0]
-                profile_name = profile['profile_name']
-                row, col = self._get_position(profile_name)
-
-                if row is not None and col is not None:
-                    queue.pop(0)
-                    executor.submit(self.run_browser, profile, row, col, block_media)
-                    # Thời gian chờ mở profile kế
-                    Utility.wait_time(delay_between_profiles, True)
-                else:
-                    # Thời gian chờ check lại
-                    Utility.wait_time(10, True)
+        self._run_queue(queue, max_concurrent_profiles, delay_between_profiles, block_media)
+
+        if progress:
+            progress.stop()
+            print(progress.render())
+        self._finish_tx_tracker()
+        self._print_memory_report()
+        self._print_network_report()
+        self.report.summary['rate_limit'] = self.rate_limiter.print_report()
+        self.report.summary['circuit_breaker'] = self.breaker.print_report()
+        self._print_extension_report()
+        self._print_perf_report()
+        self._print_pacing_report()
+        if self.rpc_cache:
+            self.report.summary['cache'] = self.rpc_cache.print_report()
+        self._save_trace()
+        self._save_profile()
+        self.report.save()
 
     def run_stop(self, profiles: list[dict], block_media: bool = False):
         '''
@@ -1508,14 +2411,26 @@ class BrowserManager:
             - Chờ cho đến khi hồ sơ hiện tại đóng lại trước khi tiếp tục hồ sơ tiếp theo.
         '''
         self.matrix = [[None]]
+        self.report = RunReport('setup')
+        self._check_proxies(profiles)
         for index, profile in enumerate(profiles):
             self._log(
                 profile_name=profile['profile_name'], message=f'[{index+1}/{len(profiles)}]Chờ 5s...')
-            Utility.wait_time(5)
+            Utility.wait_time(5, kind='schedule')
 
             self.run_browser(profile=profile,block_media=block_media, stop_flag=True)
 
-    def run_terminal(self, profiles: list[dict], max_concurrent_profiles: int = 4, auto: bool = False, headless: bool = False, disable_gpu: bool = False, block_media: bool = False):
+        self._print_memory_report()
+        self._print_network_report()
+        self._print_perf_report()
+        self._print_pacing_report()
+        if self.rpc_cache:
+            self.report.summary['cache'] = self.rpc_cache.print_report()
+        self._save_trace()
+        self._save_profile()
+        self.report.save()
+
+    def run_terminal(self, profiles: list[dict], max_concurrent_profiles: int = 4, auto: bool = False, headless: bool = False, disable_gpu: bool = False, block_media: bool = False, keep_browser: bool = False, shared_group_size: int = 0, ram_profile: bool = False, block: list[str]|None = None, rpc_cache: bool = False, extension_keepalive: bool = False, verbose_log: bool = False, trace: bool = False, metrics_port: int = 0, progress: bool = False, profiler: bool = False, perf_capture: bool = False, record_commands: bool = False, pacing: str = 'human', network_stats: bool = False):
         '''
         Chạy giao diện dòng lệnh để người dùng chọn chế độ chạy.
 
@@ -1528,12 +2443,29 @@ class BrowserManager:
             headless (bool, optional): True, sẽ ẩn duyệt trình khi chạy. Mặc định False.
             disable_gpu (bool, optional): True, tắt GPU, dành cho máy không có GPU vật lý. Mặc định False.
             block_media (bool, optional): True, block image và video để tăng hiệu suất, nhưng cần False khi có cloudflare. Mặc định `False`.
+            keep_browser (bool, optional): True, giữ trình duyệt mở sau khi chạy và gắn lại (remote debugging) ở lần chạy sau. Mặc định False.
+            shared_group_size (int, optional): > 0, gom tối đa N profile chạy chung một trình duyệt (`--profile-directory`) để giảm RAM. Mặc định 0 (tắt).
+            ram_profile (bool, optional): True, chép profile vào RAM (`RAM_DIR`) trước khi chạy và chỉ ghi ngược dữ liệu cần giữ. Mặc định False.
+            block (list[str], optional): Các bộ rule chặn request qua CDP (`media`, `fonts`, `analytics`, `widgets`). Mặc định không chặn thêm.
+            rpc_cache (bool, optional): True, chạy cache cục bộ cho JSON-RPC (`RPC_URL`), dùng cho theo dõi giao dịch và pre-flight (trình duyệt không bị trỏ vào cache). Mặc định False.
+            extension_keepalive (bool, optional): True, giữ service worker (MV3) của extension không bị tắt khi rảnh. Mặc định False (không theo dõi service worker, trừ khi bật `network_stats`).
+            verbose_log (bool, optional): True, chạy auto in mọi dòng log như chế độ Set up. Mặc định False (giữ log trong ring buffer, chỉ in khi profile lỗi).
+            trace (bool, optional): True, ghi span của từng thao tác và xuất file trace (Chrome trace-event) vào `report` sau mỗi lần chạy. Mặc định False.
+            metrics_port (int, optional): > 0, mở endpoint Prometheus `http://127.0.0.1:<metrics_port>/metrics`. Mặc định 0 (tắt).
+            progress (bool, optional): True, in bảng tiến độ (profile/giờ, tỉ lệ thành công từng tác vụ, hàng đợi) mỗi 30 giây khi chạy auto. Mặc định False.
+            profiler (bool, optional): True, lấy mẫu stack của mọi luồng Python trong tiến trình, ghi collapsed stack (flamegraph) vào `report` và in top hàm tốn CPU sau mỗi lần chạy. Mặc định False.
+            perf_capture (bool, optional): True, đọc Performance API của trang (tải trang, fetch, long task) sau khi tải trang và trước mỗi lần click, ghi vào trace và báo cáo. Mặc định False.
+            record_commands (bool, optional): True, ghi chuỗi lệnh WebDriver của mỗi profile vào `report/commands` để phát lại/so sánh bằng `command_trace.py`. Mặc định False.
+            pacing (str, optional): Chính sách chờ (`human`: dao động ±40% như người dùng, `fast`: bỏ các lần chờ giả lập người dùng). Mặc định `human`.
+            network_stats (bool, optional): True, bật performance log của chromedriver để thống kê lưu lượng và số request bị chặn theo profile/proxy. Mặc định False.
         
         Chức năng:
             - Hiển thị menu cho phép người dùng chọn một trong các chế độ:
                 1. Set up: Chọn và mở lần lượt từng profile để cấu hình.
                 2. Chạy auto: Tự động chạy các profile đã cấu hình.
-                3. Xóa profile: Xóa profile đã tồn tại.
+                3. Xóa profile: Xóa profile đã tồn tại (xóa nền, song song).
+                4. Dọn dẹp profile: Báo cáo dung lượng, xóa cache có thể tái tạo (giữ dữ liệu ví).
+                5. Tạo từ mẫu: Tạo nhanh các profile chưa có từ profile mẫu (`_golden`) đã qua first-run, có sẵn cache.
                 0. Thoát chương trình.
             - Khi chọn Set up, người dùng có thể chọn chạy tất cả hoặc chỉ một số profile cụ thể.
             - Khi chọn Chạy auto, chương trình sẽ khởi động tự động với số lượng profile tối đa có thể chạy đồng thời.
@@ -1546,8 +2478,38 @@ class BrowserManager:
         '''
         self.headless = headless
         self.disable_gpu = disable_gpu
+        self.keep_browser = keep_browser
+        self.extension_keepalive = extension_keepalive
+        self.verbose_log = verbose_log
+        if trace:
+            TRACER.start()
+        self.progress = progress
+        self.perf_capture = perf_capture
+        self.record_commands = record_commands
+        self.network_stats = network_stats
+        PACER.set_policy(pacing)
+        if profiler:
+            PROFILER.start()
+        if progress:
+            METRICS.start()
+        if metrics_port and not METRICS.start_server(metrics_port):
+            self._log(message=f'⚠️ Không mở được cổng {metrics_port} cho endpoint metrics')
+            metrics_port = 0
+        self.shared_group_size = shared_group_size
+        self.block_presets = list(block or [])
+        if rpc_cache:
+            self.rpc_cache = CachingProxy()
+            if not self.rpc_cache.start():
+                self.rpc_cache = None
+        if ram_profile:
+            self.stager = ProfileStager()
+            if not self.stager.available:
+                self._log(message='⚠️ Không tìm thấy thư mục RAM (cấu hình RAM_DIR trong config.txt), chạy profile từ ổ đĩa')
+                self.stager = None
         
         is_run = True
+        # Dọn nền các profile đã xóa dở từ lần chạy trước
+        self.cleaner.purge_trash(self.user_data_dir)
 
         print("\n"+"=" * 60)
         print(f"⚙️  Tool Automation Airdrop đang sử dụng:")
@@ -1560,13 +2522,41 @@ class BrowserManager:
         else:
             print(f"   📍 Chrome hệ thống")
         print(f"   📍 Đường dẫn Profiles:   {self.user_data_dir}")
+        if self.keep_browser:
+            print(f"   📍 Giữ trình duyệt mở:   Bật (gắn lại qua remote debugging)")
+        if self.extension_keepalive:
+            print(f"   📍 Giữ service worker:   Bật (gắn CDP vào service worker của extension)")
+        if TRACER.enabled:
+            print(f"   📍 Tracing:              Bật (file trace lưu trong thư mục report)")
+        if self.perf_capture:
+            print(f"   📍 Đo hiệu năng trang:   Bật (Performance API, lưu trong báo cáo)")
+        if self.record_commands:
+            print(f"   📍 Ghi lệnh WebDriver:   Bật (lưu trong report/commands)")
+        if PACER.policy_name != 'human':
+            print(f"   📍 Chính sách chờ:       {PACER.policy_name}")
+        if PROFILER.enabled:
+            print(f"   📍 Profiler lấy mẫu:     Bật ({PROFILER.interval * 1000:.0f} ms/mẫu, kết quả lưu trong thư mục report)")
+        if metrics_port:
+            print(f"   📍 Metrics:              http://127.0.0.1:{metrics_port}/metrics")
+        if self.shared_group_size:
+            print(f"   📍 Trình duyệt dùng chung: {self.shared_group_size} profile/trình duyệt")
+        if self.stager:
+            print(f"   📍 Chạy profile từ RAM:  {self.stager.ram_dir}")
+        if self.block_presets or self.block_patterns:
+            print(f"   📍 Chặn request:         {', '.join(self.block_presets + self.block_patterns)}")
+        if self.network_stats:
+            print(f"   📍 Thống kê lưu lượng:   Bật (performance log, lưu trong báo cáo)")
+        if self.rpc_cache:
+            print(f"   📍 Cache RPC:            {self.rpc_cache.url} -> {self.rpc_cache.upstream}")
+        if self.rate_limiter.limits:
+            print(f"   📍 Giới hạn tốc độ:      {', '.join(f'{name} {per_minute:g}/phút (burst {burst})' for name, (per_minute, burst) in self.rate_limiter.limits.items())}")
         print("=" * 60+"\n")
 
         while is_run:
             user_data_profiles = []
 
             if self.user_data_dir.exists() and self.user_data_dir.is_dir():
-                raw_user_data_profiles = [folder.name for folder in self.user_data_dir.iterdir() if folder.is_dir()]
+                raw_user_data_profiles = [folder.name for folder in self.user_data_dir.iterdir() if ProfileCleaner.is_profile_dir(folder)]
                 
                 # Thêm các profile theo thứ tự trong profiles trước
                 for profile in profiles:
@@ -1585,6 +2575,8 @@ class BrowserManager:
                 print("   2. Chạy auto    - Tất cả profiles sau khi đã cấu hình.")
                 if user_data_profiles:
                     print("   3. Xóa profile  - Xoá các profile đã tồn tại.") # đoạn này xuất hiện, nếu có tồn tại danh sách user_data_profiles ở trên
+                    print("   4. Dọn dẹp      - Báo cáo dung lượng, xóa cache (giữ dữ liệu ví).")
+                print("   5. Tạo từ mẫu   - Tạo nhanh profile mới từ profile mẫu (cài extension 1 lần).")
                 print("   0. Thoát        - Thoát chương trình.")
                 choice = input("Nhập lựa chọn: ")
             else:
@@ -1592,23 +2584,31 @@ class BrowserManager:
                 profile_list = profiles
                 is_run = False
 
-            if choice in ('1', '2', '3'):
+            if choice in ('1', '2', '3', '4', '5'):
 
                 if not auto:
-                    profile_list = profiles if choice in ('1', '2') else user_data_profiles
+                    if choice in ('1', '2'):
+                        profile_list = profiles
+                    elif choice == '5':
+                        profile_list = [profile for profile in profiles if profile['profile_name'] not in user_data_profiles]
+                    else:
+                        profile_list = user_data_profiles
                     print("=" * 10)
                     if choice in ('1', '2'):
                         print(
                             f"[B] 📋 Chọn các profile muốn chạy {'Set up' if choice == '1' else 'Auto'}:")
                         print(f"❌ Không tồn tại profile trong file data.txt") if len(profile_list) == 0 else None
-                    elif (choice in ('3')):
+                    elif (choice in ('3', '4')):
                         if not user_data_profiles:
                             continue
-                        print("[B] 📋 Chọn các profile muốn xóa:")
+                        print(f"[B] 📋 Chọn các profile muốn {'xóa' if choice == '3' else 'dọn dẹp'}:")
+                    elif choice == '5':
+                        print(f"[B] 📋 Chọn các profile muốn tạo từ mẫu:")
+                        print(f"❌ Tất cả profile trong file data.txt đã tồn tại") if len(profile_list) == 0 else None
 
                     print(f"   0. ALL ({len(profile_list)})") if len(profile_list) > 1 else None
                     for idx, profile in enumerate(profile_list, start=1):
-                        print(f"   {idx}. {profile['profile_name'] if choice in ('1', '2') else profile}{' [✓]' if choice in ('1', '2') and profile['profile_name'] in user_data_profiles else ''}")
+                        print(f"   {idx}. {profile['profile_name'] if choice in ('1', '2', '5') else profile}{' [✓]' if choice in ('1', '2') and profile['profile_name'] in user_data_profiles else ''}")
 
                     profile_choice = input(
                         "Nhập số và cách nhau bằng dấu cách (nếu chọn nhiều) hoặc bất kì để quay lại: ")
@@ -1651,11 +2651,40 @@ class BrowserManager:
                             continue
                         profile_path = self.user_data_dir / profile_name
                         try:
-                            shutil.rmtree(profile_path)
-                            profiles_to_deleted.append(profile_name)
+                            # Đổi tên vào .trash ngay, việc xóa chạy song song trong nền
+                            if self.cleaner.delete_async(profile_path):
+                                profiles_to_deleted.append(profile_name)
                         except Exception as e:
                             self._log(message=f"❌ Lỗi khi xóa profile {profile_name}: {e}")
                     Utility.print_section(f"Đã xóa profile: {profiles_to_deleted}")
+
+                elif choice == '4':
+                    dry_run = input("Chỉ xem báo cáo, không xóa (dry-run)? (y/N): ").strip().lower() == 'y'
+                    profile_paths = []
+                    for profile_name in selected_profiles:
+                        if not isinstance(profile_name, str):
+                            continue
+                        path_lock = self.user_data_dir / f'''{re.sub(r'[^a-zA-Z0-9_\-]', '_', profile_name)}.lock'''
+                        if not dry_run and (path_lock.exists() or self._get_debug_path(profile_name).exists()):
+                            self._log(profile_name, 'Profile đang được sử dụng, bỏ qua dọn dẹp')
+                            continue
+                        profile_paths.append(self.user_data_dir / profile_name)
+                    results = self.cleaner.trim_all(profile_paths, dry_run)
+                    self.cleaner.print_report(results, dry_run)
+                    Utility.print_section(f"{'Báo cáo' if dry_run else 'Đã dọn dẹp'} {len(results)} profile")
+
+                elif choice == '5':
+                    golden_path = self.user_data_dir / ProfileCloner.GOLDEN_NAME
+                    if not golden_path.exists():
+                        # Tạo profile mẫu 1 lần: qua first-run, có sẵn cache
+                        Utility.print_section("TẠO PROFILE MẪU - cấu hình xong thì đóng trình duyệt","🔄")
+                        self.run_stop([{'profile_name': ProfileCloner.GOLDEN_NAME}], block_media)
+                    if not golden_path.exists():
+                        self._log(message='❌ Không tạo được profile mẫu')
+                        continue
+                    profile_paths = [self.user_data_dir / profile['profile_name'] for profile in selected_profiles]
+                    results = self.cloner.clone_all(golden_path, profile_paths)
+                    Utility.print_section(f"Đã tạo {len(results)} profile từ mẫu")
             elif choice == '0':  # Thoát chương trình
                 is_run = False
                 Utility.print_section("THOÁT CHƯƠNG TRÌNH","❎")
@@ -1663,6 +2692,11 @@ class BrowserManager:
             else:
                 Utility.print_section('LỖI: Lựa chọn không hợp lệ. Vui lòng thử lại...', "🛑")
 
+        # Chờ các profile đang xóa nền trước khi thoát
+        self.cleaner.wait()
+        self.proxy_relay.stop()
+        if self.rpc_cache:
+            self.rpc_cache.stop()
 
 if __name__ == '__main__':
     profiles = Utility.read_data('profile_name')
@@ -0,0 +1,125 @@
+import threading
+import time
+from collections import deque
+
+from utils import Utility
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+class CircuitBreaker:
+    '''
+    Circuit breaker dùng chung cho mọi profile, tách theo loại lỗi (RPC lỗi, timeout của HaHa...).
+
+    - closed: chạy bình thường, đếm lỗi trong `window` giây gần nhất. Đủ `threshold` lỗi (từ bất kỳ profile nào)
+      thì chuyển sang open.
+    - open: `allow()` trả về False ngay, các profile sau bỏ qua tác vụ thay vì chờ hết chuỗi timeout.
+    - half_open: sau `cooldown` giây cho đúng một profile chạy thử. Thành công thì đóng lại,
+      lỗi thì mở thêm `cooldown` giây. Lượt thử không báo kết quả sau `cooldown` giây được cấp lại cho profile khác.
+    '''
+    def __init__(self, threshold: int = 3, window: float = 300, cooldown: float = 120) -> None:
+        self.threshold = threshold
+        self.window = window
+        self.cooldown = cooldown
+        self._circuits: dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, failure_class: str) -> dict:
+        return self._circuits.setdefault(failure_class, {
+            'state': CLOSED,
+            'failures': deque(),
+            'opened_at': 0.0,
+            'probe_at': None,  # thời điểm cấp lượt thử ở trạng thái half_open
+            'opens': 0,
+            'skipped': 0,
+            'total_failures': 0,
+        })
+
+    def allow(self, *failure_classes: str) -> bool:
+        '''
+        Kiểm tra tác vụ có được chạy hay không, tác vụ phụ thuộc vào các loại lỗi `failure_classes`.
+
+        Chỉ cấp lượt thử half_open khi tất cả loại lỗi đều cho phép, tránh giữ lượt thử mà không chạy.
+        '''
+        now = time.time()
+        with self._lock:
+            circuits = [self._get(failure_class) for failure_class in failure_classes]
+            probes = []
+            for circuit in circuits:
+                if circuit['state'] == CLOSED:
+                    continue
+                if circuit['state'] == OPEN and now - circuit['opened_at'] < self.cooldown:
+                    circuit['skipped'] += 1
+                    return False
+                if circuit['state'] == HALF_OPEN and circuit['probe_at'] and now - circuit['probe_at'] < self.cooldown:
+                    circuit['skipped'] += 1
+                    return False
+                probes.append(circuit)
+            for circuit in probes:
+                circuit['state'] = HALF_OPEN
+                circuit['probe_at'] = now
+            return True
+
+    def record_success(self, *failure_classes: str):
+        '''
+        Ghi nhận tác vụ chạy được qua các bước ứng với `failure_classes`, đóng các circuit đang half_open.
+        '''
+        with self._lock:
+            for failure_class in failure_classes:
+                circuit = self._get(failure_class)
+                if circuit['state'] == HALF_OPEN:
+                    circuit['state'] = CLOSED
+                    circuit['failures'].clear()
+                    circuit['probe_at'] = None
+                    Utility.logger(message=f'✅ Circuit "{failure_class}" đã đóng, chạy lại bình thường')
+
+    def record_failure(self, failure_class: str, profile_name: str = 'System'):
+        '''
+        Ghi nhận một lỗi thuộc loại `failure_class`, mở circuit khi đủ ngưỡng.
+        '''
+        now = time.time()
+        with self._lock:
+            circuit = self._get(failure_class)
+            circuit['total_failures'] += 1
+            if circuit['state'] == HALF_OPEN:
+                circuit['state'] = OPEN
+                circuit['opened_at'] = now
+                circuit['probe_at'] = None
+                circuit['opens'] += 1
+                Utility.logger(profile_name, f'⛔ Chạy thử thất bại, circuit "{failure_class}" mở thêm {self.cooldown:.0f}s')
+                return
+            failures = circuit['failures']
+            failures.append(now)
+            while failures and now - failures[0] > self.window:
+                failures.popleft()
+            if circuit['state'] == CLOSED and len(failures) >= self.threshold:
+                circuit['state'] = OPEN
+                circuit['opened_at'] = now
+                circuit['opens'] += 1
+                Utility.logger(profile_name, f'⛔ {len(failures)} lỗi "{failure_class}" trong {self.window:.0f}s, '
+                                             f'các profile sau bỏ qua tác vụ liên quan trong {self.cooldown:.0f}s')
+
+    def state(self, failure_class: str) -> str:
+        with self._lock:
+            return self._get(failure_class)['state']
+
+    def print_report(self) -> dict:
+        '''
+        Returns:
+            dict: {loại lỗi: {'state', 'failures', 'opens', 'skipped'}}
+        '''
+        with self._lock:
+            stats = {
+                failure_class: {
+                    'state': circuit['state'],
+                    'failures': circuit['total_failures'],
+                    'opens': circuit['opens'],
+                    'skipped': circuit['skipped'],
+                }
+                for failure_class, circuit in self._circuits.items()
+                if circuit['total_failures'] or circuit['skipped']
+            }
+        if stats:
+            print(f"{'Loại lỗi':<20}{'Trạng thái':>12}{'Số lỗi':>8}{'Số lần mở':>11}{'Bỏ qua':>8}")
+            for failure_class, row in stats.items():
+                print(f"{failure_class:<20}{row['state']:>12}{row['failures']:>8}{row['opens']:>11}{row['skipped']:>8}")
+        return stats
@@ -0,0 +1,224 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from monitoring import TRACER
+
+class Clock:
+    '''Đồng hồ thật: `time()` theo perf_counter, `sleep()` gọi `time.sleep`.'''
+    def time(self) -> float:
+        return time.perf_counter()
+
+    def sleep(self, seconds: float):
+        time.sleep(seconds)
+
+class VirtualClock(Clock):
+    '''
+    Đồng hồ ảo cho mô phỏng nhiều luồng: `sleep()` không ngủ thật mà chờ đến khi đồng hồ được đẩy tới thời điểm thức dậy.
+
+    - Các luồng tham gia đăng ký bằng `attach()`/`detach()`. Khi mọi luồng tham gia đều đang `sleep()`,
+      đồng hồ nhảy tới thời điểm thức dậy sớm nhất và đánh thức các luồng đến hạn.
+    - Luồng tham gia không được chặn lâu ở chỗ khác (join, queue...) khi vẫn đang `attach()`, nếu không đồng hồ sẽ đứng.
+    '''
+    def __init__(self, start: float = 0.0) -> None:
+        self._now = start
+        self._active = 0
+        self._sleepers: list[tuple[float, int, threading.Event]] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def time(self) -> float:
+        return self._now
+
+    def attach(self):
+        with self._lock:
+            self._active += 1
+
+    def detach(self):
+        with self._lock:
+            self._active -= 1
+            self._advance()
+
+    def sleep(self, seconds: float):
+        event = threading.Event()
+        with self._lock:
+            heapq.heappush(self._sleepers, (self._now + max(seconds, 0), next(self._seq), event))
+            self._active -= 1
+            self._advance()
+        event.wait()
+
+    def _advance(self):
+        # Gọi khi đang giữ khóa. Luồng được đánh thức được tính là đang chạy ngay từ lúc này.
+        while self._active == 0 and self._sleepers:
+            self._now = max(self._now, self._sleepers[0][0])
+            while self._sleepers and self._sleepers[0][0] <= self._now:
+                event = heapq.heappop(self._sleepers)[2]
+                self._active += 1
+                event.set()
+
+# Đồng hồ dùng cho mọi lần chờ của tool (qua PACER), mô phỏng thay bằng VirtualClock
+CLOCK: Clock = Clock()
+
+@contextmanager
+def use_clock(clock: Clock):
+    '''Tạm thay `CLOCK` (ví dụ bằng VirtualClock) trong khối `with`.'''
+    global CLOCK
+    previous, CLOCK = CLOCK, clock
+    try:
+        yield clock
+    finally:
+        CLOCK = previous
+
+class InstantClock(Clock):
+    '''Đồng hồ ảo cho một luồng (chạy lại, kiểm thử): `sleep()` chỉ cộng thời gian, trả về ngay.'''
+    def __init__(self, start: float = 0.0) -> None:
+        self._now = start
+        self._lock = threading.Lock()
+
+    def time(self) -> float:
+        return self._now
+
+    def sleep(self, seconds: float):
+        with self._lock:
+            self._now += max(seconds, 0)
+
+@dataclass
+class PacingPolicy:
+    '''
+    Chính sách chờ của `Pacer`.
+
+    - `jitter`: dao động ±tỉ lệ cho các lần chờ không cố định (`fix=False`).
+    - `scales`: hệ số nhân theo loại chờ, loại không có trong bảng giữ nguyên (1).
+    - `virtual`: True, chờ trên `InstantClock` (không ngủ thật).
+    '''
+    jitter: float = 0.4
+    scales: dict[str, float] = field(default_factory=dict)
+    virtual: bool = False
+
+# Loại chờ:
+#   human    - chờ giả lập người dùng trước thao tác, giữa các ký tự (mặc định)
+#   poll     - chờ giữa hai lần kiểm tra lại (khóa profile, phần tử, giao dịch, rate limit)
+#   settle   - chờ trang/trình duyệt ổn định (sau khi mở trang, trước khi đóng)
+#   schedule - chờ của bộ lập lịch (giữa hai lần mở profile, hết ô trống)
+#   throttle - chờ đến lượt của rate limit
+#   simulated - độ trễ giả của trình duyệt trong mô phỏng (`simulation.py`)
+PACING_POLICIES = {
+    'human': PacingPolicy(),
+    # Bỏ các lần chờ giả lập người dùng, giữ các lần chờ cần cho trang và bộ lập lịch
+    'fast': PacingPolicy(jitter=0, scales={'human': 0}),
+    # Như `human` nhưng không ngủ thật, dùng khi chạy lại/kiểm thử trong một luồng
+    'virtual': PacingPolicy(virtual=True),
+}
+
+class Pacer:
+    '''
+    Điểm chung cho mọi lần chờ chủ động của tool (`Utility.wait_time`, rate limit, theo dõi giao dịch).
+
+    - Áp dụng chính sách chờ (`PACING_POLICIES`): dao động, hệ số theo loại chờ, đồng hồ ảo.
+    - Ngủ trên `CLOCK` (mô phỏng thay bằng `VirtualClock`) hoặc `InstantClock` của chính sách `virtual`.
+    - Cộng thời gian đã chờ vào profile của luồng hiện tại (`bind`), theo từng loại chờ,
+      và vào span đang mở của `TRACER`.
+    '''
+    def __init__(self, policy: str = 'human') -> None:
+        self.policy_name = policy
+        self.policy = PACING_POLICIES[policy]
+        self.clock: Clock|None = None
+        self._accounts: dict[str, dict[str, float]] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def set_policy(self, name: str):
+        self.policy_name = name
+        self.policy = PACING_POLICIES[name]
+        self.clock = InstantClock() if self.policy.virtual else None
+
+    def bind(self, profile_name: str):
+        '''Gắn luồng hiện tại với `profile_name` và xóa số liệu cũ của profile đó.'''
+        self._local.profile_name = profile_name
+        with self._lock:
+            self._accounts[profile_name] = {}
+
+    def unbind(self):
+        self._local.profile_name = None
+
+    def now(self) -> float:
+        '''Thời điểm theo đồng hồ mà `sleep()` đang dùng, dùng cho hạn chờ của các vòng lặp chờ qua PACER.'''
+        return (self.clock or CLOCK).time()
+
+    def sleep(self, seconds: float, kind: str = 'human', fix: bool = False) -> float:
+        '''
+        Returns:
+            float: số giây đã chờ (theo đồng hồ đang dùng).
+        '''
+        policy = self.policy
+        seconds = max(seconds, 0) * policy.scales.get(kind, 1)
+        if not fix and policy.jitter:
+            seconds = random.uniform(seconds * (1 - policy.jitter), seconds * (1 + policy.jitter))
+        if seconds <= 0:
+            return 0
+        clock = self.clock or CLOCK
+        start = clock.time()
+        clock.sleep(seconds)
+        slept = clock.time() - start
+        TRACER.add_sleep(slept)
+        profile_name = getattr(self._local, 'profile_name', None) or 'System'
+        with self._lock:
+            account = self._accounts.setdefault(profile_name, {})
+            account[kind] = account.get(kind, 0) + slept
+        return slept
+
+    def summary(self, profile_name: str) -> dict:
+        '''
+        Returns:
+            dict: {'sleep_s': tổng, 'sleep_<loại>_s': theo từng loại}
+        '''
+        with self._lock:
+            account = dict(self._accounts.get(profile_name, {}))
+        return {'sleep_s': round(sum(account.values()), 1)} | {f'sleep_{kind}_s': round(value, 1) for kind, value in sorted(account.items())}
+
+PACER = Pacer()
+
+def self_check(samples: int = 200) -> None:
+    '''
+    Kiểm tra nhanh `Pacer` trên `InstantClock` (không ngủ thật, seed cố định): biên dao động của `human`,
+    hệ số của `fast`, cộng dồn theo loại chờ và `now()` khớp với thời gian đã chờ.
+
+    Raises:
+        AssertionError: nếu một điều kiện không đúng.
+    '''
+    state = random.getstate()
+    random.seed(0)
+    try:
+        pacer = Pacer('human')
+        pacer.clock = InstantClock()
+        jitter = pacer.policy.jitter
+        for _ in range(samples):
+            slept = pacer.sleep(10, 'human')
+            assert 10 * (1 - jitter) <= slept <= 10 * (1 + jitter), f'human: {slept:.3f}s ngoài biên ±{jitter:.0%}'
+        assert pacer.sleep(10, 'poll', fix=True) == 10, 'fix=True không được dao động'
+
+        pacer.set_policy('fast')
+        pacer.clock = InstantClock()
+        assert pacer.sleep(5, 'human') == 0, 'fast: chờ human phải bằng 0'
+        assert pacer.sleep(5, 'poll') == 5, 'fast: chờ poll phải giữ nguyên, không dao động'
+
+        start = pacer.now()
+        pacer.bind('check')
+        pacer.sleep(2, 'poll')
+        pacer.sleep(3, 'settle', fix=True)
+        pacer.sleep(4, 'human')
+        pacer.unbind()
+        pacer.sleep(1, 'poll')
+        summary = pacer.summary('check')
+        assert summary == {'sleep_s': 5.0, 'sleep_poll_s': 2.0, 'sleep_settle_s': 3.0}, f'cộng dồn theo loại: {summary}'
+        assert pacer.now() - start == 6, 'now() phải tiến đúng bằng thời gian đã chờ'
+    finally:
+        random.setstate(state)
+
+if __name__ == '__main__':
+    self_check()
+    print('✅ Pacer: biên dao động, chính sách fast và cộng dồn theo loại chờ đúng')
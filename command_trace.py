@@ -0,0 +1,430 @@
+'''
+Ghi và phát lại chuỗi lệnh WebDriver/CDP của một profile.
+
+- `CommandRecorder` bọc `driver.execute` (mọi lệnh của Node, WebElement và `execute_cdp_cmd` đều đi qua đây),
+  ghi thời điểm, thời lượng, tham số và kết quả rút gọn ra `report/commands/<profile>_<thời gian>.jsonl.gz`.
+  Script giống nhau chỉ lưu nội dung một lần, chuỗi dài và ảnh chụp chỉ lưu độ dài + hash,
+  nội dung nhập (pin, địa chỉ ví, kể cả phím gõ qua `ActionChains`) được che nếu `redact_keys=True`.
+- `StubDriver` trả lời lệnh theo bản ghi để chạy lại code (ví dụ `Auto._run`) không cần trình duyệt,
+  lệnh khác với bản ghi được ghi vào `divergences`.
+- `replay_live()` gửi lại bản ghi tới một trình duyệt thật (ví dụ trang mô phỏng `benchmark/fixture`).
+
+Cách chạy (từ thư mục gốc của tool):
+    python command_trace.py show report/commands/p1_20250101_080000.jsonl.gz
+    python command_trace.py diff <bản ghi cũ> <bản ghi mới>
+    python command_trace.py replay <bản ghi> --driver stub --flow auto      # chạy lại Auto._run trên StubDriver
+    python command_trace.py replay <bản ghi> --driver chrome --fixture      # gửi lại lệnh tới trang mô phỏng
+'''
+import argparse
+import functools
+import gzip
+import hashlib
+import json
+import statistics
+import time
+from datetime import datetime
+from pathlib import Path
+
+from selenium import webdriver
+from selenium.common import exceptions as selenium_exceptions
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options as ChromeOptions
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.webdriver.remote.webelement import WebElement
+
+import clock
+from utils import DIR_PATH, Utility
+
+COMMANDS_DIR = DIR_PATH / 'report' / 'commands'
+ELEMENT_KEY = 'element-6066-11e4-a52e-4f735466cecf'
+# Chuỗi dài hơn được lưu dạng {'$len', '$sha1'} (page source, ảnh chụp base64...)
+MAX_STRING = 300
+# Lệnh nhập nội dung, tham số bị che khi redact_keys=True
+KEY_COMMANDS = {'sendKeysToElement', 'sendKeysToActiveElement'}
+# Hành động phím trong lệnh W3C `actions` (ActionChains), `value` bị che khi redact_keys=True
+KEY_ACTIONS = {'keyDown', 'keyUp'}
+# Lệnh gắn với phiên cũ, không gửi lại khi replay_live
+SESSION_COMMANDS = {'newSession', 'quit', 'getSession', 'status'}
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode('utf-8', 'replace')).hexdigest()[:12]
+
+def _compact(value):
+    '''Rút gọn tham số/kết quả để ghi JSON: WebElement -> {'$el': id}, chuỗi dài -> {'$len', '$sha1'}.'''
+    if isinstance(value, WebElement):
+        return {'$el': value.id}
+    if isinstance(value, dict):
+        if ELEMENT_KEY in value:
+            return {'$el': value[ELEMENT_KEY]}
+        return {key: _compact(item) for key, item in value.items() if key != 'sessionId'}
+    if isinstance(value, (list, tuple)):
+        return [_compact(item) for item in value]
+    if isinstance(value, str) and len(value) > MAX_STRING:
+        return {'$len': len(value), '$sha1': _digest(value)}
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return repr(value)[:MAX_STRING]
+
+def _expand(value, element_ids: dict[str, str]|None = None):
+    '''Ngược lại `_compact`: {'$el': id} -> tham chiếu phần tử W3C (đổi id theo `element_ids` nếu có).'''
+    if isinstance(value, dict):
+        if '$el' in value:
+            element_id = value['$el']
+            return {ELEMENT_KEY: element_ids.get(element_id, element_id) if element_ids else element_id}
+        if '$len' in value:
+            return ''
+        return {key: _expand(item, element_ids) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_expand(item, element_ids) for item in value]
+    return value
+
+def _element_ids(value) -> list[str]:
+    if isinstance(value, dict):
+        if '$el' in value:
+            return [value['$el']]
+        return [element_id for item in value.values() for element_id in _element_ids(item)]
+    if isinstance(value, list):
+        return [element_id for item in value for element_id in _element_ids(item)]
+    return []
+
+def _redact_actions(sources: list) -> list:
+    '''Che `value` của keyDown/keyUp trong tham số `actions`, giữ nguyên số hành động và thời gian pause.'''
+    redacted = []
+    for source in sources:
+        if isinstance(source, dict) and isinstance(source.get('actions'), list):
+            source = {**source, 'actions': [{**action, 'value': '*'}
+                                            if isinstance(action, dict) and action.get('type') in KEY_ACTIONS else action
+                                            for action in source['actions']]}
+        redacted.append(source)
+    return redacted
+
+class CommandRecorder:
+    '''
+    Ghi mọi lệnh WebDriver đi qua `driver.execute` của một trình duyệt.
+
+    Mỗi lệnh là một dòng JSON: {'t': ms từ lúc bắt đầu, 'cmd', 'params', 'ms': thời lượng, 'status', 'result'}.
+    '''
+    def __init__(self, driver, profile_name: str = 'System', redact_keys: bool = True) -> None:
+        self.driver = driver
+        self.profile_name = profile_name
+        self.redact_keys = redact_keys
+        self.commands: list[dict] = []
+        self.scripts: dict[str, str] = {}
+        self.started_at = datetime.now()
+        self._origin = time.perf_counter()
+        self._execute = None
+
+    def attach(self) -> 'CommandRecorder':
+        execute = self._execute = self.driver.execute
+
+        @functools.wraps(execute)
+        def recorded(driver_command, params=None):
+            start = time.perf_counter()
+            status, result = 'ok', None
+            try:
+                response = execute(driver_command, params)
+                result = response.get('value') if isinstance(response, dict) else None
+                return response
+            except Exception as e:
+                status = type(e).__name__
+                raise
+            finally:
+                self._record(driver_command, params, start, time.perf_counter(), status, result)
+        self.driver.execute = recorded
+        return self
+
+    def detach(self):
+        if self._execute:
+            self.driver.execute = self._execute
+            self._execute = None
+
+    def _record(self, command: str, params: dict|None, start: float, end: float, status: str, result):
+        params = dict(params or {})
+        if command in KEY_COMMANDS and self.redact_keys:
+            text = params.get('text', '')
+            params = {key: value for key, value in params.items() if key not in ('text', 'value')}
+            params['text'] = '*' * len(text)
+        if command == Command.W3C_ACTIONS and self.redact_keys and isinstance(params.get('actions'), list):
+            params['actions'] = _redact_actions(params['actions'])
+        if isinstance(params.get('script'), str):
+            # Lưu nội dung script một lần, lệnh chỉ giữ hash
+            script = params['script']
+            digest = _digest(script)
+            self.scripts.setdefault(digest, script)
+            params['script'] = {'$script': digest}
+        self.commands.append({
+            't': round((start - self._origin) * 1000, 1),
+            'cmd': command,
+            'params': _compact(params),
+            'ms': round((end - start) * 1000, 1),
+            'status': status,
+            'result': _compact(result),
+        })
+
+    def summary(self) -> dict:
+        '''
+        Returns:
+            dict: {'commands', 'command_ms'}
+        '''
+        return {'commands': len(self.commands), 'command_ms': round(sum(command['ms'] for command in self.commands))}
+
+    def save(self, path: Path|None = None) -> Path|None:
+        '''
+        Ghi bản ghi ra file `.jsonl.gz`: dòng đầu là thông tin chung, tiếp theo là các script, sau đó là các lệnh.
+
+        Returns:
+            Path | None: None nếu chưa có lệnh nào hoặc ghi lỗi.
+        '''
+        if not self.commands:
+            return None
+        if path is None:
+            COMMANDS_DIR.mkdir(parents=True, exist_ok=True)
+            path = COMMANDS_DIR / f"{self.profile_name}_{self.started_at.strftime('%Y%m%d_%H%M%S')}.jsonl.gz"
+        try:
+            with gzip.open(path, 'wt', encoding='utf-8') as f:
+                f.write(json.dumps({'profile': self.profile_name, 'started_at': self.started_at.isoformat(timespec='seconds'),
+                                    'redact_keys': self.redact_keys, **self.summary()}, ensure_ascii=False) + '\n')
+                for digest, script in self.scripts.items():
+                    f.write(json.dumps({'script': digest, 'source': script}, ensure_ascii=False) + '\n')
+                for command in self.commands:
+                    f.write(json.dumps(command, ensure_ascii=False, separators=(',', ':')) + '\n')
+        except OSError as e:
+            Utility.logger(self.profile_name, f'❌ Không ghi được bản ghi lệnh WebDriver: {e}')
+            return None
+        return path
+
+def load_recording(path: Path) -> tuple[dict, dict[str, str], list[dict]]:
+    '''
+    Returns:
+        tuple: (thông tin chung, {hash: script}, danh sách lệnh)
+    '''
+    scripts, commands = {}, []
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        meta = json.loads(f.readline())
+        for line in f:
+            item = json.loads(line)
+            if 'script' in item and 'cmd' not in item:
+                scripts[item['script']] = item['source']
+            else:
+                commands.append(item)
+    return meta, scripts, commands
+
+class ReplayDivergence(WebDriverException):
+    '''Lệnh được gửi khác với lệnh kế tiếp trong bản ghi (hoặc bản ghi đã hết).'''
+
+class ReplayExecutor:
+    '''
+    `command_executor` giả của `StubDriver`: trả lời lệnh theo bản ghi thay vì gửi HTTP tới chromedriver.
+
+    - Lệnh phải đến đúng thứ tự tên lệnh của bản ghi, lệnh lỗi trong bản ghi được ném lại đúng loại ngoại lệ của Selenium.
+    - Khác tên lệnh hoặc hết bản ghi: ghi vào `divergences` và ném `ReplayDivergence`.
+    - `newSession` (lúc tạo driver) không nằm trong bản ghi, trả về phiên giả.
+    '''
+    def __init__(self, commands: list[dict]) -> None:
+        self.commands = commands
+        self.position = 0
+        self.divergences: list[dict] = []
+
+    def execute(self, driver_command: str, params: dict|None = None) -> dict:
+        if driver_command == Command.NEW_SESSION:
+            return {'value': {'sessionId': 'replay', 'capabilities': {'browserName': 'chrome', 'goog:chromeOptions': {}}}}
+        if self.position >= len(self.commands):
+            self.divergences.append({'index': self.position, 'expected': None, 'got': driver_command})
+            raise ReplayDivergence(f'Bản ghi đã hết, lệnh thừa: {driver_command}')
+        expected = self.commands[self.position]
+        if expected['cmd'] != driver_command:
+            self.divergences.append({'index': self.position, 'expected': expected['cmd'], 'got': driver_command})
+            raise ReplayDivergence(f"Lệnh #{self.position}: bản ghi {expected['cmd']}, nhận {driver_command}")
+        self.position += 1
+        if expected['status'] != 'ok':
+            exception = getattr(selenium_exceptions, expected['status'], WebDriverException)
+            if not (isinstance(exception, type) and issubclass(exception, Exception)):
+                exception = WebDriverException
+            raise exception(f'Lỗi trong bản ghi: {expected["status"]}')
+        return {'value': _expand(expected['result'])}
+
+class StubDriver(WebDriver):
+    '''
+    Driver giả trả lời theo bản ghi của `CommandRecorder`, không mở trình duyệt.
+
+    - Dựng trên `WebDriver` của Selenium với `ReplayExecutor` làm `command_executor`, nên `find_element`,
+      `execute_script`, `switch_to`, WebElement... chạy đúng như driver thật, chỉ phần gửi lệnh được thay.
+    - Không có các lệnh riêng của Chrome (`execute_cdp_cmd`, `get_log`): chạy lại với Node không bật
+      rule chặn/thống kê mạng.
+    - Kết quả chuỗi dài (page source, ảnh chụp) chỉ còn hash nên trả về chuỗi rỗng.
+    '''
+    def __init__(self, commands: list[dict]) -> None:
+        super().__init__(command_executor=ReplayExecutor(commands), options=ChromeOptions())
+        # Tham số send_keys không phải đường dẫn file cần tải lên
+        self._is_remote = False
+
+    @property
+    def commands(self) -> list[dict]:
+        return self.command_executor.commands
+
+    @property
+    def position(self) -> int:
+        return self.command_executor.position
+
+    @property
+    def divergences(self) -> list[dict]:
+        return self.command_executor.divergences
+
+    def quit(self):
+        pass
+
+def replay_live(commands: list[dict], scripts: dict[str, str], driver, rewrite: dict[str, str]|None = None) -> list[dict]:
+    '''
+    Gửi lại các lệnh của bản ghi tới `driver` thật (bỏ qua lệnh phiên), id phần tử được đổi theo kết quả mới.
+    Chuỗi trong tham số được thay theo `rewrite` (ví dụ URL extension -> URL trang mô phỏng).
+
+    Returns:
+        list[dict]: lệnh bị lỗi khi gửi lại {'index', 'cmd', 'error'}.
+    '''
+    rewrite = rewrite or {}
+
+    def apply_rewrite(value):
+        if isinstance(value, str):
+            for old, new in rewrite.items():
+                value = value.replace(old, new)
+            return value
+        if isinstance(value, dict):
+            return {key: apply_rewrite(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [apply_rewrite(item) for item in value]
+        return value
+
+    element_ids: dict[str, str] = {}
+    errors = []
+    for index, command in enumerate(commands):
+        if command['cmd'] in SESSION_COMMANDS:
+            continue
+        params = dict(command['params'])
+        if isinstance(params.get('script'), dict):
+            params['script'] = scripts.get(params['script']['$script'], '')
+        params = apply_rewrite(_expand(params, element_ids))
+        try:
+            response = driver.execute(command['cmd'], params)
+        except Exception as e:
+            errors.append({'index': index, 'cmd': command['cmd'], 'error': type(e).__name__})
+            continue
+        # Ghép id phần tử cũ với id mới theo thứ tự xuất hiện trong kết quả
+        new_ids = _element_ids(_compact(response.get('value') if isinstance(response, dict) else None))
+        for old_id, new_id in zip(_element_ids(command['result']), new_ids):
+            element_ids[old_id] = new_id
+    return errors
+
+def summarize(commands: list[dict]) -> dict[str, dict]:
+    '''
+    Returns:
+        dict: {tên lệnh: {'count', 'total_ms', 'p50_ms', 'errors'}}
+    '''
+    groups: dict[str, list[dict]] = {}
+    for command in commands:
+        groups.setdefault(command['cmd'], []).append(command)
+    return {
+        name: {
+            'count': len(items),
+            'total_ms': round(sum(item['ms'] for item in items)),
+            'p50_ms': round(statistics.median(item['ms'] for item in items), 1),
+            'errors': sum(item['status'] != 'ok' for item in items),
+        }
+        for name, items in sorted(groups.items())
+    }
+
+def print_diff(old: list[dict], new: list[dict]):
+    old_summary, new_summary = summarize(old), summarize(new)
+    print(f"{'Lệnh':<32}{'Số lệnh':>16}{'Tổng (ms)':>22}{'p50 (ms)':>20}")
+    for name in sorted(set(old_summary) | set(new_summary)):
+        a = old_summary.get(name, {'count': 0, 'total_ms': 0, 'p50_ms': 0})
+        b = new_summary.get(name, {'count': 0, 'total_ms': 0, 'p50_ms': 0})
+        mark = ' ⚠️' if b['count'] > a['count'] else ''
+        print(f"{name:<32}{a['count']:>7} -> {b['count']:<6}{a['total_ms']:>10} -> {b['total_ms']:<8}"
+              f"{a['p50_ms']:>9} -> {b['p50_ms']:<7}{mark}")
+    print(f'Tổng: {len(old)} -> {len(new)} lệnh '
+          f"({sum(c['ms'] for c in old) / 1000:.1f}s -> {sum(c['ms'] for c in new) / 1000:.1f}s thời gian chờ WebDriver)")
+
+def _replay_stub_auto(meta: dict, commands: list[dict]) -> tuple[StubDriver, CommandRecorder]:
+    # Import ở đây để `show`/`diff` không cần tải index.py
+    import index
+    from browser_automation import Node
+
+    driver = StubDriver(commands)
+    recorder = CommandRecorder(driver, meta.get('profile', 'replay')).attach()
+    node = Node(driver, meta.get('profile', 'replay'))
+    wallet = '0x' + '0' * 40
+    profile = {'profile_name': node.profile_name, 'pin': '0' * 6, 'wallet': wallet, 'recieve_addresses': [wallet]}
+    # Bỏ qua thời gian chờ của Utility.wait_time khi chạy lại
+    policy = clock.PACER.policy_name
+    clock.PACER.set_policy('virtual')
+    try:
+        index.Auto(node, profile)._run()
+    except Exception as e:
+        Utility.logger('REPLAY', f'Dừng chạy lại: {e}')
+    finally:
+        clock.PACER.set_policy(policy)
+    return driver, recorder
+
+def main():
+    parser = argparse.ArgumentParser(description='Xem, so sánh và phát lại bản ghi lệnh WebDriver')
+    sub = parser.add_subparsers(dest='action', required=True)
+    show = sub.add_parser('show', help='Thống kê một bản ghi')
+    show.add_argument('path', type=Path)
+    diff = sub.add_parser('diff', help='So sánh số lệnh và độ trễ giữa hai bản ghi')
+    diff.add_argument('old', type=Path)
+    diff.add_argument('new', type=Path)
+    replay = sub.add_parser('replay', help='Phát lại một bản ghi')
+    replay.add_argument('path', type=Path)
+    replay.add_argument('--driver', choices=['stub', 'chrome'], default='stub')
+    replay.add_argument('--flow', choices=['auto'], default='auto', help='Code chạy lại trên StubDriver')
+    replay.add_argument('--fixture', action='store_true', help='Chrome: đổi URL extension sang trang mô phỏng benchmark/fixture')
+    replay.add_argument('--rewrite', nargs='*', default=[], metavar='CŨ=MỚI', help='Chrome: thay chuỗi trong tham số')
+    replay.add_argument('--save', type=Path, help='Ghi bản ghi của lần phát lại')
+    args = parser.parse_args()
+
+    if args.action == 'show':
+        meta, _, commands = load_recording(args.path)
+        print(json.dumps(meta, ensure_ascii=False))
+        for name, row in summarize(commands).items():
+            print(f"{name:<32}{row['count']:>6} lệnh{row['total_ms']:>10} ms   p50 {row['p50_ms']:>7} ms   lỗi {row['errors']}")
+        return
+
+    if args.action == 'diff':
+        print_diff(load_recording(args.old)[2], load_recording(args.new)[2])
+        return
+
+    meta, scripts, commands = load_recording(args.path)
+    if args.driver == 'stub':
+        driver, recorder = _replay_stub_auto(meta, commands)
+        print(f'Chạy lại {driver.position}/{len(commands)} lệnh của bản ghi')
+        for divergence in driver.divergences:
+            print(f"⚠️ Lệnh #{divergence['index']}: bản ghi {divergence['expected']}, code hiện tại {divergence['got']}")
+    else:
+        rewrite = dict(item.split('=', 1) for item in args.rewrite)
+        server = None
+        if args.fixture:
+            import index
+            from benchmark.bench_node import start_fixture
+            server, base = start_fixture()
+            rewrite[index.PROJECT_URL] = base
+        options = ChromeOptions()
+        options.add_argument('--headless=new')
+        options.add_argument('--no-sandbox')
+        driver = webdriver.Chrome(options=options)
+        recorder = CommandRecorder(driver, meta.get('profile', 'replay'), redact_keys=False).attach()
+        try:
+            errors = replay_live(commands, scripts, driver, rewrite)
+        finally:
+            recorder.detach()
+            driver.quit()
+            if server:
+                server.shutdown()
+        print(f'Gửi lại {len(recorder.commands)} lệnh, {len(errors)} lệnh lỗi')
+    print_diff(commands, recorder.commands)
+    if args.save:
+        recorder.save(args.save)
+        print(f'Đã lưu: {args.save}')
+
+if __name__ == '__main__':
+    main()
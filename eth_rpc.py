@@ -0,0 +1,270 @@
+import itertools
+import threading
+import time
+
+import requests
+
+import clock
+from utils import Utility
+
+DEFAULT_RPC_URL = 'https://ethereum-sepolia-rpc.publicnode.com'
+WEI_PER_ETH = 10 ** 18
+
+def get_rpc_url() -> str:
+    '''
+    Endpoint JSON-RPC: `RPC_URL` trong config.txt, để trống dùng `DEFAULT_RPC_URL`.
+    '''
+    config = Utility.read_config('RPC_URL')
+    return config[0].strip() if config and config[0].strip() else DEFAULT_RPC_URL
+
+class EthRpc:
+    '''
+    Client JSON-RPC tối giản, gom nhiều call vào một request batch.
+    '''
+    def __init__(self, url: str|None = None, timeout: int = 15) -> None:
+        self.url = url or get_rpc_url()
+        self.timeout = timeout
+        self._session = requests.Session()
+        self._ids = itertools.count(1)
+
+    def batch(self, calls: list[tuple[str, list]]) -> list:
+        '''
+        Gửi nhiều call trong một request batch.
+
+        Args:
+            calls (list[tuple[str, list]]): danh sách (method, params).
+
+        Returns:
+            list: kết quả theo đúng thứ tự `calls`, call bị lỗi trả về None.
+
+        Raises:
+            requests.RequestException: lỗi kết nối hoặc HTTP.
+        '''
+        if not calls:
+            return []
+        ids = [next(self._ids) for _ in calls]
+        payload = [{'jsonrpc': '2.0', 'id': id, 'method': method, 'params': params} for id, (method, params) in zip(ids, calls)]
+        response = self._session.post(self.url, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+        by_id = {item.get('id'): item for item in (data if isinstance(data, list) else [data])}
+        return [by_id.get(id, {}).get('result') for id in ids]
+
+    def get_balances(self, addresses: list[str], block: str = 'latest') -> dict[str, int|None]:
+        '''
+        Lấy số dư (wei) của nhiều ví trong một request batch `eth_getBalance`.
+
+        Returns:
+            dict: {địa chỉ: số dư wei | None nếu lỗi}
+        '''
+        addresses = list(dict.fromkeys(address for address in addresses if address))
+        results = self.batch([('eth_getBalance', [address, block]) for address in addresses])
+        return {address: int(result, 16) if result else None for address, result in zip(addresses, results)}
+
+    def get_accounts(self, addresses: list[str]) -> dict[str, dict]:
+        '''
+        Lấy số dư (wei) và nonce của nhiều ví trong một request batch.
+
+        Returns:
+            dict: {địa chỉ: {'balance': int | None, 'nonce': int | None}}
+        '''
+        addresses = list(dict.fromkeys(address for address in addresses if address))
+        calls = []
+        for address in addresses:
+            calls.append(('eth_getBalance', [address, 'latest']))
+            calls.append(('eth_getTransactionCount', [address, 'latest']))
+        results = self.batch(calls)
+        return {
+            address: {
+                'balance': int(results[2 * index], 16) if results[2 * index] else None,
+                'nonce': int(results[2 * index + 1], 16) if results[2 * index + 1] else None,
+            }
+            for index, address in enumerate(addresses)
+        }
+
+class TxTracker:
+    '''
+    Theo dõi giao dịch đã gửi của tất cả profile trong một luồng nền.
+
+    Mỗi `interval` giây gửi một request batch cho mọi ví còn giao dịch chưa xác nhận:
+    `eth_getTransactionCount` (latest và pending), kèm `eth_getTransactionReceipt` nếu biết tx hash.
+    - Không có tx hash: số giao dịch đã xác nhận = nonce hiện tại - nonce lúc bắt đầu (`register()`).
+    - Giao dịch không còn trong mempool quá `stuck_after` giây mà chưa xác nhận được coi là bị drop.
+    - `can_send()` trả về False khi ví có từ `max_pending` giao dịch chưa xác nhận trở lên.
+    '''
+    def __init__(self, rpc: EthRpc|None = None, interval: float = 15, max_pending: int = 3, stuck_after: float = 300) -> None:
+        self.rpc = rpc or EthRpc()
+        self.interval = interval
+        self.max_pending = max_pending
+        self.stuck_after = stuck_after
+        self._profiles: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread|None = None
+
+    def _get_nonce(self, wallet: str, block: str = 'latest') -> int:
+        return int(self.rpc.batch([('eth_getTransactionCount', [wallet, block])])[0], 16)
+
+    def register(self, profile_name: str, wallet: str, nonce: int|None = None):
+        '''
+        Ghi nhận ví của profile và nonce trước khi gửi giao dịch. Nonce None sẽ được lấy ngay.
+        '''
+        if nonce is None:
+            nonce = self._get_nonce(wallet)
+        with self._lock:
+            self._profiles[profile_name] = self._new_state(wallet, nonce)
+
+    @staticmethod
+    def _new_state(wallet: str, nonce: int) -> dict:
+        return {
+            'wallet': wallet,
+            'base_nonce': nonce,
+            'latest_nonce': nonce,
+            'submitted': 0,
+            'confirmed': 0,
+            'failed': 0,
+            'dropped': 0,
+            'send_times': [],  # thời điểm gửi của các giao dịch chưa xác nhận
+            'hashes': {},  # tx hash -> 'pending' | 'success' | 'failed'
+            'stuck_logged': False,
+        }
+
+    def record_send(self, profile_name: str, wallet: str, tx_hash: str|None = None):
+        '''
+        Ghi nhận một giao dịch vừa gửi và khởi động luồng theo dõi nếu chưa chạy.
+        '''
+        with self._lock:
+            registered = profile_name in self._profiles
+        nonce = None
+        if not registered:
+            try:
+                # Chưa register trước khi gửi: nonce pending đã tính cả giao dịch vừa gửi
+                nonce = self._get_nonce(wallet, 'pending') - 1
+            except Exception as e:
+                Utility.logger(profile_name, f'Không theo dõi được giao dịch: {e}')
+                return
+        with self._lock:
+            # Gọi RPC ngoài lock; nếu luồng khác đã register trong lúc đó thì giữ trạng thái của nó
+            if profile_name not in self._profiles:
+                self._profiles[profile_name] = self._new_state(wallet, nonce)
+            state = self._profiles[profile_name]
+            state['submitted'] += 1
+            state['send_times'].append(time.time())
+            if tx_hash:
+                state['hashes'][tx_hash] = 'pending'
+        self.start()
+
+    def pending(self, profile_name: str) -> int:
+        with self._lock:
+            state = self._profiles.get(profile_name)
+            return state['submitted'] - state['confirmed'] - state['dropped'] if state else 0
+
+    def can_send(self, profile_name: str) -> bool:
+        return self.pending(profile_name) < self.max_pending
+
+    def wait_for_capacity(self, profile_name: str, timeout: float = 120) -> bool:
+        '''
+        Chờ đến khi ví còn dưới `max_pending` giao dịch chưa xác nhận.
+
+        Returns:
+            bool: False nếu hết `timeout` mà vẫn còn quá nhiều giao dịch chưa xác nhận.
+        '''
+        end_time = clock.PACER.now() + timeout
+        while not self.can_send(profile_name):
+            if clock.PACER.now() > end_time:
+                return False
+            Utility.wait_time(min(self.interval, 5), True, 'poll')
+        return True
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, daemon=True, name='tx-tracker')
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval + 5)
+            self._thread = None
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                Utility.logger(message=f'Lỗi khi kiểm tra giao dịch: {e}')
+
+    def poll(self):
+        '''
+        Kiểm tra tất cả ví còn giao dịch chưa xác nhận trong một request batch.
+        '''
+        with self._lock:
+            tracked = [(name, state['wallet'], [h for h, status in state['hashes'].items() if status == 'pending'])
+                       for name, state in self._profiles.items()
+                       if state['submitted'] - state['confirmed'] - state['dropped'] > 0]
+        if not tracked:
+            return
+        calls = []
+        for _, wallet, hashes in tracked:
+            calls.append(('eth_getTransactionCount', [wallet, 'latest']))
+            calls.append(('eth_getTransactionCount', [wallet, 'pending']))
+            calls.extend(('eth_getTransactionReceipt', [tx_hash]) for tx_hash in hashes)
+        results = iter(self.rpc.batch(calls))
+
+        now = time.time()
+        with self._lock:
+            for profile_name, _, hashes in tracked:
+                latest, pending = next(results), next(results)
+                receipts = {tx_hash: next(results) for tx_hash in hashes}
+                state = self._profiles[profile_name]
+                for tx_hash, receipt in receipts.items():
+                    if receipt:
+                        state['hashes'][tx_hash] = 'success' if receipt.get('status') == '0x1' else 'failed'
+                        if state['hashes'][tx_hash] == 'failed':
+                            state['failed'] += 1
+                            Utility.logger(profile_name, f'❌ Giao dịch thất bại: {tx_hash}')
+                if latest is None or pending is None:
+                    continue
+                latest, pending = int(latest, 16), int(pending, 16)
+                state['latest_nonce'] = latest
+                confirmed = min(latest - state['base_nonce'], state['submitted'] - state['dropped'])
+                if confirmed > state['confirmed']:
+                    del state['send_times'][:confirmed - state['confirmed']]
+                    state['confirmed'] = confirmed
+                    state['stuck_logged'] = False
+
+                unconfirmed = state['submitted'] - state['confirmed'] - state['dropped']
+                if not unconfirmed or not state['send_times'] or now - state['send_times'][0] < self.stuck_after:
+                    continue
+                if pending <= latest:
+                    # Không còn trong mempool: giao dịch đã bị drop
+                    state['dropped'] += unconfirmed
+                    state['send_times'].clear()
+                    Utility.logger(profile_name, f'⚠️ {unconfirmed} giao dịch bị drop (không còn trong mempool)')
+                elif not state['stuck_logged']:
+                    state['stuck_logged'] = True
+                    Utility.logger(profile_name, f'⚠️ {unconfirmed} giao dịch chưa được xác nhận sau {self.stuck_after:.0f}s')
+
+    def summary(self, profile_name: str) -> dict|None:
+        '''
+        Returns:
+            dict | None: {'tx_submitted', 'tx_confirmed', 'tx_pending', 'tx_failed', 'tx_dropped'}
+        '''
+        with self._lock:
+            state = self._profiles.get(profile_name)
+            if not state or not state['submitted']:
+                return None
+            return {
+                'tx_submitted': state['submitted'],
+                'tx_confirmed': state['confirmed'],
+                'tx_pending': state['submitted'] - state['confirmed'] - state['dropped'],
+                'tx_failed': state['failed'],
+                'tx_dropped': state['dropped'],
+            }
+
+    def profiles(self) -> list[str]:
+        with self._lock:
+            return list(self._profiles)
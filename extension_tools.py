@@ -0,0 +1,150 @@
+import json
+import threading
+
+import requests
+import websocket
+
+from utils import Utility
+
+class ServiceWorkerKeepAlive:
+    '''
+    Theo dõi service worker (MV3) của extension qua CDP ở cấp trình duyệt và (tuỳ chọn) giữ cho nó không bị tắt.
+
+    Chrome tắt service worker của extension sau khoảng 30 giây không hoạt động, lần thao tác kế tiếp trên giao diện
+    ví phải chờ khởi động lại (cold start) và đôi khi hiện lại màn hình khóa.
+
+    - Cứ `interval` giây gọi `Target.getTargets`, đếm số lần worker bị tắt (`stops`) và khởi động lại (`cold_starts`).
+    - `keep_alive=True`: gắn (`Target.attachToTarget`) vào worker, Chrome không tắt worker đang có DevTools gắn vào.
+      Gắn lại mỗi khi worker được khởi động lại.
+    - `network`: gắn vào worker và bật `Network.enable` trên session của nó, sự kiện mạng của worker (RPC của ví)
+      được chuyển cho `NetworkMonitor.handle_worker_event()`. Vì phải gắn DevTools, worker cũng không bị tắt khi đang đo.
+    - Kết nối websocket riêng tới `debuggerAddress` của chromedriver, không chiếm driver của luồng chính.
+    - Worker được phân biệt theo (browserContextId, origin): mỗi profile Chrome là một browser context riêng nên
+      cùng một extension ở các profile trong trình duyệt dùng chung không bị gộp làm một.
+      `page_target_id` (handle một tab của profile) chỉ theo dõi worker cùng browser context với tab đó.
+    '''
+    def __init__(self, debugger_address: str, extension_id: str|None = None, keep_alive: bool = True,
+                 interval: float = 5, profile_name: str = 'System', network=None, page_target_id: str|None = None) -> None:
+        self.debugger_address = debugger_address
+        self.page_target_id = page_target_id
+        self.context_id: str|None = None
+        self.origin = f'chrome-extension://{extension_id}/' if extension_id else 'chrome-extension://'
+        self.keep_alive = keep_alive
+        self.network = network
+        self._sessions: set[str] = set()  # sessionId của các worker đang đo lưu lượng
+        self.interval = interval
+        self.profile_name = profile_name
+        self.cold_starts = 0
+        self.stops = 0
+        self._workers: dict[tuple[str, str], dict] = {}  # (browserContextId, origin) -> {'target_id', 'running'}
+        self._attached: set[str] = set()
+        self._ws = None
+        self._ids = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread|None = None
+
+    def start(self) -> bool:
+        '''
+        Returns:
+            bool: False nếu không kết nối được tới trình duyệt.
+        '''
+        try:
+            version = requests.get(f'http://{self.debugger_address}/json/version', timeout=5).json()
+            # Không gửi header Origin để không bị chặn khi Chrome thiếu `--remote-allow-origins`
+            self._ws = websocket.create_connection(version['webSocketDebuggerUrl'], timeout=10, suppress_origin=True)
+            if self.page_target_id:
+                # Handle cửa sổ của chromedriver chính là targetId của tab
+                info = self._send('Target.getTargetInfo', {'targetId': self.page_target_id})['targetInfo']
+                self.context_id = info.get('browserContextId')
+            self._poll()
+        except Exception as e:
+            Utility.logger(self.profile_name, f'Không kết nối được CDP để theo dõi service worker: {e}')
+            self.stop()
+            return False
+        self._thread = threading.Thread(target=self._loop, daemon=True, name=f'sw-keepalive-{self.profile_name}')
+        self._thread.start()
+        return True
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval + 5)
+            self._thread = None
+        if self._ws and self._sessions:
+            # Đọc nốt sự kiện mạng của worker còn trong websocket
+            try:
+                self._send('Target.getTargets')
+            except Exception:
+                pass
+        if self._ws:
+            try:
+                self._ws.close()
+            except Exception:
+                pass
+            self._ws = None
+
+    def _send(self, method: str, params: dict|None = None, session_id: str|None = None) -> dict:
+        self._ids += 1
+        message = {'id': self._ids, 'method': method, 'params': params or {}}
+        if session_id:
+            message['sessionId'] = session_id
+        self._ws.send(json.dumps(message))
+        while True:
+            # Sự kiện mạng của worker chuyển cho NetworkMonitor, các sự kiện khác bỏ qua
+            response = json.loads(self._ws.recv())
+            if 'method' in response:
+                if response.get('sessionId') in self._sessions and response['method'].startswith('Network.'):
+                    self.network.handle_worker_event(response)
+                continue
+            if response.get('id') == self._ids:
+                if 'error' in response:
+                    raise RuntimeError(response['error'].get('message'))
+                return response.get('result', {})
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self._poll()
+            except Exception as e:
+                # Trình duyệt đã đóng
+                Utility.logger(self.profile_name, f'Dừng theo dõi service worker: {e}')
+                return
+
+    def _poll(self):
+        targets = self._send('Target.getTargets')['targetInfos']
+        running = {}
+        for target in targets:
+            if target.get('type') != 'service_worker' or not target.get('url', '').startswith(self.origin):
+                continue
+            if self.context_id and target.get('browserContextId') != self.context_id:
+                continue
+            origin = '/'.join(target['url'].split('/', 3)[:3])
+            running[(target.get('browserContextId', ''), origin)] = target['targetId']
+
+        for key, target_id in running.items():
+            origin = key[1]
+            worker = self._workers.get(key)
+            if worker and (not worker['running'] or worker['target_id'] != target_id):
+                self.cold_starts += 1
+            self._workers[key] = {'target_id': target_id, 'running': True}
+            if (self.keep_alive or self.network) and target_id not in self._attached:
+                try:
+                    session_id = self._send('Target.attachToTarget', {'targetId': target_id, 'flatten': True})['sessionId']
+                    self._attached.add(target_id)
+                    if self.network:
+                        self._sessions.add(session_id)
+                        self._send('Network.enable', {}, session_id)
+                except RuntimeError as e:
+                    Utility.logger(self.profile_name, f'Không gắn được vào service worker {origin}: {e}')
+
+        for key, worker in self._workers.items():
+            if worker['running'] and key not in running:
+                worker['running'] = False
+                self.stops += 1
+
+    def summary(self) -> dict:
+        '''
+        Returns:
+            dict: {'sw_keepalive', 'sw_stops', 'sw_cold_starts'}
+        '''
+        return {'sw_keepalive': self.keep_alive, 'sw_stops': self.stops, 'sw_cold_starts': self.cold_starts}
@@ -1,13 +1,44 @@
 
 import argparse
+import json
 import random
+import re
+import threading
 import time
+from datetime import datetime, timezone
+from pathlib import Path
 from selenium.webdriver.common.by import By
 
 from browser_automation import BrowserManager, Node
 from utils import Utility
+from network_tools import BLOCK_PRESETS
+from eth_rpc import EthRpc, WEI_PER_ETH
+from monitoring import METRICS
 
 PROJECT_URL = "chrome-extension://andhndehpcjpmneneealacgnmealilal"
+# Số dư tối thiểu (ETH) để thực hiện send ETH
+MIN_ETH_BALANCE = 0.005
+# Ngày (UTC) check-in gần nhất của từng profile
+CHECKIN_PATH = Path(__file__).parent / 'report' / 'checkin.json'
+# Loại lỗi cho circuit breaker dùng chung giữa các profile
+FAILURE_UNLOCK_TIMEOUT = 'unlock_timeout'  # trang ví không tải được màn hình nào
+FAILURE_HAHA_API = 'haha_api'  # claim karma không thành công
+FAILURE_RPC = 'rpc'  # không tải được số dư/ước tính phí hoặc không confirm được giao dịch
+FAILURE_INSUFFICIENT_FUNDS = 'insufficient_funds'  # lỗi riêng của từng ví, không đưa vào circuit breaker
+_checkin_lock = threading.Lock()
+
+def load_checkins() -> dict[str, str]:
+    try:
+        return json.loads(CHECKIN_PATH.read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return {}
+
+def save_checkin(profile_name: str):
+    with _checkin_lock:
+        data = load_checkins()
+        data[profile_name] = datetime.now(timezone.utc).date().isoformat()
+        CHECKIN_PATH.parent.mkdir(parents=True, exist_ok=True)
+        CHECKIN_PATH.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding='utf-8')
 
 class Setup:
     def __init__(self, node: Node, profile) -> None:
@@ -16,13 +47,16 @@ class Setup:
         
     def _run(self):
         self.node.new_tab(f'{PROJECT_URL}/home.html', method="get")
-        Utility.wait_time(10)
+        Utility.wait_time(10, kind='settle')
 
 class Auto:
     def __init__(self, node: Node, profile: dict) -> None:
         self.driver = node._driver
         self.node = node
+        self.profile = profile
         self.profile_name = profile.get('profile_name')
+        self.last_tx_hash = None
+        self.last_failure = None
         self.pin = profile.get('pin')
         self.wallet = profile.get('wallet')
         self.recieve_addresses = profile.get('recieve_addresses')
@@ -49,6 +83,8 @@ class Auto:
                 self.node.log(f'Đã đăng nhập')
                 return True
 
+        self.last_failure = FAILURE_UNLOCK_TIMEOUT
+
     def check_in(self):
         div_els = self.node.find_all(By.TAG_NAME, 'div')
         check_in = None
@@ -63,6 +99,8 @@ class Auto:
             for btn in btns:
                 if 'Claim'.lower() in btn.text.lower():
                     claim = btn
+                    if self.node.rate_limiter:
+                        self.node.rate_limiter.acquire('claim')
                     self.node.click(claim)
                     break
             
@@ -70,6 +108,9 @@ class Auto:
             for div in div_els:
                 if 'Come back tomorrow after midnight UTC for more karma'.lower() in div.text.lower():
                     return True
+            if self.node.rate_limiter:
+                self.node.rate_limiter.record_error('claim')
+            self.last_failure = FAILURE_HAHA_API
             
         return False
 
@@ -89,7 +130,36 @@ class Auto:
 
         return False
 
+    def _tx_links(self) -> set[str]:
+        '''
+        Các tx hash trong link explorer (`<a href=".../tx/0x...">`) đang hiển thị.
+        '''
+        hashes = set()
+        try:
+            for link in self.driver.find_elements(By.CSS_SELECTOR, 'a[href*="/tx/0x"]'):
+                match = re.search(r'/tx/(0x[0-9a-fA-F]{64})', link.get_attribute('href') or '')
+                if match:
+                    hashes.add(match.group(1).lower())
+        except Exception:
+            pass
+        return hashes
+
+    def _find_tx_hash(self, known: set[str]) -> str|None:
+        '''
+        Tx hash của giao dịch vừa gửi: link explorer mới xuất hiện sau khi bấm Confirm (khác `known` trước đó).
+        Không xác định được đúng một link mới thì trả về None, TxTracker theo dõi bằng nonce.
+        '''
+        for _ in range(5):
+            new_hashes = self._tx_links() - known
+            if len(new_hashes) == 1:
+                return new_hashes.pop()
+            if new_hashes:
+                return None
+            Utility.wait_time(1, True, 'poll')
+        return None
+
     def send_eth(self):
+        self.last_failure = FAILURE_RPC
         for attempt in range(2):
             self.node.go_to(f'{PROJECT_URL}/home.html', 'get')
             self.node.find(By.XPATH,'//html[contains(@class, "haha-loaded")]')
@@ -109,8 +179,9 @@ class Auto:
                     value_eth = float(value_eth)
                 except Exception as e:
                     value_eth = None
-            if value_eth and value_eth < 0.005:
-                self.node.snapshot(f'Không đủ Eth để thực hiện tx (min 0.005)', False)
+            if value_eth and value_eth < MIN_ETH_BALANCE:
+                self.last_failure = FAILURE_INSUFFICIENT_FUNDS
+                self.node.snapshot(f'Không đủ Eth để thực hiện tx (min {MIN_ETH_BALANCE})', False)
                 return False
 
             self.node.click(btn_eth)
@@ -130,39 +201,151 @@ class Auto:
             self.node.find_and_input(By.TAG_NAME, 'input', value_str)
             if not self.node.find_and_click(By.XPATH, '//button[not(@disabled) and contains(text(), "Next")]'):
                 if self.node.find(By.XPATH, '//p[contains(text(),"Insufficient funds")]'):
+                    self.last_failure = FAILURE_INSUFFICIENT_FUNDS
                     self.node.snapshot(f'Không đủ Insufficient funds', False)
                 return False
 
+            if self.node.rate_limiter:
+                self.node.rate_limiter.acquire('send')
+            known_hashes = self._tx_links()
             if self.node.find_and_click(By.XPATH, '//button[not(@disabled) and contains(text(), "Confirm")]'):
+                self.last_tx_hash = self._find_tx_hash(known_hashes)
+                self.last_failure = None
                 return True
             else:
+                if self.node.rate_limiter:
+                    self.node.rate_limiter.record_error('send')
                 self.node.log(f'Thử lại lần 2')
 
     def _run(self):
         completed = []
+        breaker = self.node.breaker
+        if breaker and not breaker.allow(FAILURE_UNLOCK_TIMEOUT):
+            self.node.snapshot(f'Bỏ qua: trang ví đang lỗi ở nhiều profile (circuit breaker mở)', False)
+            return
         self.node.new_tab(f'{PROJECT_URL}/home.html', method="get")
         self.node.find(By.TAG_NAME, 'title')
-        if not self.unlock():
+        self.last_failure = None
+        unlocked = self.unlock()
+        METRICS.inc('airdrop_task_total', task='unlock', result='ok' if unlocked else 'failed')
+        if not unlocked:
+            if breaker and self.last_failure:
+                breaker.record_failure(self.last_failure, self.profile_name)
             self.node.snapshot(f'Unlock wallet không thành công')
+        if breaker:
+            breaker.record_success(FAILURE_UNLOCK_TIMEOUT)
 
-        if self.check_in():
-            completed.append('checked-in')
+        if breaker and not breaker.allow(FAILURE_HAHA_API):
+            self.node.log('Bỏ qua check-in: HaHa API đang lỗi ở nhiều profile (circuit breaker mở)')
+        else:
+            self.last_failure = None
+            checked_in = self.check_in()
+            METRICS.inc('airdrop_task_total', task='check_in', result='ok' if checked_in else 'failed')
+            if checked_in:
+                completed.append('checked-in')
+                save_checkin(self.profile_name)
+                if breaker:
+                    breaker.record_success(FAILURE_HAHA_API)
+            elif breaker and self.last_failure:
+                breaker.record_failure(self.last_failure, self.profile_name)
 
         times = 0
-        while times < 10:
-            if self.send_eth():
+        if self.profile.get('skip_sends'):
+            self.node.log(f"Bỏ qua send ETH: số dư {self.profile.get('balance_eth', 0):.5f} ETH < {MIN_ETH_BALANCE} (pre-flight)")
+        tracker = self.node.tx_tracker
+        while times < 10 and not self.profile.get('skip_sends'):
+            if breaker and not breaker.allow(FAILURE_RPC):
+                self.node.log('Bỏ qua send ETH: RPC đang lỗi ở nhiều profile (circuit breaker mở)')
+                break
+            # Tạm dừng khi ví còn quá nhiều giao dịch chưa xác nhận
+            if tracker and not tracker.wait_for_capacity(self.profile_name):
+                self.node.log(f'Còn {tracker.pending(self.profile_name)} giao dịch chưa xác nhận, dừng send ETH')
+                break
+            sent = self.send_eth()
+            METRICS.inc('airdrop_task_total', task='send_eth', result='ok' if sent else 'failed')
+            if sent:
                 times += 1
+                if breaker:
+                    breaker.record_success(FAILURE_RPC)
+                if tracker:
+                    tracker.record_send(self.profile_name, self.wallet, self.last_tx_hash)
             else:
+                # Hết tiền chỉ là lỗi của ví này, không được chặn send ETH của các profile khác
+                if breaker and self.last_failure == FAILURE_RPC:
+                    breaker.record_failure(self.last_failure, self.profile_name)
                 break
         completed.append(f'Send_ETH: {times}')
 
-        self.node.snapshot(f'Hoàn thành: {completed} ')
+        self.node.snapshot(f'Hoàn thành: {completed} ', False)
+
+class Preflight:
+    '''
+    Kiểm tra trước khi mở trình duyệt (chế độ auto): lấy số dư ETH và nonce của mọi ví trong một request batch.
+
+    - Ví không đủ `MIN_ETH_BALANCE` được đánh dấu `skip_sends`, `Auto` bỏ qua bước send ETH.
+      Kết quả chỉ ghi vào bản sao của profile cho lần chạy này, không ghi vào danh sách profile dùng chung của menu.
+    - Profile bị bỏ qua hẳn nếu không cần send và hôm nay (UTC) đã check-in.
+    - Lỗi RPC thì chạy tất cả profile như bình thường.
+    '''
+    def __init__(self, manager: BrowserManager) -> None:
+        self.manager = manager
+
+    def run(self, profiles: list[dict]) -> list[dict]:
+        tracker = self.manager.tx_tracker
+        rpc = tracker.rpc if tracker else EthRpc(self.manager.rpc_cache.url if self.manager.rpc_cache else None)
+        wallets = [profile.get('wallet') for profile in profiles if re.fullmatch(r'0x[0-9a-fA-F]{40}', profile.get('wallet') or '')]
+        if not wallets:
+            return profiles
+        try:
+            # Số dư và nonce trong cùng một request batch, nonce dùng làm mốc theo dõi giao dịch
+            accounts = rpc.get_accounts(wallets)
+        except Exception as e:
+            Utility.logger(message=f'⚠️ Pre-flight: không lấy được số dư từ {rpc.url}, chạy tất cả profile: {e}')
+            return profiles
+
+        today = datetime.now(timezone.utc).date().isoformat()
+        checkins = load_checkins()
+        runnable = []
+        for profile in profiles:
+            profile_name = profile['profile_name']
+            account = accounts.get(profile.get('wallet'), {})
+            if tracker and account.get('nonce') is not None:
+                tracker.register(profile_name, profile['wallet'], account['nonce'])
+            if account.get('balance') is None:
+                runnable.append(profile)
+                continue
+            balance_eth = account['balance'] / WEI_PER_ETH
+            profile = {**profile, 'balance_eth': balance_eth, 'skip_sends': balance_eth < MIN_ETH_BALANCE}
+            self.manager.report.update(profile_name, balance_eth=round(profile['balance_eth'], 6), skip_sends=profile['skip_sends'])
+            if profile['skip_sends'] and checkins.get(profile_name) == today:
+                Utility.logger(profile_name, f"Pre-flight: bỏ qua profile (số dư {profile['balance_eth']:.5f} ETH, đã check-in hôm nay)")
+                self.manager.report.update(profile_name, skipped='preflight')
+                continue
+            if profile['skip_sends']:
+                Utility.logger(profile_name, f"Pre-flight: số dư {profile['balance_eth']:.5f} ETH < {MIN_ETH_BALANCE}, bỏ qua send ETH")
+            runnable.append(profile)
+        return runnable
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument('--auto', action='store_true', help="Chạy ở chế độ tự động")
     parser.add_argument('--headless', action='store_true', help="Chạy trình duyệt ẩn")
     parser.add_argument('--disable-gpu', action='store_true', help="Tắt GPU")
+    parser.add_argument('--keep-browser', action='store_true', help="Giữ trình duyệt mở, lần sau gắn lại thay vì mở mới")
+    parser.add_argument('--shared-browser', type=int, default=0, metavar='N', help="Gom tối đa N profile chạy chung một trình duyệt")
+    parser.add_argument('--verbose', action='store_true', help="In mọi dòng log khi chạy auto (mặc định chỉ in khi profile lỗi)")
+    parser.add_argument('--trace', action='store_true', help="Ghi trace từng thao tác (mở bằng Perfetto/chrome://tracing)")
+    parser.add_argument('--metrics', type=int, nargs='?', const=9464, default=0, metavar='PORT', help="Mở endpoint Prometheus http://127.0.0.1:PORT/metrics (mặc định 9464)")
+    parser.add_argument('--progress', action='store_true', help="In bảng tiến độ khi chạy auto (profile/giờ, tỉ lệ thành công)")
+    parser.add_argument('--profiler', action='store_true', help="Lấy mẫu stack của tool, xuất flamegraph và top hàm tốn CPU")
+    parser.add_argument('--perf', action='store_true', help="Đo hiệu năng của trang ví (tải trang, fetch, long task) ở mỗi bước")
+    parser.add_argument('--pacing', choices=['human', 'fast'], default='human', help="Chính sách chờ: human (dao động như người dùng), fast (bỏ các lần chờ giả lập người dùng)")
+    parser.add_argument('--record-commands', action='store_true', help="Ghi chuỗi lệnh WebDriver của mỗi profile để phát lại/so sánh (command_trace.py)")
+    parser.add_argument('--keep-extension-alive', action='store_true', help="Giữ service worker của ví không bị Chrome tắt khi rảnh")
+    parser.add_argument('--ram-profile', action='store_true', help="Chạy profile từ RAM, chỉ ghi ngược dữ liệu cần giữ")
+    parser.add_argument('--rpc-cache', action='store_true', help="Chạy cache cục bộ cho JSON-RPC (theo dõi giao dịch, pre-flight)")
+    parser.add_argument('--network-stats', action='store_true', help="Thống kê lưu lượng và số request bị chặn theo profile/proxy (performance log)")
+    parser.add_argument('--block', nargs='+', default=[], choices=list(BLOCK_PRESETS), metavar='PRESET', help=f"Chặn request theo bộ rule: {', '.join(BLOCK_PRESETS)}")
     args = parser.parse_args()
 
     profiles = Utility.read_data('profile_name', 'pin', 'wallet')
@@ -172,7 +355,7 @@ if __name__ == '__main__':
         print("Không có dữ liệu để chạy")
         exit()
 
-    browser_manager = BrowserManager(AutoHandlerClass=Auto, SetupHandlerClass=Setup)
+    browser_manager = BrowserManager(AutoHandlerClass=Auto, SetupHandlerClass=Setup, PreflightHandlerClass=Preflight)
     browser_manager.config_extension('HaHa-Wallet-Chrome-Web-Store.crx')
     browser_manager.run_terminal(
         profiles=profiles,
@@ -181,4 +364,19 @@ if __name__ == '__main__':
         auto=args.auto,
         headless=args.headless,
         disable_gpu=args.disable_gpu,
+        keep_browser=args.keep_browser,
+        shared_group_size=args.shared_browser,
+        ram_profile=args.ram_profile,
+        block=args.block,
+        rpc_cache=args.rpc_cache,
+        extension_keepalive=args.keep_extension_alive,
+        verbose_log=args.verbose,
+        trace=args.trace,
+        metrics_port=args.metrics,
+        progress=args.progress,
+        profiler=args.profiler,
+        perf_capture=args.perf,
+        record_commands=args.record_commands,
+        pacing=args.pacing,
+        network_stats=args.network_stats,
     )
\ No newline at end of file
@@ -0,0 +1,623 @@
+import functools
+import inspect
+import json
+import sys
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+REPORT_DIR = Path(__file__).parent / 'report'
+
+class _NullSpan:
+    '''Span rỗng trả về khi tắt tracing, không ghi gì.'''
+    outcome = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+NULL_SPAN = _NullSpan()
+
+class Span:
+    __slots__ = ('tracer', 'name', 'category', 'profile', 'args', 'start', 'sleep', 'outcome')
+
+    def __init__(self, tracer: 'Tracer', name: str, category: str, profile: str, args: dict) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.profile = profile
+        self.args = args
+        self.sleep = 0.0
+        self.outcome = None
+
+    def __enter__(self):
+        self.tracer._stack().append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        stack = self.tracer._stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+        outcome = exc_type.__name__ if exc_type else (self.outcome or 'ok')
+        self.tracer._record(self, end, outcome)
+        return False
+
+class Tracer:
+    '''
+    Ghi span (thời điểm bắt đầu, thời lượng, profile, kết quả, thời gian ngủ bên trong) của từng thao tác
+    và xuất ra định dạng Chrome trace-event JSON, mở bằng Perfetto (ui.perfetto.dev) hoặc chrome://tracing.
+
+    - Mỗi profile là một track riêng (tid), span lồng nhau theo đúng thứ tự gọi trong luồng của profile.
+    - Span không truyền profile sẽ lấy profile của span cha trong cùng luồng (ví dụ lệnh gửi Telegram trong `snapshot`).
+    - Khi tắt (mặc định), `span()` trả về `NULL_SPAN` và `@traced` chỉ kiểm tra `enabled` của TRACER và METRICS
+      nên gần như không tốn chi phí.
+    '''
+    def __init__(self) -> None:
+        self.enabled = False
+        self._events: list[dict] = []
+        self._tids: dict[str, int] = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._origin = 0.0
+
+    def start(self):
+        self._events = []
+        self._tids = {}
+        self._origin = time.perf_counter()
+        self.enabled = True
+
+    def stop(self):
+        self.enabled = False
+
+    def _stack(self) -> list[Span]:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def span(self, name: str, category: str = 'node', profile: str|None = None, **args):
+        '''
+        Dùng với `with`: `with TRACER.span('launch', 'manager', profile_name): ...`.
+        Gán `span.outcome` (ví dụ 'fail') để ghi kết quả khác 'ok' mà không cần ném lỗi.
+        '''
+        if not self.enabled:
+            return NULL_SPAN
+        if profile is None:
+            stack = self._stack()
+            profile = stack[-1].profile if stack else threading.current_thread().name
+        return Span(self, name, category, profile, args)
+
+    def annotate(self, **args):
+        '''Thêm args vào span trong cùng đang mở của luồng hiện tại (ví dụ số liệu Performance API của trang).'''
+        if self.enabled:
+            stack = self._stack()
+            if stack:
+                stack[-1].args.update(args)
+
+    def add_sleep(self, seconds: float):
+        '''Cộng thời gian ngủ vào mọi span đang mở trong luồng hiện tại.'''
+        if self.enabled:
+            for span in self._stack():
+                span.sleep += seconds
+
+    def _record(self, span: Span, end: float, outcome: str):
+        with self._lock:
+            tid = self._tids.setdefault(span.profile, len(self._tids) + 1)
+        self._events.append({
+            'name': span.name,
+            'cat': span.category,
+            'ph': 'X',
+            'ts': round((span.start - self._origin) * 1e6),
+            'dur': round((end - span.start) * 1e6),
+            'pid': 1,
+            'tid': tid,
+            'args': {'profile': span.profile, 'outcome': outcome, 'sleep_ms': round(span.sleep * 1000), **span.args},
+        })
+
+    def save(self, name: str = 'run') -> Path|None:
+        '''
+        Ghi trace ra `report/trace_<name>_<thời gian>.json`.
+
+        Returns:
+            Path | None: đường dẫn file, None nếu chưa có span nào.
+        '''
+        if not self._events:
+            return None
+        with self._lock:
+            metadata = [
+                {'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': tid, 'args': {'name': profile}}
+                for profile, tid in self._tids.items()
+            ]
+        REPORT_DIR.mkdir(parents=True, exist_ok=True)
+        file_path = REPORT_DIR / f"trace_{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': metadata + list(self._events), 'displayTimeUnit': 'ms'}, f, ensure_ascii=False, default=str)
+        return file_path
+
+TRACER = Tracer()
+
+def _span_args(args: tuple) -> dict:
+    # Chỉ ghi 2 tham số chuỗi đầu tiên (by/selector, url), không ghi nội dung nhập như mật khẩu/pin
+    values = [arg for arg in args[1:3] if isinstance(arg, str)]
+    return {'target': ' '.join(values)[:120]} if values else {}
+
+def traced(name: str|None = None, category: str = 'node'):
+    '''
+    Decorator ghi span cho một hàm/phương thức. Profile lấy từ `self.profile_name` nếu có.
+    Hàm trả về False được ghi kết quả 'fail'. Khi bật METRICS, thời gian chạy được ghi vào histogram
+    `airdrop_call_seconds` theo thao tác và selector/url.
+    '''
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not TRACER.enabled and not METRICS.enabled:
+                return func(*args, **kwargs)
+            profile = getattr(args[0], 'profile_name', None) if args else None
+            span_args = _span_args(args)
+            start = time.perf_counter()
+            outcome = 'error'
+            try:
+                with TRACER.span(span_name, category, profile, **span_args) as span:
+                    result = func(*args, **kwargs)
+                    outcome = 'fail' if result is False else 'ok'
+                    if result is False:
+                        span.outcome = 'fail'
+                    return result
+            finally:
+                METRICS.observe('airdrop_call_seconds', time.perf_counter() - start, category=category,
+                                action=span_name, target=span_args.get('target', ''), outcome=outcome)
+        return wrapper
+    return decorator
+
+def trace_methods(category: str, exclude: tuple[str, ...] = ()):
+    '''
+    Decorator cho class: ghi span cho mọi phương thức public (không bắt đầu bằng `_`) trừ `exclude`.
+    '''
+    def decorator(cls):
+        for attr, value in list(vars(cls).items()):
+            if attr.startswith('_') or attr in exclude or not inspect.isfunction(value):
+                continue
+            setattr(cls, attr, traced(attr, category)(value))
+        return cls
+    return decorator
+
+# Ngưỡng (giây) của histogram thời gian
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+class Metrics:
+    '''
+    Registry metric trong tiến trình (counter, gauge, histogram có label), xuất dạng Prometheus text
+    qua `start_server()` (`GET /metrics`).
+
+    - Khi tắt (mặc định), các hàm ghi trả về ngay sau một lần kiểm tra `enabled`.
+    - Tên metric nên có tiền tố `airdrop_`, label giữ ít giá trị (tên thao tác, selector, kết quả).
+    '''
+    def __init__(self) -> None:
+        self.enabled = False
+        self._types: dict[str, tuple[str, str]] = {}  # tên -> (loại, mô tả)
+        self._values: dict[tuple, float] = {}  # (tên, labels) -> giá trị counter/gauge
+        self._histograms: dict[tuple, list] = {}  # (tên, labels) -> [số lượng theo bucket..., tổng, số lần]
+        self._lock = threading.Lock()
+        self._server = None
+
+    def start(self):
+        self.enabled = True
+
+    def describe(self, name: str, kind: str, help_text: str):
+        self._types[name] = (kind, help_text)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        '''Tăng counter (hoặc cộng/trừ gauge).'''
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        '''Gán giá trị gauge.'''
+        if not self.enabled:
+            return
+        with self._lock:
+            self._values[(name, tuple(sorted(labels.items())))] = value
+
+    def observe(self, name: str, value: float, **labels):
+        '''Ghi một giá trị vào histogram.'''
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [0] * len(DEFAULT_BUCKETS) + [0.0, 0]
+            for index, bound in enumerate(DEFAULT_BUCKETS):
+                if value <= bound:
+                    histogram[index] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def reset(self, *names: str):
+        '''Xóa mọi series của các metric `names` (số liệu theo lần chạy), Prometheus coi là counter reset.'''
+        with self._lock:
+            for store in (self._values, self._histograms):
+                for key in [key for key in store if key[0] in names]:
+                    del store[key]
+
+    def get(self, name: str, **labels) -> float:
+        '''Tổng giá trị counter/gauge `name` của các series khớp `labels`.'''
+        items = labels.items()
+        with self._lock:
+            return sum(value for (metric, series), value in self._values.items()
+                       if metric == name and all(item in series for item in items))
+
+    def get_histogram(self, name: str, **labels) -> tuple[int, float]:
+        '''Returns: (số lần, tổng) của histogram `name` với các series khớp `labels`.'''
+        items = labels.items()
+        count, total = 0, 0.0
+        with self._lock:
+            for (metric, series), histogram in self._histograms.items():
+                if metric == name and all(item in series for item in items):
+                    count += histogram[-1]
+                    total += histogram[-2]
+        return count, total
+
+    @staticmethod
+    def _format_labels(series: tuple, extra: tuple = ()) -> str:
+        pairs = list(series) + list(extra)
+        if not pairs:
+            return ''
+        escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ') for _, value in pairs)
+        return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + '}'
+
+    def render(self) -> str:
+        '''Xuất toàn bộ metric theo định dạng Prometheus text (version 0.0.4).'''
+        with self._lock:
+            values = sorted(self._values.items())
+            histograms = sorted((key, list(value)) for key, value in self._histograms.items())
+        lines = []
+        described = set()
+
+        def header(name: str, default_kind: str):
+            if name not in described:
+                described.add(name)
+                kind, help_text = self._types.get(name, (default_kind, ''))
+                if help_text:
+                    lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} {kind}')
+
+        for (name, series), value in values:
+            header(name, 'gauge')
+            lines.append(f'{name}{self._format_labels(series)} {value:.15g}')
+        for (name, series), histogram in histograms:
+            header(name, 'histogram')
+            # observe() đã cộng dồn vào mọi bucket có ngưỡng >= giá trị
+            for bound, count in zip(DEFAULT_BUCKETS, histogram):
+                lines.append(f'{name}_bucket{self._format_labels(series, (("le", f"{bound:g}"),))} {count}')
+            lines.append(f'{name}_bucket{self._format_labels(series, (("le", "+Inf"),))} {histogram[-1]}')
+            lines.append(f'{name}_sum{self._format_labels(series)} {histogram[-2]:.6f}')
+            lines.append(f'{name}_count{self._format_labels(series)} {histogram[-1]}')
+        return '\n'.join(lines) + '\n'
+
+    def start_server(self, port: int) -> bool:
+        '''
+        Mở endpoint `http://127.0.0.1:<port>/metrics` trong một luồng nền.
+
+        Returns:
+            bool: False nếu không mở được cổng.
+        '''
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                body = metrics.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        except OSError:
+            return False
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True, name='metrics-server').start()
+        self.start()
+        return True
+
+    def stop_server(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+METRICS = Metrics()
+METRICS.describe('airdrop_profiles', 'gauge', 'Số profile của lần chạy hiện tại')
+METRICS.describe('airdrop_profiles_completed_total', 'counter', 'Số profile đã chạy xong theo kết quả')
+METRICS.describe('airdrop_active_slots', 'gauge', 'Số profile đang chạy')
+METRICS.describe('airdrop_queue_depth', 'gauge', 'Số profile đang chờ chạy')
+METRICS.describe('airdrop_run_started_seconds', 'gauge', 'Thời điểm bắt đầu lần chạy (unix)')
+METRICS.describe('airdrop_launch_seconds', 'histogram', 'Thời gian mở trình duyệt của profile')
+METRICS.describe('airdrop_task_total', 'counter', 'Số lần chạy tác vụ theo kết quả')
+METRICS.describe('airdrop_call_seconds', 'histogram', 'Thời gian thao tác Node (theo selector) và lệnh gọi Telegram/AI')
+# Metric tính theo lần chạy auto, được xóa khi bắt đầu lần chạy mới (`run_multi`)
+RUN_METRICS = ('airdrop_profiles_completed_total', 'airdrop_task_total', 'airdrop_launch_seconds')
+
+class ProgressView:
+    '''
+    In bảng tiến độ của lần chạy auto ra terminal mỗi `interval` giây, đọc từ `METRICS`.
+    '''
+    def __init__(self, metrics: Metrics, interval: float = 30) -> None:
+        self.metrics = metrics
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread|None = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True, name='progress-view')
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            print(self.render())
+
+    def render(self) -> str:
+        metrics = self.metrics
+        total = int(metrics.get('airdrop_profiles'))
+        ok = int(metrics.get('airdrop_profiles_completed_total', result='ok'))
+        failed = int(metrics.get('airdrop_profiles_completed_total', result='failed'))
+        started = metrics.get('airdrop_run_started_seconds')
+        hours = (time.time() - started) / 3600 if started else 0
+        per_hour = (ok + failed) / hours if hours else 0
+        launches, launch_total = metrics.get_histogram('airdrop_launch_seconds')
+        lines = [
+            f"📊 Tiến độ: {ok + failed}/{total} xong ({ok} ✅, {failed} ❌) | "
+            f"đang chạy {int(metrics.get('airdrop_active_slots'))} | chờ {int(metrics.get('airdrop_queue_depth'))} | "
+            f"{per_hour:.1f} profile/giờ | mở trình duyệt TB {launch_total / launches if launches else 0:.1f}s"
+        ]
+        with metrics._lock:
+            tasks = sorted({dict(series)['task'] for (name, series) in metrics._values if name == 'airdrop_task_total'})
+        for task in tasks:
+            task_ok = int(metrics.get('airdrop_task_total', task=task, result='ok'))
+            task_all = int(metrics.get('airdrop_task_total', task=task))
+            lines.append(f'   {task:<12} {task_ok}/{task_all} thành công ({task_ok / task_all:.0%})')
+        return '\n'.join(lines)
+
+class SamplingProfiler:
+    '''
+    Profiler lấy mẫu cho tiến trình tool (luồng chính, luồng của từng profile, luồng nền), không cần công cụ ngoài.
+
+    - Cứ `interval` giây đọc stack của mọi luồng bằng `sys._current_frames()`, mẫu được gắn tên profile
+      của luồng (`tag_thread()`), luồng không gắn dùng tên luồng (MainThread, log-writer, tx-tracker...).
+    - Có `psutil`: mỗi mẫu được tính bằng thời gian CPU (ms) luồng đã dùng kể từ lần lấy mẫu trước,
+      luồng đang ngủ/chờ mạng không được tính. Không có `psutil`: đếm số mẫu (wall-clock).
+    - `save()` ghi file collapsed stack (`profile;module:hàm;... số`) để vẽ flamegraph
+      (flamegraph.pl, speedscope.app) và trả về top hàm theo self time.
+    '''
+    def __init__(self, interval: float = 0.01) -> None:
+        self.interval = interval
+        self.enabled = False
+        self.unit = 'samples'
+        self._tags: dict[int, str] = {}  # thread ident -> profile
+        self._stacks: dict[tuple, float] = {}  # (tag, (code, ...)) -> trọng số
+        self._cpu: dict[int, float] = {}  # native id -> thời gian CPU lần lấy mẫu trước
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread|None = None
+
+    def tag_thread(self, profile_name: str):
+        '''Gắn tên profile cho các mẫu của luồng hiện tại.'''
+        self._tags[threading.get_ident()] = profile_name
+
+    def untag_thread(self):
+        self._tags.pop(threading.get_ident(), None)
+
+    def start(self):
+        with self._lock:
+            self._stacks = {}
+        self._cpu = {}
+        self.enabled = True
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True, name='sampling-profiler')
+        self._thread.start()
+
+    def stop(self):
+        self.enabled = False
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _loop(self):
+        try:
+            import psutil
+            process = psutil.Process()
+            self.unit = 'cpu_ms'
+        except Exception:
+            process = None
+            self.unit = 'samples'
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            cpu = None
+            if process:
+                try:
+                    cpu = {thread.id: thread.user_time + thread.system_time for thread in process.threads()}
+                except Exception:
+                    cpu = None
+            threads = {thread.ident: thread for thread in threading.enumerate()}
+            samples = []
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                thread = threads.get(ident)
+                weight = 1
+                if cpu is not None:
+                    native_id = getattr(thread, 'native_id', None)
+                    used = cpu.get(native_id)
+                    if used is None:
+                        continue
+                    previous = self._cpu.get(native_id, used)
+                    self._cpu[native_id] = used
+                    weight = (used - previous) * 1000
+                    if weight <= 0:
+                        continue
+                codes = []
+                while frame is not None:
+                    codes.append(frame.f_code)
+                    frame = frame.f_back
+                tag = self._tags.get(ident) or (thread.name if thread else str(ident))
+                samples.append(((tag, tuple(reversed(codes))), weight))
+            # Không giữ frame của luồng khác đến lần lấy mẫu sau
+            frame = None
+            with self._lock:
+                for key, weight in samples:
+                    self._stacks[key] = self._stacks.get(key, 0) + weight
+
+    @staticmethod
+    def _frame_name(code) -> str:
+        return f'{Path(code.co_filename).stem}:{code.co_name}'
+
+    def save(self, name: str = 'run', top: int = 15) -> tuple[Path|None, dict]:
+        '''
+        Ghi `report/profile_<name>_<thời gian>.collapsed` và tính top `top` hàm theo self time.
+
+        Returns:
+            tuple: (đường dẫn file | None nếu chưa có mẫu, {'unit', 'total', 'threads', 'top'})
+        '''
+        with self._lock:
+            stacks = dict(self._stacks)
+        if not stacks:
+            return None, {}
+        collapsed: dict[str, float] = {}
+        self_time: dict[str, float] = {}
+        per_thread: dict[str, float] = {}
+        for (tag, codes), weight in stacks.items():
+            line = ';'.join([tag] + [self._frame_name(code) for code in codes])
+            collapsed[line] = collapsed.get(line, 0) + weight
+            if codes:
+                leaf = f'{codes[-1].co_name} ({Path(codes[-1].co_filename).name}:{codes[-1].co_firstlineno})'
+                self_time[leaf] = self_time.get(leaf, 0) + weight
+            per_thread[tag] = per_thread.get(tag, 0) + weight
+
+        REPORT_DIR.mkdir(parents=True, exist_ok=True)
+        file_path = REPORT_DIR / f"profile_{name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.collapsed"
+        with open(file_path, 'w', encoding='utf-8') as f:
+            for line, weight in sorted(collapsed.items()):
+                f.write(f'{line} {max(round(weight), 1)}\n')
+
+        total = sum(per_thread.values())
+        summary = {
+            'unit': self.unit,
+            'total': round(total),
+            'threads': {tag: round(weight) for tag, weight in sorted(per_thread.items(), key=lambda item: -item[1])[:top]},
+            'top': [
+                {'function': function, 'self': round(weight), 'percent': round(weight * 100 / total, 1)}
+                for function, weight in sorted(self_time.items(), key=lambda item: -item[1])[:top]
+            ],
+        }
+        return file_path, summary
+
+PROFILER = SamplingProfiler()
+
+# Đọc Performance API của trang trong một lần execute_script: navigation/paint (một lần cho mỗi document),
+# resource timing và long task phát sinh từ lần đọc trước (đọc xong thì xóa)
+PERF_CAPTURE_SCRIPT = '''
+const state = window.__airdropPerf || (window.__airdropPerf = {reported: false, longTasks: [], observer: null, resourceOffset: 0});
+if (state.observer === null) {
+    try {
+        state.observer = new PerformanceObserver(list => {
+            for (const entry of list.getEntries()) state.longTasks.push(entry.duration);
+        });
+        state.observer.observe({type: 'longtask', buffered: true});
+        performance.setResourceTimingBufferSize(5000);
+    } catch (e) {
+        state.observer = false;
+    }
+}
+const round = value => Math.round(value);
+const result = {url: location.href, navigation: null, paint: null};
+if (!state.reported) {
+    const nav = performance.getEntriesByType('navigation')[0];
+    if (nav && nav.loadEventEnd > 0) {
+        state.reported = true;
+        result.navigation = {
+            ttfb: round(nav.responseStart - nav.startTime),
+            dom_content_loaded: round(nav.domContentLoadedEventEnd - nav.startTime),
+            load: round(nav.loadEventEnd - nav.startTime),
+        };
+        result.paint = {};
+        for (const entry of performance.getEntriesByType('paint')) {
+            result.paint[entry.name === 'first-contentful-paint' ? 'fcp' : 'fp'] = round(entry.startTime);
+        }
+    }
+}
+// Không xóa resource timing của trang, chỉ đọc phần phát sinh sau lần đọc trước
+const allResources = performance.getEntriesByType('resource');
+if (allResources.length < state.resourceOffset) state.resourceOffset = 0;
+const resources = allResources.slice(state.resourceOffset);
+state.resourceOffset = allResources.length;
+const fetches = resources.filter(entry => entry.initiatorType === 'fetch' || entry.initiatorType === 'xmlhttprequest');
+result.resources = {
+    count: resources.length,
+    transfer_kb: round(resources.reduce((total, entry) => total + (entry.transferSize || 0), 0) / 1024),
+    fetch_count: fetches.length,
+    fetch_ms_max: round(Math.max(0, ...fetches.map(entry => entry.duration))),
+    slowest: resources.sort((a, b) => b.duration - a.duration).slice(0, 3)
+        .map(entry => ({name: entry.name.slice(0, 120), ms: round(entry.duration)})),
+};
+const longTasks = state.longTasks.splice(0);
+result.long_tasks = {
+    count: longTasks.length,
+    total_ms: round(longTasks.reduce((total, duration) => total + duration, 0)),
+    max_ms: round(Math.max(0, ...longTasks)),
+};
+return result;
+'''
+
+def summarize_performance(captures: list[dict]) -> dict:
+    '''
+    Gộp các lần đọc `PERF_CAPTURE_SCRIPT` của một profile.
+
+    Returns:
+        dict: {'perf_pages', 'perf_load_ms_avg', 'perf_fcp_ms_avg', 'perf_fetches', 'perf_fetch_ms_max',
+               'perf_long_tasks', 'perf_long_task_ms', 'perf_capture_ms', 'perf_steps'}, rỗng nếu chưa đọc lần nào.
+    '''
+    if not captures:
+        return {}
+    loads = [capture['navigation']['load'] for capture in captures if capture.get('navigation')]
+    fcps = [capture['paint']['fcp'] for capture in captures if capture.get('paint') and 'fcp' in capture['paint']]
+    return {
+        'perf_pages': len(loads),
+        'perf_load_ms_avg': round(sum(loads) / len(loads)) if loads else None,
+        'perf_fcp_ms_avg': round(sum(fcps) / len(fcps)) if fcps else None,
+        'perf_fetches': sum(capture['resources']['fetch_count'] for capture in captures),
+        'perf_fetch_ms_max': max(capture['resources']['fetch_ms_max'] for capture in captures),
+        'perf_long_tasks': sum(capture['long_tasks']['count'] for capture in captures),
+        'perf_long_task_ms': sum(capture['long_tasks']['total_ms'] for capture in captures),
+        'perf_capture_ms': round(sum(capture['capture_ms'] for capture in captures)),
+        'perf_steps': captures,
+    }
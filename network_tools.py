@@ -0,0 +1,235 @@
+import json
+import time
+import threading
+from urllib.parse import urlsplit
+
+from selenium.webdriver.chrome.options import Options as ChromeOptions
+
+def _by_extension(*extensions: str) -> list[str]:
+    # Chỉ áp dụng cho http/https để không chặn tài nguyên của extension (chrome-extension://).
+    # Đuôi file phải ở cuối URL hoặc ngay trước query, tránh khớp nhầm `.png` nằm giữa tên miền/đường dẫn
+    return [pattern for extension in extensions for pattern in (f'http*://*{extension}', f'http*://*{extension}?*')]
+
+def _by_domain(*domains: str) -> list[str]:
+    # Khớp đúng tên miền (và tên miền con), không khớp khi tên miền chỉ nằm trong đường dẫn/query
+    return [pattern for domain in domains for pattern in (f'*://{domain}/*', f'*://*.{domain}/*')]
+
+# Loại tài nguyên (theo tên của CDP) -> mẫu URL tương ứng
+RESOURCE_TYPE_PATTERNS: dict[str, list[str]] = {
+    'Image': _by_extension('.png', '.jpg', '.jpeg', '.gif', '.webp', '.avif', '.ico', '.bmp'),
+    'Media': _by_extension('.mp4', '.webm', '.m3u8', '.mp3', '.ogg', '.wav', '.mov'),
+    'Font': _by_extension('.woff', '.ttf', '.otf', '.eot'),
+}
+
+# Bộ rule có sẵn: 'types' là loại tài nguyên, 'patterns' là mẫu URL (dấu * khớp chuỗi bất kỳ)
+BLOCK_PRESETS: dict[str, dict[str, list[str]]] = {
+    'media': {'types': ['Image', 'Media']},
+    'fonts': {'types': ['Font']},
+    'analytics': {'patterns': _by_domain(
+        'google-analytics.com', 'googletagmanager.com', 'doubleclick.net', 'googlesyndication.com',
+        'connect.facebook.net', 'hotjar.com', 'clarity.ms', 'cdn.segment.com',
+        'api.segment.io', 'mixpanel.com', 'amplitude.com', 'fullstory.com', 'mouseflow.com',
+    ) + ['*://*.facebook.com/tr?*', '*://*.facebook.com/tr/*']},
+    'widgets': {'patterns': _by_domain(
+        'widget.intercom.io', 'js.intercomcdn.com', 'client.crisp.chat', 'static.zdassets.com',
+        'embed.tawk.to', 'platform.twitter.com',
+    ) + ['*://*.youtube.com/embed/*', '*://*.youtube-nocookie.com/embed/*']},
+}
+
+# Dung lượng ước tính (byte) của một request bị chặn khi chưa có request cùng loại để lấy trung bình
+DEFAULT_SIZES: dict[str, int] = {
+    'Image': 30 * 1024,
+    'Media': 500 * 1024,
+    'Font': 40 * 1024,
+    'Script': 60 * 1024,
+    'Stylesheet': 20 * 1024,
+    'Other': 5 * 1024,
+}
+
+class NetworkMonitor:
+    '''
+    Chặn request theo rule qua CDP `Network.setBlockedURLs` và thống kê lưu lượng của một profile
+    (tổng byte, số request, theo tên miền và loại tài nguyên) từ performance log của chromedriver
+    (`Network.dataReceived`/`loadingFinished`).
+
+    - Rule được áp dụng cho từng tab (target) nên cần gọi `apply()` sau khi mở/chuyển tab,
+      `Node` tự gọi khi `new_tab()`/`switch_tab()`.
+    - Áp dụng giống nhau cho mọi profile (có proxy hay không, trình duyệt riêng hay dùng chung).
+    - Thống kê chỉ có khi `stats=True` và trình duyệt được mở với performance log (`configure_options()`,
+      cờ `--network-stats`), không có thì `collect()` bỏ qua.
+    - Performance log chỉ chứa sự kiện của các tab. `Node` gọi `drain()` ở ranh giới mỗi bước để đọc log
+      giữa chừng (buffer của chromedriver không bị tràn trong phiên dài); lưu lượng của service worker
+      extension được đưa vào qua `handle_worker_event()` (xem `ServiceWorkerKeepAlive`).
+    - Dung lượng tiết kiệm là ước tính: trung bình các request cùng loại đã tải trong lần chạy,
+      hoặc `DEFAULT_SIZES` nếu chưa có.
+    '''
+    TOP_DOMAINS = 5
+
+    def __init__(self, profile_name: str, presets: list[str]|None = None, patterns: list[str]|None = None,
+                 stats: bool = False, own_tabs_only: bool = False, drain_interval: float = 15) -> None:
+        self.profile_name = profile_name
+        self.blocked_urls = self.build_patterns(presets or [], patterns or [])
+        self.stats = stats
+        self.own_tabs_only = own_tabs_only  # shared browser: chỉ tính sự kiện của các tab thuộc profile
+        self.drain_interval = drain_interval
+        self._last_drain = time.monotonic()
+        self._applied: set[str] = set()
+        self.handles: set[str] = set()  # các tab của profile đã đi qua apply()
+        self._requests: dict[str, dict] = {}  # requestId -> {'type', 'domain', 'bytes'} của request đang tải
+        self._loaded: dict[str, list[int]] = {}  # loại tài nguyên -> [số request, tổng byte]
+        self._domains: dict[str, list[int]] = {}  # tên miền -> [số request, tổng byte]
+        self.blocked: dict[str, int] = {}  # loại tài nguyên -> số request bị chặn
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def build_patterns(presets: list[str], patterns: list[str]) -> list[str]:
+        '''
+        Gộp các bộ rule có sẵn và mẫu URL tự thêm thành danh sách cho `Network.setBlockedURLs`.
+        '''
+        result = []
+        for name in presets:
+            preset = BLOCK_PRESETS.get(name)
+            if preset is None:
+                raise ValueError(f'Không có bộ rule chặn "{name}", chọn trong: {", ".join(BLOCK_PRESETS)}')
+            for resource_type in preset.get('types', []):
+                result.extend(RESOURCE_TYPE_PATTERNS[resource_type])
+            result.extend(preset.get('patterns', []))
+        result.extend(patterns)
+        return list(dict.fromkeys(result))
+
+    @staticmethod
+    def configure_options(chrome_options: ChromeOptions):
+        '''
+        Bật performance log (chỉ sự kiện Network) để thống kê request.
+        '''
+        chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+        chrome_options.add_experimental_option('perfLoggingPrefs', {'enableNetwork': True, 'enablePage': False})
+
+    def apply(self, driver):
+        '''
+        Áp dụng rule chặn cho tab hiện tại (mỗi tab chỉ áp dụng 1 lần) và ghi nhận tab thuộc profile.
+        '''
+        try:
+            handle = driver.current_window_handle
+            self.handles.add(handle)
+            if not self.blocked_urls or handle in self._applied:
+                return
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': self.blocked_urls})
+            self._applied.add(handle)
+        except Exception:
+            # Tab đã đóng hoặc không hỗ trợ CDP
+            pass
+
+    def collect(self, driver):
+        '''
+        Đọc (và làm rỗng) performance log của driver, cập nhật thống kê.
+        Chế độ `own_tabs_only` chỉ tính sự kiện của các tab đã đi qua `apply()`.
+        '''
+        if not self.stats:
+            return
+        self._last_drain = time.monotonic()
+        try:
+            entries = driver.get_log('performance')
+        except Exception:
+            return
+        with self._lock:
+            for entry in entries:
+                try:
+                    message = json.loads(entry['message'])
+                except (KeyError, ValueError):
+                    continue
+                if self.own_tabs_only and message.get('webview') not in self.handles:
+                    continue
+                self._handle_event(message.get('message', {}))
+
+    def drain(self, driver):
+        '''
+        Gọi `collect()` nếu đã quá `drain_interval` giây từ lần đọc trước.
+        '''
+        if self.stats and time.monotonic() - self._last_drain >= self.drain_interval:
+            self.collect(driver)
+
+    def handle_worker_event(self, event: dict):
+        '''
+        Nhận sự kiện `Network.*` của service worker extension (CDP session riêng, không có trong performance log).
+        '''
+        if not self.stats:
+            return
+        with self._lock:
+            self._handle_event(event)
+
+    def _handle_event(self, event: dict):
+        method = event.get('method')
+        params = event.get('params', {})
+        request_id = params.get('requestId')
+        if method == 'Network.requestWillBeSent':
+            if request_id in self._requests and params.get('redirectResponse'):
+                # Redirect dùng lại requestId: tính request trước như một request riêng
+                previous = self._requests.pop(request_id)
+                self._finish(previous, previous['bytes'] + int(params['redirectResponse'].get('encodedDataLength', 0)))
+            url = params.get('request', {}).get('url', '')
+            if not url.startswith(('http://', 'https://')):
+                return
+            self._requests[request_id] = {
+                'type': params.get('type') or 'Other',
+                'domain': urlsplit(url).hostname or '',
+                'bytes': 0,
+            }
+        elif method == 'Network.responseReceived':
+            request = self._requests.get(request_id)
+            if request and params.get('type'):
+                request['type'] = params['type']
+        elif method == 'Network.dataReceived':
+            request = self._requests.get(request_id)
+            if request:
+                request['bytes'] += int(params.get('encodedDataLength', 0))
+        elif method == 'Network.loadingFinished':
+            request = self._requests.pop(request_id, None)
+            if request:
+                self._finish(request, int(params.get('encodedDataLength', 0)) or request['bytes'])
+        elif method == 'Network.loadingFailed':
+            request = self._requests.pop(request_id, None)
+            if params.get('blockedReason'):
+                resource_type = params.get('type') or (request or {}).get('type') or 'Other'
+                self.blocked[resource_type] = self.blocked.get(resource_type, 0) + 1
+            elif request:
+                # Tải dở vẫn tốn lưu lượng
+                self._finish(request, request['bytes'])
+
+    def _finish(self, request: dict, size: int):
+        for stats in (self._loaded.setdefault(request['type'], [0, 0]), self._domains.setdefault(request['domain'], [0, 0])):
+            stats[0] += 1
+            stats[1] += size
+
+    def _estimate_size(self, resource_type: str) -> int:
+        count, total = self._loaded.get(resource_type, (0, 0))
+        if count:
+            return total // count
+        return DEFAULT_SIZES.get(resource_type, DEFAULT_SIZES['Other'])
+
+    def summary(self) -> dict:
+        '''
+        Returns:
+            dict: {
+                'requests', 'bytes': tổng số request và byte đã tải (kể cả header),
+                'top_domains': các tên miền tốn nhiều byte nhất,
+                'by_type': {loại tài nguyên: {'requests', 'bytes'}},
+                'blocked_requests', 'saved_bytes' (ước tính), 'blocked_by_type'
+            }
+        '''
+        with self._lock:
+            saved = sum(count * self._estimate_size(resource_type) for resource_type, count in self.blocked.items())
+            top_domains = sorted(self._domains.items(), key=lambda item: item[1][1], reverse=True)[:self.TOP_DOMAINS]
+            return {
+                'requests': sum(count for count, _ in self._loaded.values()),
+                'bytes': sum(total for _, total in self._loaded.values()),
+                'top_domains': {domain: {'requests': count, 'bytes': total} for domain, (count, total) in top_domains},
+                'by_type': {
+                    resource_type: {'requests': count, 'bytes': total}
+                    for resource_type, (count, total) in sorted(self._loaded.items(), key=lambda item: item[1][1], reverse=True)
+                },
+                'blocked_requests': sum(self.blocked.values()),
+                'saved_bytes': saved,
+                'blocked_by_type': dict(self.blocked),
+            }
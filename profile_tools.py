@@ -0,0 +1,563 @@
+import os
+import sys
+import json
+import time
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from utils import Utility
+
+class ProfileStager:
+    '''
+    Chạy profile từ RAM (tmpfs / RAM disk) thay vì ổ đĩa.
+
+    - `stage()`: sao chép profile từ ổ đĩa vào RAM. Nếu bản trên RAM còn sót (lần trước đồng bộ lỗi) chỉ chép các file thay đổi
+      (so sánh kích thước và mtime).
+    - `sync_back()`: sau khi `driver.quit()`, chỉ ghi ngược các dữ liệu cần giữ (ví, cookies, Local State...) về ổ đĩa.
+    - `release()`: xóa bản trên RAM sau khi đồng bộ xong, RAM chỉ giữ các profile đang chạy.
+
+    An toàn khi crash: dữ liệu được chép đầy đủ vào `.sync_tmp` trước, chỉ khi chép xong mới ghi file `.complete`
+    và thay thế vào profile. Bản chép dở dang (không có `.complete`) luôn bị bỏ đi, không bao giờ được ghi vào profile.
+    '''
+    # Dữ liệu cần giữ lại sau mỗi lần chạy (đường dẫn tương đối trong profile)
+    PERSISTENT_PATHS = [
+        'Local State',
+        'Default/Preferences',
+        'Default/Secure Preferences',
+        'Default/Cookies',
+        'Default/Cookies-journal',
+        'Default/Network',
+        'Default/Extensions',
+        'Default/Extension State',
+        'Default/Extension Rules',
+        'Default/Extension Scripts',
+        'Default/Local Extension Settings',
+        'Default/Sync Extension Settings',
+        'Default/Managed Extension Settings',
+        'Default/IndexedDB',
+        'Default/Local Storage',
+    ]
+    # File khóa của Chrome, không chép qua lại
+    SKIP_NAMES = {'SingletonLock', 'SingletonCookie', 'SingletonSocket', 'lockfile', 'LOCK'}
+
+    SYNC_TMP = '.sync_tmp'
+    SYNC_OLD = '.sync_old'
+    COMPLETE = '.complete'
+
+    def __init__(self, ram_dir: str|Path|None = None) -> None:
+        '''
+        Args:
+            ram_dir (str|Path, optional): Thư mục nằm trên RAM. Mặc định đọc `RAM_DIR` trong config.txt,
+                nếu trống thì dùng `/dev/shm` (Linux). Trên Windows cần tạo RAM disk (ví dụ ImDisk) và khai báo `RAM_DIR`.
+        '''
+        if ram_dir is None:
+            config = Utility.read_config('RAM_DIR')
+            if config:
+                ram_dir = config[0]
+            elif sys.platform.startswith('linux') and Path('/dev/shm').exists():
+                ram_dir = '/dev/shm'
+        self.ram_dir = Path(ram_dir) / 'haha_profiles' if ram_dir else None
+
+    @property
+    def available(self) -> bool:
+        return self.ram_dir is not None and self.ram_dir.parent.exists()
+
+    def _skip(self, path: Path) -> bool:
+        return path.name in self.SKIP_NAMES or path.name in (self.SYNC_TMP, self.SYNC_OLD)
+
+    @staticmethod
+    def _is_same(src: Path, dst: Path) -> bool:
+        try:
+            src_stat, dst_stat = src.stat(), dst.stat()
+        except FileNotFoundError:
+            return False
+        return src_stat.st_size == dst_stat.st_size and int(src_stat.st_mtime) == int(dst_stat.st_mtime)
+
+    def _mirror(self, src: Path, dst: Path) -> tuple[int, int]:
+        '''
+        Đồng bộ kiểu rsync: chép file mới/thay đổi từ `src` sang `dst`, xóa file thừa trong `dst`.
+
+        Returns:
+            tuple[int, int]: (số file đã chép, số byte đã chép)
+        '''
+        copied_files, copied_bytes = 0, 0
+        dst.mkdir(parents=True, exist_ok=True)
+        src_names = set()
+        for entry in src.iterdir():
+            if self._skip(entry):
+                continue
+            src_names.add(entry.name)
+            target = dst / entry.name
+            if entry.is_dir() and not entry.is_symlink():
+                if target.exists() and not target.is_dir():
+                    target.unlink()
+                files, size = self._mirror(entry, target)
+                copied_files += files
+                copied_bytes += size
+            elif not self._is_same(entry, target):
+                if target.is_dir():
+                    shutil.rmtree(target)
+                shutil.copy2(entry, target)
+                copied_files += 1
+                copied_bytes += entry.stat().st_size
+
+        for entry in dst.iterdir():
+            if entry.name not in src_names and not self._skip(entry):
+                if entry.is_dir() and not entry.is_symlink():
+                    shutil.rmtree(entry, ignore_errors=True)
+                else:
+                    entry.unlink(missing_ok=True)
+        return copied_files, copied_bytes
+
+    def _tree_changed(self, src: Path, dst: Path) -> bool:
+        '''
+        So sánh 1 file hoặc 1 thư mục giữa RAM (`src`) và ổ đĩa (`dst`).
+        '''
+        if not src.exists():
+            return False
+        if not dst.exists() or src.is_dir() != dst.is_dir():
+            return True
+        if src.is_file():
+            return not self._is_same(src, dst)
+
+        src_names = {entry.name for entry in src.iterdir() if not self._skip(entry)}
+        dst_names = {entry.name for entry in dst.iterdir() if not self._skip(entry)}
+        if src_names != dst_names:
+            return True
+        return any(self._tree_changed(src / name, dst / name) for name in src_names)
+
+    def recover(self, profile_path: Path):
+        '''
+        Xử lý lần đồng bộ bị gián đoạn trước đó (crash, mất điện):
+            - `.sync_tmp` có `.complete`: bản sao đầy đủ → tiếp tục thay thế vào profile.
+            - `.sync_tmp` không có `.complete`: bản sao dở dang → xóa bỏ.
+        '''
+        sync_tmp = profile_path / self.SYNC_TMP
+        if not sync_tmp.exists():
+            shutil.rmtree(profile_path / self.SYNC_OLD, ignore_errors=True)
+            return
+        if (sync_tmp / self.COMPLETE).exists():
+            Utility.logger(profile_path.name, 'Hoàn tất lần đồng bộ RAM → ổ đĩa bị gián đoạn trước đó')
+            self._apply(profile_path)
+        else:
+            Utility.logger(profile_path.name, 'Bỏ bản đồng bộ dở dang từ lần chạy trước')
+            shutil.rmtree(sync_tmp, ignore_errors=True)
+            shutil.rmtree(profile_path / self.SYNC_OLD, ignore_errors=True)
+
+    def _apply(self, profile_path: Path):
+        '''
+        Thay thế từng mục đã chép đủ trong `.sync_tmp` vào profile. Có thể chạy lại nhiều lần (idempotent).
+        '''
+        sync_tmp = profile_path / self.SYNC_TMP
+        sync_old = profile_path / self.SYNC_OLD
+        manifest = json.loads((sync_tmp / self.COMPLETE).read_text(encoding='utf-8'))
+
+        for rel in manifest:
+            staged = sync_tmp / rel
+            if not staged.exists():
+                # Đã được thay thế ở lần chạy trước
+                continue
+            target = profile_path / rel
+            backup = sync_old / rel
+            if target.exists() and not backup.exists():
+                backup.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(target, backup)
+            elif target.exists():
+                if target.is_dir():
+                    shutil.rmtree(target)
+                else:
+                    target.unlink()
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(staged, target)
+
+        shutil.rmtree(sync_tmp, ignore_errors=True)
+        shutil.rmtree(sync_old, ignore_errors=True)
+
+    def stage(self, profile_name: str, profile_path: Path) -> Path|None:
+        '''
+        Chép profile vào RAM trước khi khởi chạy trình duyệt.
+
+        Args:
+            profile_name (str): Tên profile.
+            profile_path (Path): Thư mục profile trên ổ đĩa.
+
+        Returns:
+            Path | None: Thư mục profile trên RAM, None nếu không thể stage (chạy trực tiếp từ ổ đĩa).
+        '''
+        if not self.available:
+            return None
+
+        ram_path = self.ram_dir / profile_path.name
+        try:
+            profile_path.mkdir(parents=True, exist_ok=True)
+            self.recover(profile_path)
+            files, size = self._mirror(profile_path, ram_path)
+            Utility.logger(profile_name, f'Stage profile vào RAM: {files} file thay đổi ({size / 1024 / 1024:.1f} MB)')
+            return ram_path
+        except Exception as e:
+            Utility.logger(profile_name, f'❌ Lỗi khi stage profile vào RAM, chạy từ ổ đĩa: {e}')
+            return None
+
+    def sync_back(self, profile_name: str, profile_path: Path, ram_path: Path) -> bool:
+        '''
+        Ghi ngược các dữ liệu cần giữ (PERSISTENT_PATHS) đã thay đổi từ RAM về ổ đĩa.
+        Chỉ gọi sau khi trình duyệt đã đóng hoàn toàn (`driver.quit()`).
+
+        Returns:
+            bool: True nếu đồng bộ xong (hoặc không có gì thay đổi), False nếu lỗi (ổ đĩa giữ nguyên bản cũ).
+        '''
+        sync_tmp = profile_path / self.SYNC_TMP
+        changed = [rel for rel in self.PERSISTENT_PATHS if self._tree_changed(ram_path / rel, profile_path / rel)]
+        if not changed:
+            return True
+
+        try:
+            shutil.rmtree(sync_tmp, ignore_errors=True)
+            for rel in changed:
+                src = ram_path / rel
+                dst = sync_tmp / rel
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                if src.is_dir():
+                    shutil.copytree(src, dst, ignore=lambda _, names: [n for n in names if n in self.SKIP_NAMES])
+                else:
+                    shutil.copy2(src, dst)
+
+            # Chỉ đánh dấu hoàn tất khi đã chép đủ; ghi manifest qua file tạm + os.replace
+            tmp_manifest = sync_tmp / f'{self.COMPLETE}.tmp'
+            tmp_manifest.write_text(json.dumps(changed), encoding='utf-8')
+            os.replace(tmp_manifest, sync_tmp / self.COMPLETE)
+        except Exception as e:
+            Utility.logger(profile_name, f'❌ Lỗi khi chép dữ liệu từ RAM, giữ nguyên profile trên ổ đĩa: {e}')
+            shutil.rmtree(sync_tmp, ignore_errors=True)
+            return False
+
+        self._apply(profile_path)
+        Utility.logger(profile_name, f'Đồng bộ RAM → ổ đĩa: {", ".join(changed)}')
+        return True
+
+    def release(self, profile_name: str, ram_path: Path):
+        '''
+        Xóa bản profile trên RAM (gọi sau khi `sync_back()` thành công).
+        '''
+        if self.ram_dir is None or ram_path.parent != self.ram_dir:
+            return
+        shutil.rmtree(ram_path, ignore_errors=True)
+        if ram_path.exists():
+            Utility.logger(profile_name, f'Không xóa hết được bản profile trên RAM: {ram_path}')
+
+class ProfileCleaner:
+    '''
+    Bảo trì thư mục profile: báo cáo dung lượng theo nhóm, xóa cache có thể tái tạo
+    (giữ nguyên dữ liệu ví của extension) và xóa profile ở chế độ nền.
+
+    Các thao tác trên nhiều profile được chạy song song bằng `ThreadPoolExecutor`.
+    '''
+    # Nhóm dữ liệu, xét theo tên thư mục trong đường dẫn (ưu tiên từ trên xuống)
+    CATEGORIES = [
+        ('wallet', [('Local Extension Settings',), ('IndexedDB',), ('Extension State',), ('Local Storage',)]),
+        ('service_worker', [('Service Worker', 'CacheStorage'), ('Service Worker', 'ScriptCache')]),
+        ('cache', [('Cache',), ('Code Cache',), ('component_crx_cache',)]),
+        ('gpu', [('GPUCache',), ('ShaderCache',), ('GrShaderCache',), ('GraphiteDawnCache',), ('DawnCache',), ('DawnGraphiteCache',), ('DawnWebGPUCache',)]),
+        ('crash', [('Crashpad',), ('Crash Reports',)]),
+    ]
+    # Nhóm có thể xóa an toàn, Chrome sẽ tự tạo lại
+    DISPOSABLE = {'service_worker', 'cache', 'gpu', 'crash'}
+    TRASH_DIR = '.trash'
+    # Thư mục nội bộ trong user_data, không phải profile (ngoài các thư mục bắt đầu bằng `.` như `.trash`)
+    INTERNAL_DIRS = {'_shared'}
+
+    @classmethod
+    def is_profile_dir(cls, path: Path) -> bool:
+        return path.is_dir() and not path.name.startswith('.') and path.name not in cls.INTERNAL_DIRS
+
+    def __init__(self, max_workers: int = 4) -> None:
+        self.max_workers = max_workers
+        self._delete_executor = None
+        self._delete_futures = []
+
+    def _classify(self, parts: tuple[str, ...]) -> tuple[str, int]:
+        '''
+        Xác định nhóm của một đường dẫn (tính từ thư mục profile).
+
+        Returns:
+            tuple[str, int]: (tên nhóm, số phần tử đường dẫn của thư mục gốc thuộc nhóm đó).
+        '''
+        for category, patterns in self.CATEGORIES:
+            for pattern in patterns:
+                size = len(pattern)
+                for i in range(len(parts) - size + 1):
+                    if parts[i:i + size] == pattern:
+                        return category, i + size
+        return 'other', 0
+
+    def scan(self, profile_path: Path) -> dict:
+        '''
+        Thống kê dung lượng một profile theo nhóm.
+
+        Returns:
+            dict: {'profile', 'total', '<nhóm>': bytes, ..., 'disposable_dirs': [thư mục có thể xóa]}
+        '''
+        result = {'profile': profile_path.name, 'total': 0, 'disposable_dirs': set()}
+        for category, _ in self.CATEGORIES:
+            result[category] = 0
+        result['other'] = 0
+
+        for root, dirs, files in os.walk(profile_path):
+            rel_parts = Path(root).relative_to(profile_path).parts
+            for name in files:
+                try:
+                    size = (Path(root) / name).stat().st_size
+                except OSError:
+                    continue
+                category, depth = self._classify(rel_parts)
+                result[category] += size
+                result['total'] += size
+                if category in self.DISPOSABLE:
+                    result['disposable_dirs'].add(profile_path.joinpath(*rel_parts[:depth]))
+
+        result['disposable_dirs'] = sorted(result['disposable_dirs'])
+        return result
+
+    def trim(self, profile_path: Path, dry_run: bool = False) -> dict:
+        '''
+        Xóa cache có thể tái tạo của một profile, giữ nguyên dữ liệu ví.
+
+        Args:
+            profile_path (Path): Thư mục profile.
+            dry_run (bool, optional): True, chỉ báo cáo dung lượng sẽ giải phóng, không xóa.
+
+        Returns:
+            dict: kết quả `scan()` kèm `freed` (bytes đã/ sẽ giải phóng).
+        '''
+        result = self.scan(profile_path)
+        result['freed'] = sum(result[category] for category in self.DISPOSABLE)
+        if not dry_run:
+            for path in result['disposable_dirs']:
+                shutil.rmtree(path, ignore_errors=True)
+        return result
+
+    def trim_all(self, profile_paths: list[Path], dry_run: bool = False) -> list[dict]:
+        '''
+        Chạy `trim()` song song trên nhiều profile, bỏ qua thư mục nội bộ (`.trash`, `_shared`).
+        '''
+        profile_paths = [path for path in profile_paths if self.is_profile_dir(path)]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(lambda path: self.trim(path, dry_run), profile_paths))
+
+    @staticmethod
+    def print_report(results: list[dict], dry_run: bool = False):
+        '''
+        In bảng dung lượng (MB) theo nhóm cho từng profile.
+        '''
+        mb = lambda value: f'{value / 1024 / 1024:.1f}'
+        columns = ['wallet', 'cache', 'service_worker', 'gpu', 'crash', 'other', 'total']
+        print(f"{'Profile':<20}" + ''.join(f'{column:>15}' for column in columns) + f"{'Giải phóng' if not dry_run else 'Có thể xóa':>15}")
+        for result in results:
+            print(f"{result['profile']:<20}" + ''.join(f'{mb(result[column]):>15}' for column in columns) + f"{mb(result.get('freed', 0)):>15}")
+        total_freed = sum(result.get('freed', 0) for result in results)
+        print(f"{'Tổng':<20}{mb(total_freed):>{15 * (len(columns) + 1)}} MB")
+
+    def delete_async(self, profile_path: Path) -> bool:
+        '''
+        Xóa profile ở chế độ nền.
+
+        Thư mục được đổi tên vào `.trash` ngay lập tức (tên profile được giải phóng để tạo lại),
+        việc xóa thật sự chạy song song trong nền. Nếu không đổi tên được (file đang bị giữ),
+        xóa trực tiếp trong nền.
+
+        Returns:
+            bool: True nếu đã đưa vào hàng đợi xóa.
+        '''
+        if not profile_path.exists():
+            return False
+
+        target = profile_path
+        trash_dir = profile_path.parent / self.TRASH_DIR
+        try:
+            trash_dir.mkdir(exist_ok=True)
+            target = trash_dir / f'{profile_path.name}_{time.time_ns()}'
+            os.replace(profile_path, target)
+        except OSError:
+            target = profile_path
+
+        if self._delete_executor is None:
+            self._delete_executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='delete')
+        self._delete_futures.append(self._delete_executor.submit(shutil.rmtree, target, True))
+        return True
+
+    def purge_trash(self, user_data_dir: Path):
+        '''
+        Xóa nền các thư mục còn sót trong `.trash` từ lần chạy trước (xóa trực tiếp, không đổi tên lại vào `.trash`).
+        '''
+        trash_dir = user_data_dir / self.TRASH_DIR
+        if not trash_dir.exists():
+            return
+        entries = list(trash_dir.iterdir())
+        if entries and self._delete_executor is None:
+            self._delete_executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='delete')
+        for entry in entries:
+            self._delete_futures.append(self._delete_executor.submit(shutil.rmtree, entry, True))
+
+    def wait(self):
+        '''
+        Chờ các tác vụ xóa nền hoàn tất (gọi trước khi thoát chương trình).
+        '''
+        pending = [future for future in self._delete_futures if not future.done()]
+        if pending:
+            print(f'⏳ Đang chờ xóa xong {len(pending)} profile...')
+        if self._delete_executor:
+            self._delete_executor.shutdown(wait=True)
+            self._delete_executor = None
+        self._delete_futures = []
+
+class ProfileCloner:
+    '''
+    Tạo profile mới bằng cách nhân bản một profile mẫu ("golden") đã qua first-run và đã có cache.
+
+    - File bất biến (thư mục `Default/Extensions`: extension cài từ Chrome Web Store) dùng hardlink.
+      Extension nạp từ file `.crx` (`config_extension`) được chromedriver giải nén ra thư mục tạm ở mỗi lần mở,
+      không nằm trong profile, nên vẫn được nạp lại như profile thường.
+    - File còn lại dùng reflink (copy-on-write) nếu hệ thống file hỗ trợ (Btrfs, XFS...), ngược lại chép bình thường.
+    - Dữ liệu riêng của từng profile (ví, cookies, lịch sử...) không được chép; `Preferences` và `Local State` được ghi lại tên profile mới.
+    '''
+    GOLDEN_NAME = '_golden'
+    # Dữ liệu riêng của từng profile, không lấy từ profile mẫu
+    PER_PROFILE_PATHS = {
+        ('Default', 'Local Extension Settings'),
+        ('Default', 'Sync Extension Settings'),
+        ('Default', 'IndexedDB'),
+        ('Default', 'Local Storage'),
+        ('Default', 'Session Storage'),
+        ('Default', 'Sessions'),
+        ('Default', 'Cookies'),
+        ('Default', 'Cookies-journal'),
+        ('Default', 'Network', 'Cookies'),
+        ('Default', 'Network', 'Cookies-journal'),
+        ('Default', 'History'),
+        ('Default', 'History-journal'),
+        ('Default', 'Login Data'),
+        ('Default', 'Login Data-journal'),
+        ('Default', 'Web Data'),
+        ('Default', 'Web Data-journal'),
+    }
+    # Thư mục chỉ chứa file không bị sửa sau khi tạo, có thể hardlink (chỉ có extension cài từ Web Store)
+    IMMUTABLE_PATHS = {('Default', 'Extensions')}
+    SKIP_NAMES = ProfileStager.SKIP_NAMES
+
+    FICLONE = 0x40049409  # ioctl FICLONE trên Linux
+
+    def __init__(self) -> None:
+        self._reflink_supported: bool|None = None
+
+    @staticmethod
+    def _startswith(parts: tuple[str, ...], prefixes: set[tuple[str, ...]]) -> bool:
+        return any(parts[:len(prefix)] == prefix for prefix in prefixes)
+
+    def _reflink(self, src: Path, dst: Path) -> bool:
+        '''
+        Tạo bản sao copy-on-write (reflink). Trả về False nếu hệ thống file không hỗ trợ.
+        '''
+        if self._reflink_supported is False or not sys.platform.startswith('linux'):
+            return False
+        import fcntl
+        try:
+            with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+                fcntl.ioctl(fdst.fileno(), self.FICLONE, fsrc.fileno())
+            shutil.copystat(src, dst)
+            self._reflink_supported = True
+            return True
+        except OSError:
+            dst.unlink(missing_ok=True)
+            self._reflink_supported = False
+            return False
+
+    def _rewrite_identity(self, profile_path: Path, profile_name: str):
+        '''
+        Ghi lại tên profile trong `Preferences` và `Local State` của bản sao.
+        '''
+        preferences_path = profile_path / 'Default' / 'Preferences'
+        if preferences_path.exists():
+            data = json.loads(preferences_path.read_text(encoding='utf-8'))
+            data.setdefault('profile', {})['name'] = profile_name
+            preferences_path.write_text(json.dumps(data), encoding='utf-8')
+
+        local_state_path = profile_path / 'Local State'
+        if local_state_path.exists():
+            data = json.loads(local_state_path.read_text(encoding='utf-8'))
+            info_cache = data.get('profile', {}).get('info_cache', {})
+            if 'Default' in info_cache:
+                info_cache['Default']['name'] = profile_name
+            local_state_path.write_text(json.dumps(data), encoding='utf-8')
+
+    def clone(self, golden_path: Path, profile_path: Path) -> dict:
+        '''
+        Tạo profile `profile_path` từ profile mẫu `golden_path`.
+
+        Returns:
+            dict: {'profile', 'seconds', 'hardlinked', 'reflinked', 'copied', 'bytes'}
+        '''
+        start = time.perf_counter()
+        stats = {'profile': profile_path.name, 'hardlinked': 0, 'reflinked': 0, 'copied': 0, 'bytes': 0}
+        # Tạo trong thư mục tạm rồi đổi tên, tránh để lại profile dở dang
+        tmp_path = profile_path.with_name(f'.{profile_path.name}.cloning')
+        shutil.rmtree(tmp_path, ignore_errors=True)
+
+        try:
+            for root, dirs, files in os.walk(golden_path):
+                rel_parts = Path(root).relative_to(golden_path).parts
+                dirs[:] = [name for name in dirs if not self._startswith(rel_parts + (name,), self.PER_PROFILE_PATHS)]
+                target_dir = tmp_path.joinpath(*rel_parts)
+                target_dir.mkdir(parents=True, exist_ok=True)
+
+                for name in files:
+                    parts = rel_parts + (name,)
+                    if name in self.SKIP_NAMES or self._startswith(parts, self.PER_PROFILE_PATHS):
+                        continue
+                    src, dst = Path(root) / name, target_dir / name
+                    if self._startswith(parts, self.IMMUTABLE_PATHS):
+                        try:
+                            os.link(src, dst)
+                            stats['hardlinked'] += 1
+                            continue
+                        except OSError:
+                            pass
+                    if self._reflink(src, dst):
+                        stats['reflinked'] += 1
+                    else:
+                        shutil.copy2(src, dst)
+                        stats['copied'] += 1
+                        stats['bytes'] += src.stat().st_size
+
+            self._rewrite_identity(tmp_path, profile_path.name)
+            os.replace(tmp_path, profile_path)
+        finally:
+            # Lỗi giữa chừng: xóa bản dở dang (sau os.replace thư mục tạm không còn)
+            shutil.rmtree(tmp_path, ignore_errors=True)
+        stats['seconds'] = round(time.perf_counter() - start, 3)
+        return stats
+
+    def clone_all(self, golden_path: Path, profile_paths: list[Path]) -> list[dict]:
+        '''
+        Tạo nhiều profile từ profile mẫu, bỏ qua profile đã tồn tại. In thời gian của từng bước nhân bản.
+        '''
+        results = []
+        for profile_path in profile_paths:
+            if profile_path.exists():
+                Utility.logger(profile_path.name, 'Profile đã tồn tại, bỏ qua')
+                continue
+            try:
+                stats = self.clone(golden_path, profile_path)
+            except Exception as e:
+                Utility.logger(profile_path.name, f'❌ Lỗi khi tạo profile từ mẫu: {e}')
+                continue
+            Utility.logger(
+                profile_path.name,
+                f"Tạo từ mẫu trong {stats['seconds']}s (hardlink: {stats['hardlinked']}, reflink: {stats['reflinked']}, "
+                f"chép: {stats['copied']} file / {stats['bytes'] / 1024 / 1024:.1f} MB)"
+            )
+            results.append(stats)
+        if results:
+            total = sum(stats['seconds'] for stats in results)
+            print(f'⏱️  Đã tạo {len(results)} profile trong {total:.2f}s (trung bình {total / len(results):.3f}s/profile)')
+        return results
@@ -0,0 +1,151 @@
+import asyncio
+import base64
+import multiprocessing
+import threading
+from urllib.parse import unquote
+
+def parse_proxy(proxy_info: str) -> tuple[str, int, str|None]:
+    '''
+    Tách thông tin proxy.
+
+    Args:
+        proxy_info (str): "ip:port" hoặc "username:password@ip:port"
+
+    Returns:
+        tuple: (host, port, giá trị Basic auth đã mã hóa base64 hoặc None)
+    '''
+    proxy_info = proxy_info.split('://', 1)[-1]
+    credentials, _, address = proxy_info.rpartition('@')
+    host, _, port = address.rpartition(':')
+    auth = base64.b64encode(unquote(credentials).encode()).decode() if credentials else None
+    return host, int(port), auth
+
+async def _pipe(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        while data := await reader.read(65536):
+            writer.write(data)
+            await writer.drain()
+    except (ConnectionError, OSError):
+        pass
+    finally:
+        writer.close()
+
+class _RelayServer:
+    '''
+    Chạy trong tiến trình relay. Mỗi upstream proxy có một cổng lắng nghe riêng trên 127.0.0.1.
+
+    Request CONNECT được chuyển tiếp nguyên vẹn (không giải mã TLS), chỉ thêm `Proxy-Authorization`
+    của upstream vào phần header, sau đó hai chiều chỉ chép byte.
+    '''
+    def __init__(self, conn) -> None:
+        self.conn = conn
+        self.ports: dict[str, int] = {}
+        self.servers: list[asyncio.AbstractServer] = []
+
+    async def _handle(self, client_reader: asyncio.StreamReader, client_writer: asyncio.StreamWriter, upstream: tuple[str, int, str|None]):
+        host, port, auth = upstream
+        try:
+            head = await client_reader.readuntil(b'\r\n\r\n')
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            client_writer.close()
+            return
+
+        request_line, *headers = head.decode('latin-1').split('\r\n')
+        headers = [line for line in headers if line and not line.lower().startswith(('proxy-authorization:', 'proxy-connection:'))]
+        if not request_line.upper().startswith('CONNECT '):
+            # HTTP thường: mỗi kết nối một request để request sau không bị thiếu header xác thực
+            headers = [line for line in headers if not line.lower().startswith('connection:')]
+            headers.append('Connection: close')
+        if auth:
+            headers.append(f'Proxy-Authorization: Basic {auth}')
+
+        try:
+            upstream_reader, upstream_writer = await asyncio.open_connection(host, port)
+        except OSError:
+            client_writer.write(b'HTTP/1.1 502 Bad Gateway\r\nContent-Length: 0\r\n\r\n')
+            client_writer.close()
+            return
+
+        upstream_writer.write(('\r\n'.join([request_line, *headers]) + '\r\n\r\n').encode('latin-1'))
+        await asyncio.gather(_pipe(client_reader, upstream_writer), _pipe(upstream_reader, client_writer))
+
+    async def _listen(self, proxy_info: str) -> int:
+        upstream = parse_proxy(proxy_info)
+        server = await asyncio.start_server(
+            lambda reader, writer: self._handle(reader, writer, upstream), '127.0.0.1', 0
+        )
+        self.servers.append(server)
+        return server.sockets[0].getsockname()[1]
+
+    async def serve(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            proxy_info = await loop.run_in_executor(None, self.conn.recv)
+            if proxy_info is None:
+                break
+            try:
+                if proxy_info not in self.ports:
+                    self.ports[proxy_info] = await self._listen(proxy_info)
+                self.conn.send(self.ports[proxy_info])
+            except Exception as e:
+                self.conn.send(e)
+        for server in self.servers:
+            server.close()
+
+def _run_relay(conn):
+    asyncio.run(_RelayServer(conn).serve())
+
+class ProxyRelay:
+    '''
+    Một tiến trình relay dùng chung cho tất cả trình duyệt, thay cho mỗi trình duyệt một seleniumwire.
+
+    Chrome không hỗ trợ proxy có user/password qua `--proxy-server`, nên relay mở cho mỗi upstream proxy
+    một cổng `127.0.0.1:port` không cần xác thực và tự thêm `Proxy-Authorization` khi chuyển tiếp.
+    Không chặn/giải mã TLS nên không tốn CPU, RAM và không có cảnh báo "Not Secure".
+    '''
+    def __init__(self) -> None:
+        self._process: multiprocessing.Process|None = None
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._process and self._process.is_alive():
+                return
+            self._conn, child_conn = multiprocessing.Pipe()
+            self._process = multiprocessing.Process(target=_run_relay, args=(child_conn,), daemon=True, name='proxy-relay')
+            self._process.start()
+
+    def get_proxy_server(self, proxy_info: str) -> str:
+        '''
+        Lấy giá trị dùng cho `--proxy-server` của Chrome.
+
+        Proxy không có user/password được dùng trực tiếp, proxy có xác thực đi qua relay.
+
+        Returns:
+            str: "ip:port"
+        '''
+        host, port, auth = parse_proxy(proxy_info)
+        if not auth:
+            return f'{host}:{port}'
+        self.start()
+        with self._lock:
+            self._conn.send(proxy_info)
+            result = self._conn.recv()
+        if isinstance(result, Exception):
+            raise result
+        return f'127.0.0.1:{result}'
+
+    def stop(self):
+        with self._lock:
+            if not self._process:
+                return
+            try:
+                self._conn.send(None)
+            except OSError:
+                pass
+            self._process.join(timeout=3)
+            if self._process.is_alive():
+                self._process.terminate()
+            self._process = None
+            self._conn = None
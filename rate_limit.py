@@ -0,0 +1,181 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import clock
+from utils import Utility, DIR_PATH
+
+# Giới hạn mặc định: tên thao tác -> (số lần mỗi phút, burst)
+DEFAULT_LIMITS: dict[str, tuple[float, int]] = {
+    'claim': (20, 2),
+    'send': (30, 3),
+}
+STATE_DIR = DIR_PATH / 'rate_limit'
+
+class _FileLock:
+    '''
+    Khóa giữa các tiến trình bằng file tạo với O_EXCL (chạy được trên cả Windows và Linux).
+    File lock tồn tại quá `stale_after` giây được coi là của tiến trình đã chết và bị xóa.
+    Tuổi file (mtime) chỉ đọc một lần khi gặp file lock mới, thời gian chờ sau đó tính theo đồng hồ của `PACER`.
+    '''
+    def __init__(self, path: Path, stale_after: float = 10) -> None:
+        self.path = path
+        self.stale_after = stale_after
+
+    def __enter__(self):
+        seen_mtime, stale_at = None, 0.0
+        while True:
+            try:
+                os.close(os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return self
+            except FileExistsError:
+                try:
+                    mtime = os.path.getmtime(self.path)
+                    if mtime != seen_mtime:
+                        # File lock mới: hạn xóa = phần tuổi còn thiếu so với stale_after
+                        seen_mtime = mtime
+                        stale_at = clock.PACER.now() + self.stale_after - max(time.time() - mtime, 0)
+                    if clock.PACER.now() > stale_at:
+                        os.remove(self.path)
+                        continue
+                except OSError:
+                    continue
+                Utility.wait_time(0.01, True, 'poll')
+
+    def __exit__(self, *args):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+class RateLimiter:
+    '''
+    Token bucket dùng chung cho mọi profile, giới hạn các thao tác gọi tới backend/RPC (claim, send...).
+
+    - Mỗi thao tác có tốc độ (lần/phút) và burst riêng, cấu hình bằng `RATE_LIMIT=<tên>:<lần/phút>:<burst>`
+      trong config.txt, thao tác không được cấu hình hoặc có `<lần/phút>` bằng 0 thì không bị giới hạn.
+    - Trạng thái bucket lưu trong `rate_limit/<tên>.json` (khóa bằng file) nên nhiều tiến trình tool
+      chạy cùng lúc trên một máy cũng dùng chung giới hạn. `state_dir=None` chỉ giới hạn trong tiến trình.
+    - Người đến trước giữ chỗ trước: mỗi lần `acquire()` lấy ngay 1 token (có thể âm) rồi ngủ đến lượt,
+      không phải thử lại liên tục.
+    - Ghi nhận thời gian chờ (độ trễ hàng đợi) và số lần thao tác lỗi để chọn tốc độ phù hợp.
+    '''
+    def __init__(self, limits: dict[str, tuple[float, int]]|None = None, state_dir: Path|None = STATE_DIR) -> None:
+        self.limits = dict(DEFAULT_LIMITS if limits is None else limits)
+        self.state_dir = state_dir
+        self._buckets: dict[str, dict] = {}
+        self._stats: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        if self.state_dir:
+            self.state_dir.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def from_config(cls) -> 'RateLimiter':
+        '''
+        Tạo từ các dòng `RATE_LIMIT=<tên>:<lần/phút>:<burst>` trong config.txt, ghi đè `DEFAULT_LIMITS`.
+        '''
+        limits = dict(DEFAULT_LIMITS)
+        for line in Utility.read_config('RATE_LIMIT') or []:
+            try:
+                name, per_minute, burst = [part.strip() for part in line.split(':')]
+                per_minute, burst = float(per_minute), int(burst)
+                if per_minute < 0 or burst < 1:
+                    raise ValueError
+                limits[name] = (per_minute, burst)
+            except ValueError:
+                Utility.logger(message=f'⚠️ RATE_LIMIT không hợp lệ: "{line}" (đúng dạng: claim:20:2)')
+        return cls(limits)
+
+    def _take(self, name: str, rate: float, burst: int) -> float:
+        '''Lấy 1 token, trả về số giây cần chờ đến lượt.'''
+        now = time.time()
+        path = self.state_dir / f'{name}.json' if self.state_dir else None
+        if path:
+            with _FileLock(path.with_suffix('.lock')):
+                try:
+                    state = json.loads(path.read_text(encoding='utf-8'))
+                except (OSError, ValueError):
+                    state = {'tokens': burst, 'updated': now}
+                wait = self._refill(state, now, rate, burst)
+                path.write_text(json.dumps(state), encoding='utf-8')
+                return wait
+        state = self._buckets.setdefault(name, {'tokens': burst, 'updated': now})
+        return self._refill(state, now, rate, burst)
+
+    @staticmethod
+    def _refill(state: dict, now: float, rate: float, burst: int) -> float:
+        state['tokens'] = min(burst, state['tokens'] + (now - state['updated']) * rate) - 1
+        state['updated'] = now
+        return -state['tokens'] / rate if state['tokens'] < 0 else 0
+
+    def acquire(self, name: str) -> float:
+        '''
+        Chờ đến lượt thực hiện thao tác `name`.
+
+        Returns:
+            float: số giây đã chờ.
+        '''
+        per_minute, burst = self.limits.get(name) or (0, 0)
+        if per_minute <= 0:
+            return 0
+        with self._lock:
+            wait = self._take(name, per_minute / 60, burst)
+        if wait > 0:
+            Utility.wait_time(wait, True, 'throttle')
+        with self._lock:
+            stats = self._stats.setdefault(name, {'count': 0, 'errors': 0, 'waits': []})
+            stats['count'] += 1
+            stats['waits'].append(wait)
+        return wait
+
+    @contextmanager
+    def limit(self, name: str):
+        '''
+        Dùng với `with`: chờ đến lượt rồi chạy thao tác, lỗi trong khối được tính vào `errors`.
+        '''
+        self.acquire(name)
+        try:
+            yield
+        except Exception:
+            self.record_error(name)
+            raise
+
+    def record_error(self, name: str):
+        '''Ghi nhận một thao tác bị lỗi/bị backend từ chối.'''
+        with self._lock:
+            self._stats.setdefault(name, {'count': 0, 'errors': 0, 'waits': []})['errors'] += 1
+
+    def stats(self) -> dict[str, dict]:
+        '''
+        Returns:
+            dict: {tên: {'per_minute', 'burst', 'count', 'errors', 'wait_avg', 'wait_p95', 'wait_max'}}
+        '''
+        result = {}
+        with self._lock:
+            for name, stats in self._stats.items():
+                waits = sorted(stats['waits'])
+                per_minute, burst = self.limits.get(name, (None, None))
+                result[name] = {
+                    'per_minute': per_minute,
+                    'burst': burst,
+                    'count': stats['count'],
+                    'errors': stats['errors'],
+                    'wait_avg': round(sum(waits) / len(waits), 2) if waits else 0,
+                    'wait_p95': round(waits[int(0.95 * (len(waits) - 1))], 2) if waits else 0,
+                    'wait_max': round(waits[-1], 2) if waits else 0,
+                }
+        return result
+
+    def print_report(self) -> dict:
+        stats = self.stats()
+        if not stats:
+            return stats
+        print(f"{'Thao tác':<10}{'Lần/phút':>10}{'Burst':>7}{'Số lần':>8}{'Lỗi':>6}{'Chờ TB (s)':>12}{'Chờ p95 (s)':>13}{'Chờ max (s)':>13}")
+        for name, row in stats.items():
+            per_minute = f"{row['per_minute']:g}" if row['per_minute'] else '-'
+            print(f"{name:<10}{per_minute:>10}{row['burst'] or '-':>7}{row['count']:>8}{row['errors']:>6}"
+                  f"{row['wait_avg']:>12.2f}{row['wait_p95']:>13.2f}{row['wait_max']:>13.2f}")
+        return stats
@@ -0,0 +1,337 @@
+import json
+import socket
+import select
+import threading
+import time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from utils import Utility
+from eth_rpc import get_rpc_url
+
+DEFAULT_PORT = 8547
+
+# TTL (giây) của các method chỉ đọc. Method không có trong danh sách (eth_sendRawTransaction,
+# eth_getTransactionCount...) luôn được chuyển thẳng lên RPC, không bao giờ cache.
+RPC_TTLS: dict[str, float] = {
+    'eth_chainId': 3600,
+    'net_version': 3600,
+    'web3_clientVersion': 3600,
+    'eth_getCode': 600,
+    'eth_call': 600,  # chỉ cache khi gắn số/hash block cụ thể (xem BLOCK_PARAM_INDEX)
+    'eth_blockNumber': 2,
+    'eth_getBlockByNumber': 2,
+    'eth_gasPrice': 5,
+    'eth_maxPriorityFeePerGas': 5,
+    'eth_feeHistory': 5,
+    'eth_getBalance': 5,
+}
+
+# Vị trí tham số block của các method đọc theo block. `pending` không bao giờ được cache;
+# method trong PINNED_ONLY chỉ được cache khi gắn số/hash block cụ thể (không phải `latest`, `safe`...)
+BLOCK_PARAM_INDEX: dict[str, int] = {'eth_call': 1, 'eth_getBalance': 1, 'eth_getCode': 1}
+PINNED_ONLY = {'eth_call'}
+BLOCK_TAGS = {'latest', 'pending', 'earliest', 'safe', 'finalized'}
+
+HOP_BY_HOP = {'connection', 'keep-alive', 'proxy-connection', 'proxy-authorization', 'proxy-authenticate',
+              'te', 'trailer', 'transfer-encoding', 'upgrade'}
+
+class CachingProxy:
+    '''
+    Lớp cache cục bộ dùng chung cho mọi profile, chạy trong một luồng nền.
+
+    - `POST /rpc`: endpoint JSON-RPC (hỗ trợ batch) chuyển tiếp tới `RPC_URL`, cache các method chỉ đọc theo `RPC_TTLS`.
+    - Proxy HTTP (chỉ khi tự trỏ `--proxy-server` vào cổng này, tool không làm việc đó): cache tài nguyên tải qua
+      HTTP thường theo `Cache-Control`/`Expires`, HTTPS đi qua tunnel CONNECT nguyên vẹn (không giải mã, không cache).
+    - Đếm hit/miss và in tỉ lệ hit sau mỗi lần chạy.
+    '''
+    MAX_ASSET_BYTES = 5 * 1024 * 1024
+    MAX_CACHE_BYTES = 200 * 1024 * 1024
+
+    def __init__(self, upstream: str|None = None, port: int|None = None) -> None:
+        if upstream is None:
+            upstream = get_rpc_url()
+        if port is None:
+            config = Utility.read_config('RPC_CACHE_PORT')
+            port = int(config[0]) if config and config[0].strip().isdigit() else DEFAULT_PORT
+        self.upstream = upstream
+        self.port = port
+        self._server: ThreadingHTTPServer|None = None
+        self._session = requests.Session()
+        self._lock = threading.Lock()
+        self._rpc_cache: dict[str, tuple[float, object]] = {}
+        self._assets: OrderedDict[str, dict] = OrderedDict()
+        self._asset_bytes = 0
+        self.stats = {'rpc_hits': 0, 'rpc_misses': 0, 'rpc_passthrough': 0, 'asset_hits': 0, 'asset_misses': 0}
+
+    @property
+    def url(self) -> str:
+        '''Endpoint JSON-RPC có cache.'''
+        return f'http://127.0.0.1:{self.port}/rpc'
+
+    @property
+    def proxy_server(self) -> str:
+        '''Giá trị dùng cho `--proxy-server` của Chrome.'''
+        return f'127.0.0.1:{self.port}'
+
+    def start(self) -> bool:
+        if self._server:
+            return True
+        proxy = self
+
+        class Handler(_Handler):
+            cache = proxy
+
+        try:
+            self._server = ThreadingHTTPServer(('127.0.0.1', self.port), Handler)
+        except OSError as e:
+            Utility.logger(message=f'❌ Không mở được cache RPC ở cổng {self.port}: {e}')
+            return False
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True, name='rpc-cache').start()
+        return True
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def _count(self, key: str, value: int = 1):
+        with self._lock:
+            self.stats[key] += value
+
+    # ---------------- JSON-RPC ----------------
+    @staticmethod
+    def _rpc_key(call: dict) -> str:
+        return f"{call.get('method')}:{json.dumps(call.get('params', []), sort_keys=True)}"
+
+    @staticmethod
+    def _cacheable(call: dict) -> bool:
+        '''
+        Method có trong `RPC_TTLS` và tham số block cho phép cache (không `pending`; `eth_call` phải gắn block cụ thể).
+        '''
+        method = call.get('method')
+        if method not in RPC_TTLS:
+            return False
+        if method not in BLOCK_PARAM_INDEX:
+            return True
+        params = call.get('params') or []
+        index = BLOCK_PARAM_INDEX[method]
+        block = params[index] if isinstance(params, list) and len(params) > index else 'latest'
+        if isinstance(block, dict):
+            # EIP-1898: {'blockNumber': ...} hoặc {'blockHash': ...}
+            block = block.get('blockHash') or block.get('blockNumber') or 'latest'
+        if block == 'pending':
+            return False
+        return method not in PINNED_ONLY or block not in BLOCK_TAGS
+
+    def rpc(self, payload: dict|list) -> dict|list:
+        '''
+        Xử lý một request JSON-RPC (đơn hoặc batch): lấy từ cache nếu còn hạn,
+        các call còn lại gửi lên RPC trong một batch.
+        '''
+        calls = payload if isinstance(payload, list) else [payload]
+        results: list[dict|None] = [None] * len(calls)
+        misses: list[int] = []
+        now = time.time()
+
+        with self._lock:
+            for index, call in enumerate(calls):
+                if not self._cacheable(call):
+                    misses.append(index)
+                    continue
+                cached = self._rpc_cache.get(self._rpc_key(call))
+                if cached and cached[0] > now:
+                    results[index] = {'jsonrpc': '2.0', 'id': call.get('id'), 'result': cached[1]}
+                else:
+                    misses.append(index)
+        hits = len(calls) - len(misses)
+        passthrough = sum(1 for index in misses if not self._cacheable(calls[index]))
+        self._count('rpc_hits', hits)
+        self._count('rpc_misses', len(misses) - passthrough)
+        self._count('rpc_passthrough', passthrough)
+
+        if misses:
+            # Đổi id để ghép đúng kết quả trong batch
+            batch = [{**calls[index], 'id': index} for index in misses]
+            response = self._session.post(self.upstream, json=batch, timeout=30)
+            response.raise_for_status()
+            data = response.json()
+            data = data if isinstance(data, list) else [data]
+            with self._lock:
+                for item in data:
+                    index = item.get('id')
+                    if not isinstance(index, int) or not 0 <= index < len(calls):
+                        continue
+                    call = calls[index]
+                    results[index] = {**item, 'id': call.get('id')}
+                    ttl = RPC_TTLS.get(call.get('method')) if self._cacheable(call) else None
+                    if ttl and 'error' not in item and item.get('result') is not None:
+                        self._rpc_cache[self._rpc_key(call)] = (time.time() + ttl, item['result'])
+
+        for index, result in enumerate(results):
+            if result is None:
+                results[index] = {'jsonrpc': '2.0', 'id': calls[index].get('id'), 'error': {'code': -32603, 'message': 'Không có kết quả từ RPC'}}
+        return results if isinstance(payload, list) else results[0]
+
+    # ---------------- Tài nguyên tĩnh ----------------
+    @staticmethod
+    def _freshness(headers) -> float:
+        '''
+        Thời gian (giây) được phép cache theo `Cache-Control`/`Expires`. 0 = không cache.
+        '''
+        cache_control = {}
+        for part in headers.get('Cache-Control', '').split(','):
+            name, _, value = part.strip().lower().partition('=')
+            if name:
+                cache_control[name] = value.strip('"')
+        if {'no-store', 'no-cache', 'private'} & cache_control.keys():
+            return 0
+        for name in ('s-maxage', 'max-age'):
+            if cache_control.get(name, '').isdigit():
+                return int(cache_control[name]) - int(headers.get('Age', '0') or 0)
+        if headers.get('Expires'):
+            try:
+                return parsedate_to_datetime(headers['Expires']).timestamp() - time.time()
+            except (TypeError, ValueError):
+                return 0
+        return 0
+
+    def get_asset(self, url: str, request_headers: dict) -> tuple[int, list[tuple[str, str]], bytes]:
+        '''
+        Lấy tài nguyên HTTP qua cache. Chỉ cache response 200 có thời gian cache hợp lệ,
+        không có `Vary` (ngoài Accept-Encoding) và không quá `MAX_ASSET_BYTES`.
+        '''
+        with self._lock:
+            cached = self._assets.get(url)
+            if cached and cached['expires'] > time.time():
+                self._assets.move_to_end(url)
+                self.stats['asset_hits'] += 1
+                return cached['status'], cached['headers'], cached['body']
+        self._count('asset_misses')
+
+        response = self._session.get(url, headers=request_headers, timeout=30, stream=True, allow_redirects=False)
+        body = response.raw.read(decode_content=False)
+        headers = [(name, value) for name, value in response.headers.items() if name.lower() not in HOP_BY_HOP and name.lower() != 'content-length']
+
+        ttl = self._freshness(response.headers)
+        vary = {value.strip().lower() for value in response.headers.get('Vary', '').split(',') if value.strip()}
+        if response.status_code == 200 and ttl > 0 and vary <= {'accept-encoding'} and len(body) <= self.MAX_ASSET_BYTES:
+            with self._lock:
+                old = self._assets.pop(url, None)
+                if old:
+                    self._asset_bytes -= len(old['body'])
+                self._assets[url] = {'expires': time.time() + ttl, 'status': 200, 'headers': headers, 'body': body}
+                self._asset_bytes += len(body)
+                while self._asset_bytes > self.MAX_CACHE_BYTES and self._assets:
+                    _, evicted = self._assets.popitem(last=False)
+                    self._asset_bytes -= len(evicted['body'])
+        return response.status_code, headers, body
+
+    def hit_ratio(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+        rpc_total = stats['rpc_hits'] + stats['rpc_misses']
+        asset_total = stats['asset_hits'] + stats['asset_misses']
+        stats['rpc_hit_ratio'] = round(stats['rpc_hits'] / rpc_total, 3) if rpc_total else None
+        stats['asset_hit_ratio'] = round(stats['asset_hits'] / asset_total, 3) if asset_total else None
+        return stats
+
+    def print_report(self) -> dict:
+        stats = self.hit_ratio()
+        rpc_ratio = f"{stats['rpc_hit_ratio']:.0%}" if stats['rpc_hit_ratio'] is not None else '-'
+        asset_ratio = f"{stats['asset_hit_ratio']:.0%}" if stats['asset_hit_ratio'] is not None else '-'
+        print(f"Cache RPC: {stats['rpc_hits']} hit / {stats['rpc_misses']} miss ({rpc_ratio}), {stats['rpc_passthrough']} chuyển thẳng")
+        print(f"Cache tài nguyên: {stats['asset_hits']} hit / {stats['asset_misses']} miss ({asset_ratio})")
+        return stats
+
+class _Handler(BaseHTTPRequestHandler):
+    cache: CachingProxy
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, headers: list[tuple[str, str]], body: bytes):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get('Content-Length', 0) or 0))
+
+    def do_POST(self):
+        if self.path.startswith(('http://', 'https://')):
+            return self._passthrough('POST')
+        if not self.path.startswith('/rpc'):
+            return self._send(404, [], b'')
+        try:
+            result = self.cache.rpc(json.loads(self._read_body()))
+            self._send(200, [('Content-Type', 'application/json')], json.dumps(result).encode())
+        except ValueError:
+            self._send(400, [('Content-Type', 'application/json')], b'{"jsonrpc":"2.0","id":null,"error":{"code":-32700,"message":"Parse error"}}')
+        except requests.RequestException as e:
+            self._send(502, [('Content-Type', 'application/json')], json.dumps({'jsonrpc': '2.0', 'id': None, 'error': {'code': -32603, 'message': str(e)}}).encode())
+
+    def do_GET(self):
+        if not self.path.startswith('http://'):
+            return self._send(404, [], b'')
+        headers = {name: value for name, value in self.headers.items() if name.lower() not in HOP_BY_HOP and name.lower() != 'host'}
+        try:
+            status, response_headers, body = self.cache.get_asset(self.path, headers)
+        except requests.RequestException:
+            return self._send(502, [], b'')
+        self._send(status, response_headers, body)
+
+    def _passthrough(self, method: str):
+        headers = {name: value for name, value in self.headers.items() if name.lower() not in HOP_BY_HOP and name.lower() != 'host'}
+        try:
+            response = self.cache._session.request(method, self.path, headers=headers, data=self._read_body(), timeout=30, stream=True, allow_redirects=False)
+        except requests.RequestException:
+            return self._send(502, [], b'')
+        body = response.raw.read(decode_content=False)
+        self._send(response.status_code, [(name, value) for name, value in response.headers.items() if name.lower() not in HOP_BY_HOP and name.lower() != 'content-length'], body)
+
+    def do_PUT(self):
+        self._passthrough('PUT')
+
+    def do_DELETE(self):
+        self._passthrough('DELETE')
+
+    def do_CONNECT(self):
+        # HTTPS: chỉ chuyển byte, không giải mã nên không cache
+        host, _, port = self.path.rpartition(':')
+        try:
+            upstream = socket.create_connection((host, int(port)), timeout=30)
+        except (OSError, ValueError):
+            self.send_response(502)
+            self.end_headers()
+            return
+        self.send_response(200, 'Connection Established')
+        self.end_headers()
+        self.close_connection = True
+        client = self.connection
+        sockets = [client, upstream]
+        try:
+            while True:
+                # Không đặt timeout: tunnel rảnh (websocket, keep-alive) vẫn được giữ, chỉ đóng khi EOF hoặc lỗi
+                readable, _, errored = select.select(sockets, [], sockets)
+                if errored:
+                    break
+                for sock in readable:
+                    data = sock.recv(65536)
+                    if not data:
+                        return
+                    (upstream if sock is client else client).sendall(data)
+        except OSError:
+            pass
+        finally:
+            upstream.close()
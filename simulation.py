@@ -0,0 +1,261 @@
+'''
+Mô phỏng bộ lập lịch của `BrowserManager.run_multi` với trình duyệt giả và đồng hồ ảo, không mở Chrome.
+
+Vòng lập lịch thật (`BrowserManager._run_queue`, `_get_matrix`, `_get_position`, `_release_position`) được dùng lại,
+chỉ `run_browser` được thay bằng vòng đời giả (mở trình duyệt, các bước, đóng) với độ trễ và lỗi lấy ngẫu nhiên theo
+phân phối cấu hình được. Mọi lần chờ đi qua `Utility.wait_time` nên chạy trên `VirtualClock`:
+hàng nghìn profile mô phỏng xong trong vài giây.
+
+Cách chạy (từ thư mục gốc của tool):
+    python simulation.py --profiles 5000 --concurrency 4 8 16 --policy default fast-poll no-stagger
+'''
+import argparse
+import math
+import random
+import threading
+from collections import deque
+from dataclasses import dataclass
+
+import clock
+from browser_automation import BrowserManager
+from clock import VirtualClock
+from utils import Utility
+
+@dataclass
+class Policy:
+    '''Tham số của bộ lập lịch: chờ giữa hai lần mở profile và chờ kiểm tra lại khi hết ô trống (giây).'''
+    delay_between_profiles: float
+    poll_interval: float
+
+POLICIES = {
+    'default': Policy(10, 10),  # như run_terminal hiện tại
+    'fast-poll': Policy(10, 1),
+    'no-stagger': Policy(1, 1),
+}
+
+class SimulatedFailure(Exception):
+    def __init__(self, kind: str) -> None:
+        super().__init__(kind)
+        self.kind = kind
+
+class FakeDriver:
+    '''Trình duyệt giả của một profile: mỗi bước chờ một độ trễ ngẫu nhiên trên đồng hồ ảo, có thể lỗi hoặc crash.'''
+    def __init__(self, factory: 'FakeDriverFactory', rng: random.Random) -> None:
+        self.factory = factory
+        self.rng = rng
+
+    def step(self):
+        factory = self.factory
+        Utility.wait_time(factory._sample(self.rng, factory.step_median, factory.step_sigma), True, 'simulated')
+        roll = self.rng.random()
+        if roll < factory.crash_rate:
+            raise SimulatedFailure('crash')
+        if roll < factory.crash_rate + factory.step_failure_rate:
+            raise SimulatedFailure('step_failed')
+
+    def quit(self):
+        Utility.wait_time(self.factory._sample(self.rng, self.factory.close_median, 0.3), True, 'simulated')
+
+class FakeDriverFactory:
+    '''
+    Sinh trình duyệt giả với độ trễ theo phân phối log-normal (trung vị, sigma) và xác suất lỗi.
+
+    Mỗi profile dùng một bộ sinh số ngẫu nhiên riêng (`seed` + tên profile) nên kết quả không phụ thuộc
+    thứ tự chạy của các luồng: cùng seed, cùng cấu hình cho cùng kết quả.
+    '''
+    def __init__(self, seed: int = 0, launch_median: float = 6, launch_sigma: float = 0.4, launch_failure_rate: float = 0.02,
+                 steps: int = 25, step_median: float = 3.5, step_sigma: float = 0.5, step_failure_rate: float = 0.002,
+                 crash_rate: float = 0.0005, close_median: float = 1.5) -> None:
+        self.seed = seed
+        self.launch_median = launch_median
+        self.launch_sigma = launch_sigma
+        self.launch_failure_rate = launch_failure_rate
+        self.steps = steps
+        self.step_median = step_median
+        self.step_sigma = step_sigma
+        self.step_failure_rate = step_failure_rate
+        self.crash_rate = crash_rate
+        self.close_median = close_median
+
+    @staticmethod
+    def _sample(rng: random.Random, median: float, sigma: float) -> float:
+        return rng.lognormvariate(math.log(median), sigma)
+
+    def launch(self, profile_name: str) -> FakeDriver:
+        rng = random.Random(f'{self.seed}:{profile_name}')
+        Utility.wait_time(self._sample(rng, self.launch_median, self.launch_sigma), True, 'simulated')
+        if rng.random() < self.launch_failure_rate:
+            raise SimulatedFailure('launch_failed')
+        return FakeDriver(self, rng)
+
+class SimExecutor:
+    '''
+    Thay ThreadPoolExecutor khi mô phỏng: tối đa `max_workers` luồng, việc vượt quá chờ trong hàng đợi như executor thật.
+    Luồng đang chạy việc được tính là tham gia đồng hồ ảo, việc còn trong hàng đợi thì không.
+    '''
+    def __init__(self, clock: VirtualClock, max_workers: int) -> None:
+        self.clock = clock
+        self.max_workers = max_workers
+        self._queue: deque = deque()
+        self._running = 0
+        self._threads: list[threading.Thread] = []
+        self._lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs):
+        with self._lock:
+            if self._running >= self.max_workers:
+                self._queue.append((fn, args, kwargs))
+                return
+            self._running += 1
+        # Đăng ký trước khi luồng chạy để đồng hồ không đi tiếp khi luồng chưa kịp bắt đầu
+        self.clock.attach()
+        thread = threading.Thread(target=self._worker, args=((fn, args, kwargs),), daemon=True)
+        self._threads.append(thread)
+        thread.start()
+
+    def _worker(self, task):
+        while task:
+            fn, args, kwargs = task
+            try:
+                fn(*args, **kwargs)
+            except Exception as e:
+                Utility.logger('SIM', f'Lỗi trong mô phỏng: {e}')
+            with self._lock:
+                task = self._queue.popleft() if self._queue else None
+                if task is None:
+                    self._running -= 1
+        self.clock.detach()
+
+    def shutdown(self, wait: bool = True):
+        if not wait:
+            return
+        # Luồng gọi không tham gia đồng hồ trong lúc chờ các luồng khác
+        self.clock.detach()
+        for thread in self._threads:
+            thread.join()
+        self.clock.attach()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        return False
+
+class SimulatedBrowserManager(BrowserManager):
+    '''
+    BrowserManager chỉ dùng cho mô phỏng: không đọc config, không mở màn hình/Chrome/mạng
+    (không gọi `BrowserManager.__init__`), `run_browser` chạy vòng đời giả trên `FakeDriverFactory`.
+    '''
+    def __init__(self, virtual_clock: VirtualClock, driver_factory: FakeDriverFactory, poll_interval: float = 10) -> None:
+        self.clock = virtual_clock
+        self.driver_factory = driver_factory
+        self.poll_interval = poll_interval
+        self.matrix: list[list[str | None]] = [[None]]
+        self.records: list[dict] = []
+        self._records_lock = threading.Lock()
+
+    def _executor(self, max_workers: int):
+        return SimExecutor(self.clock, max_workers)
+
+    def run_browser(self, profile: dict, row: int = 0, col: int = 0, block_media: bool = False, stop_flag: bool = False):
+        profile_name = profile['profile_name']
+        start = self.clock.time()
+        result, launch_seconds, driver = 'ok', None, None
+        try:
+            driver = self.driver_factory.launch(profile_name)
+            launch_seconds = self.clock.time() - start
+            for _ in range(self.driver_factory.steps):
+                driver.step()
+        except SimulatedFailure as e:
+            result = e.kind
+        finally:
+            # Như run_browser thật: chờ 5s trước khi thu dọn, 1s trước khi đóng
+            Utility.wait_time(5, True, 'settle')
+            Utility.wait_time(1, True, 'settle')
+            if driver and result != 'crash':
+                driver.quit()
+            self._release_position(profile_name, row, col)
+        with self._records_lock:
+            self.records.append({
+                'profile': profile_name,
+                'start': start,
+                'end': self.clock.time(),
+                'launch': launch_seconds,
+                'result': result,
+            })
+
+def _percentile(values: list[float], percent: float) -> float:
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(math.ceil(percent / 100 * len(values))) - 1)]
+
+def simulate(profiles: int, concurrency: int, policy: Policy, factory: FakeDriverFactory) -> dict:
+    '''
+    Chạy vòng lập lịch của `run_multi` cho `profiles` profile giả trên đồng hồ ảo.
+
+    Returns:
+        dict: {'makespan_h', 'profiles_per_hour', 'utilisation', 'success_rate', 'p50_min', 'p95_min', 'p99_min',
+               'launch_p95_s', 'failures'}
+    '''
+    virtual_clock = VirtualClock()
+    manager = SimulatedBrowserManager(virtual_clock, factory, policy.poll_interval)
+    manager._get_matrix(number_profiles=profiles, max_concurrent_profiles=concurrency)
+    queue = [{'profile_name': f'sim_{index:05d}'} for index in range(profiles)]
+    with clock.use_clock(virtual_clock):
+        virtual_clock.attach()
+        manager._run_queue(queue, concurrency, policy.delay_between_profiles)
+        virtual_clock.detach()
+
+    records = manager.records
+    makespan = max(record['end'] for record in records) if records else 0
+    durations = [record['end'] - record['start'] for record in records]
+    launches = [record['launch'] for record in records if record['launch'] is not None]
+    failures: dict[str, int] = {}
+    for record in records:
+        if record['result'] != 'ok':
+            failures[record['result']] = failures.get(record['result'], 0) + 1
+    return {
+        'makespan_h': round(makespan / 3600, 2),
+        'profiles_per_hour': round(len(records) / makespan * 3600, 1) if makespan else 0,
+        # Tỉ lệ thời gian các luồng (max_concurrent_profiles) có profile đang chạy
+        'utilisation': round(sum(durations) / (makespan * concurrency), 3) if makespan else 0,
+        'success_rate': round(1 - sum(failures.values()) / len(records), 3) if records else 0,
+        'p50_min': round(_percentile(durations, 50) / 60, 1),
+        'p95_min': round(_percentile(durations, 95) / 60, 1),
+        'p99_min': round(_percentile(durations, 99) / 60, 1),
+        'launch_p95_s': round(_percentile(launches, 95), 1),
+        'failures': failures,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Mô phỏng lập lịch run_multi với trình duyệt giả và đồng hồ ảo')
+    parser.add_argument('--profiles', type=int, default=1000, help='Số profile mô phỏng')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[4], help='Các giá trị max_concurrent_profiles cần so sánh')
+    parser.add_argument('--policy', nargs='+', default=list(POLICIES), choices=list(POLICIES), help='Các chính sách lập lịch cần so sánh')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--steps', type=int, default=25, help='Số bước mỗi profile')
+    parser.add_argument('--step-median', type=float, default=3.5, help='Trung vị thời gian mỗi bước (giây)')
+    parser.add_argument('--launch-median', type=float, default=6, help='Trung vị thời gian mở trình duyệt (giây)')
+    parser.add_argument('--launch-failure-rate', type=float, default=0.02, help='Xác suất mở trình duyệt lỗi')
+    parser.add_argument('--step-failure-rate', type=float, default=0.002, help='Xác suất lỗi mỗi bước (dừng profile như snapshot)')
+    parser.add_argument('--crash-rate', type=float, default=0.0005, help='Xác suất crash mỗi bước')
+    args = parser.parse_args()
+
+    print(f"{'Chính sách':<12}{'Luồng':>6}{'Makespan (h)':>14}{'Profile/giờ':>13}{'Sử dụng':>9}{'Thành công':>12}"
+          f"{'p50 (phút)':>12}{'p95 (phút)':>12}{'p99 (phút)':>12}{'Mở p95 (s)':>12}")
+    for name in args.policy:
+        for concurrency in args.concurrency:
+            factory = FakeDriverFactory(
+                seed=args.seed, launch_median=args.launch_median, launch_failure_rate=args.launch_failure_rate,
+                steps=args.steps, step_median=args.step_median, step_failure_rate=args.step_failure_rate,
+                crash_rate=args.crash_rate,
+            )
+            result = simulate(args.profiles, concurrency, POLICIES[name], factory)
+            print(f"{name:<12}{concurrency:>6}{result['makespan_h']:>14}{result['profiles_per_hour']:>13}"
+                  f"{result['utilisation']:>9.0%}{result['success_rate']:>12.1%}{result['p50_min']:>12}"
+                  f"{result['p95_min']:>12}{result['p99_min']:>12}{result['launch_p95_s']:>12}")
+
+if __name__ == '__main__':
+    main()
@@ -1,12 +1,20 @@
 import time
-import random
-import inspect
 import re
 import ctypes
 import subprocess
 import sys
 import os
+import socket
 import urllib.request
+import json
+import threading
+import queue
+import gzip
+import hashlib
+import shutil
+import atexit
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Optional
 from io import BytesIO
@@ -15,12 +23,108 @@ import requests
 from google import genai
 from PIL import Image
 
+import clock
+from monitoring import traced
+
 BIP39_WORDLIST = [
     "abandon", "ability", "able", "about", "above", "absent", "absorb", "abstract", "absurd", "abuse", "access", "accident", "account", "accuse", "achieve", "acid", "acoustic", "acquire", "across", "act", "action", "actor", "actress", "actual", "adapt", "add", "addict", "address", "adjust", "admit", "adult", "advance", "advice", "aerobic", "affair", "afford", "afraid", "again", "age", "agent", "agree", "ahead", "aim", "air", "airport", "aisle", "alarm", "album", "alcohol", "alert", "alien", "all", "alley", "allow", "almost", "alone", "alpha", "already", "also", "alter", "always", "amateur", "amazing", "among", "amount", "amused", "analyst", "anchor", "ancient", "anger", "angle", "angry", "animal", "ankle", "announce", "annual", "another", "answer", "antenna", "antique", "anxiety", "any", "apart", "apology", "appear", "apple", "approve", "april", "arch", "arctic", "area", "arena", "argue", "arm", "armed", "armor", "army", "around", "arrange", "arrest", "arrive", "arrow", "art", "artefact", "artist", "artwork", "ask", "aspect", "assault", "asset", "assist", "assume", "asthma", "athlete", "atom", "attack", "attend", "attitude", "attract", "auction", "audit", "august", "aunt", "author", "auto", "autumn", "average", "avocado", "avoid", "awake", "aware", "away", "awesome", "awful", "awkward", "axis", "baby", "bachelor", "bacon", "badge", "bag", "balance", "balcony", "ball", "bamboo", "banana", "banner", "bar", "barely", "bargain", "barrel", "base", "basic", "basket", "battle", "beach", "bean", "beauty", "because", "become", "beef", "before", "begin", "behave", "behind", "believe", "below", "belt", "bench", "benefit", "best", "betray", "better", "between", "beyond", "bicycle", "bid", "bike", "bind", "biology", "bird", "birth", "bitter", "black", "blade", "blame", "blanket", "blast", "bleak", "bless", "blind", "blood", "blossom", "blouse", "blue", "blur", "blush", "board", "boat", "body", "boil", "bomb", "bone", "bonus", "book", "boost", "border", "boring", "borrow", "boss", "bottom", "bounce", "box", "boy", "bracket", "brain", "brand", "brass", "brave", "bread", "breeze", "brick", "bridge", "brief", "bright", "bring", "brisk", "broccoli", "broken", "bronze", "broom", "brother", "brown", "brush", "bubble", "buddy", "budget", "buffalo", "build", "bulb", "bulk", "bullet", "bundle", "bunker", "burden", "burger", "burst", "bus", "business", "busy", "butter", "buyer", "buzz", "cabbage", "cabin", "cable", "cactus", "cage", "cake", "call", "calm", "camera", "camp", "can", "canal", "cancel", "candy", "cannon", "canoe", "canvas", "canyon", "capable", "capital", "captain", "car", "carbon", "card", "cargo", "carpet", "carry", "cart", "case", "cash", "casino", "castle", "casual", "cat", "catalog", "catch", "category", "cattle", "caught", "cause", "caution", "cave", "ceiling", "celery", "cement", "census", "century", "cereal", "certain", "chair", "chalk", "champion", "change", "chaos", "chapter", "charge", "chase", "chat", "cheap", "check", "cheese", "chef", "cherry", "chest", "chicken", "chief", "child", "chimney", "choice", "choose", "chronic", "chuckle", "chunk", "churn", "cigar", "cinnamon", "circle", "citizen", "city", "civil", "claim", "clap", "clarify", "claw", "clay", "clean", "clerk", "clever", "click", "client", "cliff", "climb", "clinic", "clip", "clock", "clog", "close", "cloth", "cloud", "clown", "club", "clump", "cluster", "clutch", "coach", "coast", "coconut", "code", "coffee", "coil", "coin", "collect", "color", "column", "combine", "come", "comfort", "comic", "common", "company", "concert", "conduct", "confirm", "congress", "connect", "consider", "control", "convince", "cook", "cool", "copper", "copy", "coral", "core", "corn", "correct", "cost", "cotton", "couch", "country", "couple", "course", "cousin", "cover", "coyote", "crack", "cradle", "craft", "cram", "crane", "crash", "crater", "crawl", "crazy", "cream", "credit", "creek", "crew", "cricket", "crime", "crisp", "critic", "crop", "cross", "crouch", "crowd", "crucial", "cruel", "cruise", "crumble", "crunch", "crush", "cry", "crystal", "cube", "culture", "cup", "cupboard", "curious", "current", "curtain", "curve", "cushion", "custom", "cute", "cycle", "dad", "damage", "damp", "dance", "danger", "daring", "dash", "daughter", "dawn", "day", "deal", "debate", "debris", "decade", "december", "decide", "decline", "decorate", "decrease", "deer", "defense", "define", "defy", "degree", "delay", "deliver", "demand", "demise", "denial", "dentist", "deny", "depart", "depend", "deposit", "depth", "deputy", "derive", "describe", "desert", "design", "desk", "despair", "destroy", "detail", "detect", "develop", "device", "devote", "diagram", "dial", "diamond", "diary", "dice", "diesel", "diet", "differ", "digital", "dignity", "dilemma", "dinner", "dinosaur", "direct", "dirt", "disagree", "discover", "disease", "dish", "dismiss", "disorder", "display", "distance", "divert", "divide", "divorce", "dizzy", "doctor", "document", "dog", "doll", "dolphin", "domain", "donate", "donkey", "donor", "door", "dose", "double", "dove", "draft", "dragon", "drama", "drastic", "draw", "dream", "dress", "drift", "drill", "drink", "drip", "drive", "drop", "drum", "dry", "duck", "dumb", "dune", "during", "dust", "dutch", "duty", "dwarf", "dynamic", "eager", "eagle", "early", "earn", "earth", "easily", "east", "easy", "echo", "ecology", "economy", "edge", "edit", "educate", "effort", "egg", "eight", "either", "elbow", "elder", "electric", "elegant", "element", "elephant", "elevator", "elite", "else", "embark", "embody", "embrace", "emerge", "emotion", "employ", "empower", "empty", "enable", "enact", "end", "endless", "endorse", "enemy", "energy", "enforce", "engage", "engine", "enhance", "enjoy", "enlist", "enough", "enrich", "enroll", "ensure", "enter", "entire", "entry", "envelope", "episode", "equal", "equip", "era", "erase", "erode", "erosion", "error", "erupt", "escape", "essay", "essence", "estate", "eternal", "ethics", "evidence", "evil", "evoke", "evolve", "exact", "example", "excess", "exchange", "excite", "exclude", "excuse", "execute", "exercise", "exhaust", "exhibit", "exile", "exist", "exit", "exotic", "expand", "expect", "expire", "explain", "expose", "express", "extend", "extra", "eye", "eyebrow", "fabric", "face", "faculty", "fade", "faint", "faith", "fall", "false", "fame", "family", "famous", "fan", "fancy", "fantasy", "farm", "fashion", "fat", "fatal", "father", "fatigue", "fault", "favorite", "feature", "february", "federal", "fee", "feed", "feel", "female", "fence", "festival", "fetch", "fever", "few", "fiber", "fiction", "field", "figure", "file", "film", "filter", "final", "find", "fine", "finger", "finish", "fire", "firm", "first", "fiscal", "fish", "fit", "fitness", "fix", "flag", "flame", "flash", "flat", "flavor", "flee", "flight", "flip", "float", "flock", "floor", "flower", "fluid", "flush", "fly", "foam", "focus", "fog", "foil", "fold", "follow", "food", "foot", "force", "forest", "forget", "fork", "fortune", "forum", "forward", "fossil", "foster", "found", "fox", "fragile", "frame", "frequent", "fresh", "friend", "fringe", "frog", "front", "frost", "frown", "frozen", "fruit", "fuel", "fun", "funny", "furnace", "fury", "future", "gadget", "gain", "galaxy", "gallery", "game", "gap", "garage", "garbage", "garden", "garlic", "garment", "gas", "gasp", "gate", "gather", "gauge", "gaze", "general", "genius", "genre", "gentle", "genuine", "gesture", "ghost", "giant", "gift", "giggle", "ginger", "giraffe", "girl", "give", "glad", "glance", "glare", "glass", "glide", "glimpse", "globe", "gloom", "glory", "glove", "glow", "glue", "goat", "goddess", "gold", "good", "goose", "gorilla", "gospel", "gossip", "govern", "gown", "grab", "grace", "grain", "grant", "grape", "grass", "gravity", "great", "green", "grid", "grief", "grit", "grocery", "group", "grow", "grunt", "guard", "guess", "guide", "guilt", "guitar", "gun", "gym", "habit", "hair", "half", "hammer", "hamster", "hand", "happy", "harbor", "hard", "harsh", "harvest", "hat", "have", "hawk", "hazard", "head", "health", "heart", "heavy", "hedgehog", "height", "hello", "helmet", "help", "hen", "hero", "hidden", "high", "hill", "hint", "hip", "hire", "history", "hobby", "hockey", "hold", "hole", "holiday", "hollow", "home", "honey", "hood", "hope", "horn", "horror", "horse", "hospital", "host", "hotel", "hour", "hover", "hub", "huge", "human", "humble", "humor", "hundred", "hungry", "hunt", "hurdle", "hurry", "hurt", "husband", "hybrid", "ice", "icon", "idea", "identify", "idle", "ignore", "ill", "illegal", "illness", "image", "imitate", "immense", "immune", "impact", "impose", "improve", "impulse", "inch", "include", "income", "increase", "index", "indicate", "indoor", "industry", "infant", "inflict", "inform", "inhale", "inherit", "initial", "inject", "injury", "inmate", "inner", "innocent", "input", "inquiry", "insane", "insect", "inside", "inspire", "install", "intact", "interest", "into", "invest", "invite", "involve", "iron", "island", "isolate", "issue", "item", "ivory", "jacket", "jaguar", "jar", "jazz", "jealous", "jeans", "jelly", "jewel", "job", "join", "joke", "journey", "joy", "judge", "juice", "jump", "jungle", "junior", "junk", "just", "kangaroo", "keen", "keep", "ketchup", "key", "kick", "kid", "kidney", "kind", "kingdom", "kiss", "kit", "kitchen", "kite", "kitten", "kiwi", "knee", "knife", "knock", "know", "lab", "label", "labor", "ladder", "lady", "lake", "lamp", "language", "laptop", "large", "later", "latin", "laugh", "laundry", "lava", "law", "lawn", "lawsuit", "layer", "lazy", "leader", "leaf", "learn", "leave", "lecture", "left", "leg", "legal", "legend", "leisure", "lemon", "lend", "length", "lens", "leopard", "lesson", "letter", "level", "liar", "liberty", "library", "license", "life", "lift", "light", "like", "limb", "limit", "link", "lion", "liquid", "list", "little", "live", "lizard", "load", "loan", "lobster", "local", "lock", "logic", "lonely", "long", "loop", "lottery", "loud", "lounge", "love", "loyal", "lucky", "luggage", "lumber", "lunar", "lunch", "luxury", "lyrics", "machine", "mad", "magic", "magnet", "maid", "mail", "main", "major", "make", "mammal", "man", "manage", "mandate", "mango", "mansion", "manual", "maple", "marble", "march", "margin", "marine", "market", "marriage", "mask", "mass", "master", "match", "material", "math", "matrix", "matter", "maximum", "maze", "meadow", "mean", "measure", "meat", "mechanic", "medal", "media", "melody", "melt", "member", "memory", "mention", "menu", "mercy", "merge", "merit", "merry", "mesh", "message", "metal", "method", "middle", "midnight", "milk", "million", "mimic", "mind", "minimum", "minor", "minute", "miracle", "mirror", "misery", "miss", "mistake", "mix", "mixed", "mixture", "mobile", "model", "modify", "mom", "moment", "monitor", "monkey", "monster", "month", "moon", "moral", "more", "morning", "mosquito", "mother", "motion", "motor", "mountain", "mouse", "move", "movie", "much", "muffin", "mule", "multiply", "muscle", "museum", "mushroom", "music", "must", "mutual", "myself", "mystery", "myth", "naive", "name", "napkin", "narrow", "nasty", "nation", "nature", "near", "neck", "need", "negative", "neglect", "neither", "nephew", "nerve", "nest", "net", "network", "neutral", "never", "news", "next", "nice", "night", "noble", "noise", "nominee", "noodle", "normal", "north", "nose", "notable", "note", "nothing", "notice", "novel", "now", "nuclear", "number", "nurse", "nut", "oak", "obey", "object", "oblige", "obscure", "observe", "obtain", "obvious", "occur", "ocean", "october", "odor", "off", "offer", "office", "often", "oil", "okay", "old", "olive", "olympic", "omit", "once", "one", "onion", "online", "only", "open", "opera", "opinion", "oppose", "option", "orange", "orbit", "orchard", "order", "ordinary", "organ", "orient", "original", "orphan", "ostrich", "other", "outdoor", "outer", "output", "outside", "oval", "oven", "over", "own", "owner", "oxygen", "oyster", "ozone", "pact", "paddle", "page", "pair", "palace", "palm", "panda", "panel", "panic", "panther", "paper", "parade", "parent", "park", "parrot", "party", "pass", "patch", "path", "patient", "patrol", "pattern", "pause", "pave", "payment", "peace", "peanut", "pear", "peasant", "pelican", "pen", "penalty", "pencil", "people", "pepper", "perfect", "permit", "person", "pet", "phone", "photo", "phrase", "physical", "piano", "picnic", "picture", "piece", "pig", "pigeon", "pill", "pilot", "pink", "pioneer", "pipe", "pistol", "pitch", "pizza", "place", "planet", "plastic", "plate", "play", "please", "pledge", "pluck", "plug", "plunge", "poem", "poet", "point", "polar", "pole", "police", "pond", "pony", "pool", "popular", "portion", "position", "possible", "post", "potato", "pottery", "poverty", "powder", "power", "practice", "praise", "predict", "prefer", "prepare", "present", "pretty", "prevent", "price", "pride", "primary", "print", "priority", "prison", "private", "prize", "problem", "process", "produce", "profit", "program", "project", "promote", "proof", "property", "prosper", "protect", "proud", "provide", "public", "pudding", "pull", "pulp", "pulse", "pumpkin", "punch", "pupil", "puppy", "purchase", "purity", "purpose", "purse", "push", "put", "puzzle", "pyramid", "quality", "quantum", "quarter", "question", "quick", "quit", "quiz", "quote", "rabbit", "raccoon", "race", "rack", "radar", "radio", "rail", "rain", "raise", "rally", "ramp", "ranch", "random", "range", "rapid", "rare", "rate", "rather", "raven", "raw", "razor", "ready", "real", "reason", "rebel", "rebuild", "recall", "receive", "recipe", "record", "recycle", "reduce", "reflect", "reform", "refuse", "region", "regret", "regular", "reject", "relax", "release", "relief", "rely", "remain", "remember", "remind", "remove", "render", "renew", "rent", "reopen", "repair", "repeat", "replace", "report", "require", "rescue", "resemble", "resist", "resource", "response", "result", "retire", "retreat", "return", "reunion", "reveal", "review", "reward", "rhythm", "rib", "ribbon", "rice", "rich", "ride", "ridge", "rifle", "right", "rigid", "ring", "riot", "ripple", "risk", "ritual", "rival", "river", "road", "roast", "robot", "robust", "rocket", "romance", "roof", "rookie", "room", "rose", "rotate", "rough", "round", "route", "royal", "rubber", "rude", "rug", "rule", "run", "runway", "rural", "sad", "saddle", "sadness", "safe", "sail", "salad", "salmon", "salon", "salt", "salute", "same", "sample", "sand", "satisfy", "satoshi", "sauce", "sausage", "save", "say", "scale", "scan", "scare", "scatter", "scene", "scheme", "school", "science", "scissors", "scorpion", "scout", "scrap", "screen", "script", "scrub", "sea", "search", "season", "seat", "second", "secret", "section", "security", "seed", "seek", "segment", "select", "sell", "seminar", "senior", "sense", "sentence", "series", "service", "session", "settle", "setup", "seven", "shadow", "shaft", "shallow", "share", "shed", "shell", "sheriff", "shield", "shift", "shine", "ship", "shiver", "shock", "shoe", "shoot", "shop", "short", "shoulder", "shove", "shrimp", "shrug", "shuffle", "shy", "sibling", "sick", "side", "siege", "sight", "sign", "silent", "silk", "silly", "silver", "similar", "simple", "since", "sing", "siren", "sister", "situate", "six", "size", "skate", "sketch", "ski", "skill", "skin", "skirt", "skull", "slab", "slam", "sleep", "slender", "slice", "slide", "slight", "slim", "slogan", "slot", "slow", "slush", "small", "smart", "smile", "smoke", "smooth", "snack", "snake", "snap", "sniff", "snow", "soap", "soccer", "social", "sock", "soda", "soft", "solar", "soldier", "solid", "solution", "solve", "someone", "song", "soon", "sorry", "sort", "soul", "sound", "soup", "source", "south", "space", "spare", "spatial", "spawn", "speak", "special", "speed", "spell", "spend", "sphere", "spice", "spider", "spike", "spin", "spirit", "split", "spoil", "sponsor", "spoon", "sport", "spot", "spray", "spread", "spring", "spy", "square", "squeeze", "squirrel", "stable", "stadium", "staff", "stage", "stairs", "stamp", "stand", "start", "state", "stay", "steak", "steel", "stem", "step", "stereo", "stick", "still", "sting", "stock", "stomach", "stone", "stool", "story", "stove", "strategy", "street", "strike", "strong", "struggle", "student", "stuff", "stumble", "style", "subject", "submit", "subway", "success", "such", "sudden", "suffer", "sugar", "suggest", "suit", "summer", "sun", "sunny", "sunset", "super", "supply", "supreme", "sure", "surface", "surge", "surprise", "surround", "survey", "suspect", "sustain", "swallow", "swamp", "swap", "swarm", "swear", "sweet", "swift", "swim", "swing", "switch", "sword", "symbol", "symptom", "syrup", "system", "table", "tackle", "tag", "tail", "talent", "talk", "tank", "tape", "target", "task", "taste", "tattoo", "taxi", "teach", "team", "tell", "ten", "tenant", "tennis", "tent", "term", "test", "text", "thank", "that", "theme", "then", "theory", "there", "they", "thing", "this", "thought", "three", "thrive", "throw", "thumb", "thunder", "ticket", "tide", "tiger", "tilt", "timber", "time", "tiny", "tip", "tired", "tissue", "title", "toast", "tobacco", "today", "toddler", "toe", "together", "toilet", "token", "tomato", "tomorrow", "tone", "tongue", "tonight", "tool", "tooth", "top", "topic", "topple", "torch", "tornado", "tortoise", "toss", "total", "tourist", "toward", "tower", "town", "toy", "track", "trade", "traffic", "tragic", "train", "transfer", "trap", "trash", "travel", "tray", "treat", "tree", "trend", "trial", "tribe", "trick", "trigger", "trim", "trip", "trophy", "trouble", "truck", "true", "truly", "trumpet", "trust", "truth", "try", "tube", "tuition", "tumble", "tuna", "tunnel", "turkey", "turn", "turtle", "twelve", "twenty", "twice", "twin", "twist", "two", "type", "typical", "ugly", "umbrella", "unable", "unaware", "uncle", "uncover", "under", "undo", "unfair", "unfold", "unhappy", "uniform", "unique", "unit", "universe", "unknown", "unlock", "until", "unusual", "unveil", "update", "upgrade", "uphold", "upon", "upper", "upset", "urban", "urge", "usage", "use", "used", "useful", "useless", "usual", "utility", "vacant", "vacuum", "vague", "valid", "valley", "valve", "van", "vanish", "vapor", "various", "vast", "vault", "vehicle", "velvet", "vendor", "venture", "venue", "verb", "verify", "version", "very", "vessel", "veteran", "viable", "vibrant", "vicious", "victory", "video", "view", "village", "vintage", "violin", "virtual", "virus", "visa", "visit", "visual", "vital", "vivid", "vocal", "voice", "void", "volcano", "volume", "vote", "voyage", "wage", "wagon", "wait", "walk", "wall", "walnut", "want", "warfare", "warm", "warrior", "wash", "wasp", "waste", "water", "wave", "way", "wealth", "weapon", "wear", "weasel", "weather", "web", "wedding", "weekend", "weird", "welcome", "west", "wet", "whale", "what", "wheat", "wheel", "when", "where", "whip", "whisper", "wide", "width", "wife", "wild", "will", "win", "window", "wine", "wing", "wink", "winner", "winter", "wire", "wisdom", "wise", "wish", "witness", "wolf", "woman", "wonder", "wood", "wool", "word", "work", "world", "worry", "worth", "wrap", "wreck", "wrestle", "wrist", "write", "wrong", "yard", "year", "yellow", "you", "young", "youth", "zebra", "zero", "zone", "zoo"
 ]
 
 DIR_PATH = Path(__file__).parent
 
+class LogWriter:
+    """
+    Ghi nhật ký có cấu trúc: in ra console dạng `[profile][func]: message` và ghi JSON-lines
+    theo từng profile vào `logs/<profile>.jsonl`.
+
+    - Dòng console được in ngay (có khóa) để không bị chen ngang giữa các luồng và đúng thứ tự với menu/báo cáo.
+    - Ghi file qua hàng đợi trong một luồng nền, luồng gọi log không chờ I/O ổ đĩa.
+    - File vượt `max_bytes` được đổi tên và nén `.gz`, mỗi profile giữ tối đa `backups` file nén.
+    """
+    MAX_OPEN_FILES = 64
+
+    def __init__(self, log_dir: Path|None = None, max_bytes: int = 5 * 1024 * 1024, backups: int = 3) -> None:
+        self.log_dir = log_dir or DIR_PATH / 'logs'
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._queue: queue.Queue = queue.Queue()
+        self._files: dict[str, object] = {}
+        self._console_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._thread: threading.Thread|None = None
+
+    def write(self, profile_name: str, func_name: str, message: str, level: str = 'info', console: bool = True, **fields):
+        """
+        Ghi một dòng nhật ký.
+
+        Args:
+            console (bool, optional): False, chỉ ghi file (không in ra console). Mặc định True.
+            **fields: các trường bổ sung ghi vào JSON.
+        """
+        if console:
+            with self._console_lock:
+                sys.stdout.write(f'[{profile_name}][{func_name}]: {message}\n')
+                sys.stdout.flush()
+        if self._thread is None:
+            self._start()
+        self._queue.put({'ts': time.time(), 'profile': profile_name, 'func': func_name, 'level': level, 'msg': message, **fields})
+
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name='log-writer')
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def flush(self):
+        """Chờ ghi hết các dòng đang trong hàng đợi."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def _run(self):
+        while True:
+            record = self._queue.get()
+            try:
+                self._write_record(record)
+                if self._queue.empty():
+                    for f in self._files.values():
+                        f.flush()
+            except Exception as e:
+                with self._console_lock:
+                    sys.stdout.write(f'[System][log-writer]: Không ghi được log: {e}\n')
+            finally:
+                self._queue.task_done()
+
+    def _file_name(self, profile_name: str) -> str:
+        return re.sub(r'[^a-zA-Z0-9_\-]', '_', profile_name) or 'System'
+
+    def _write_record(self, record: dict):
+        name = self._file_name(record['profile'])
+        f = self._files.pop(name, None)
+        if f is None:
+            if len(self._files) >= self.MAX_OPEN_FILES:
+                # Đóng file ít dùng nhất (dict giữ thứ tự dùng gần nhất ở cuối)
+                self._files.pop(next(iter(self._files))).close()
+            self.log_dir.mkdir(parents=True, exist_ok=True)
+            f = open(self.log_dir / f'{name}.jsonl', 'a', encoding='utf-8')
+        self._files[name] = f
+        f.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+        if f.tell() >= self.max_bytes:
+            self._rotate(name)
+
+    def _rotate(self, name: str):
+        self._files.pop(name).close()
+        path = self.log_dir / f'{name}.jsonl'
+        rotated = self.log_dir / f"{name}.{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.jsonl"
+        path.rename(rotated)
+        with open(rotated, 'rb') as src, gzip.open(f'{rotated}.gz', 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        rotated.unlink()
+        for old in sorted(self.log_dir.glob(f'{name}.*.jsonl.gz'))[:-self.backups or None]:
+            old.unlink(missing_ok=True)
+
+LOG_WRITER = LogWriter()
+
 class SeedConverter:
     @staticmethod
     def _seed_to_indices(seed: List[str]) -> List[int]:
@@ -84,13 +188,14 @@ class SeedConverter:
 
 class Utility:
     @staticmethod
-    def wait_time(second: float = 5, fix: bool = False) -> None:
+    def wait_time(second: float = 5, fix: bool = False, kind: str = 'human') -> None:
         '''
-        Đợi trong một khoảng thời gian nhất định.  Với giá trị dao động từ -50% đên 50%
+        Đợi trong một khoảng thời gian nhất định.  Với giá trị dao động theo chính sách chờ (`clock.PACER`, mặc định -40% đến 40%)
 
         Args:
             seconds (int) = 2: Số giây cần đợi.
             fix (bool) = False: False sẽ random, True không random
+            kind (str) = 'human': Loại chờ (`human`, `poll`, `settle`, `schedule`, `throttle`, `simulated`), chính sách `fast` bỏ các lần chờ `human`
         '''
         try:
             sec = float(second)
@@ -100,11 +205,7 @@ class Utility:
             Utility.logger('SYS', f'⏰ Giá trị second không hợp lệ ({second}), dùng mặc định 5s')
             sec = 5.0
 
-        if not fix:
-            gap = 0.4
-            sec = random.uniform(sec * (1 - gap), sec * (1 + gap))
-
-        time.sleep(second)
+        clock.PACER.sleep(sec, kind, fix)
 
     @staticmethod
     def timeout(second: int = 5):
@@ -121,15 +222,16 @@ class Utility:
         Returns:
             Callable[[], bool]: Một hàm không tham số, trả về True nếu vẫn còn trong thời gian cho phép, False nếu đã hết thời gian.
         """
-        start_time = time.time()
+        # Cùng đồng hồ với Utility.wait_time (chính sách `virtual`/mô phỏng không ngủ thật)
+        start_time = clock.PACER.now()
         
         def checker():
-            return time.time() - start_time < second
+            return clock.PACER.now() - start_time < second
         
         return checker
 
     @staticmethod
-    def logger(profile_name: str = 'System', message: str = 'Chưa có mô tả nhật ký', show_log: bool = True):
+    def logger(profile_name: str = 'System', message: str = 'Chưa có mô tả nhật ký', show_log: bool = True, func_name: str|None = None):
         '''
         Ghi và hiển thị thông báo nhật ký (log)
         
@@ -140,10 +242,19 @@ class Utility:
             profile_name (str): tên hồ sơ hiện tại
             message (str): Nội dung thông báo log.
             show_log (bool, option): cho phép hiển thị nhật ký hay không. Mặc định: True (cho phép)
+            func_name (str, option): tên hàm hiển thị, None thì lấy hàm gọi ở 2 cấp phía trên.
+
+        Ghi chú:
+            - Đồng thời ghi JSON-lines vào `logs/<profile_name>.jsonl` (xem `LogWriter`).
         '''
         if show_log:
-            func_name = inspect.stack()[2].function
-            print(f'[{profile_name}][{func_name}]: {message}')
+            if func_name is None:
+                # sys._getframe chỉ lấy frame cần thiết, không đọc mã nguồn như inspect.stack()
+                try:
+                    func_name = sys._getframe(2).f_code.co_name
+                except ValueError:
+                    func_name = '<module>'
+            LOG_WRITER.write(profile_name, func_name, message)
     
     @staticmethod
     def print_section(title: str, icon: str = "🔔"):
@@ -315,12 +426,12 @@ class Utility:
             except Exception as e:
                 Utility.logger(profile_name, f"Lỗi khi kiểm tra/xóa file lock: {e}")
 
-        start_time = time.time()
+        start_time = clock.PACER.now()
         while os.path.exists(lock_path):
-            if time.time() - start_time > timeout:
+            if clock.PACER.now() - start_time > timeout:
                 raise TimeoutError(f"Chờ quá lâu nhưng profile {profile_name} vẫn bị khóa.")
             print(f"🔒 Profile [{profile_name}] đang bận, chờ...")
-            Utility.wait_time(10, True)
+            Utility.wait_time(10, True, 'poll')
 
     @staticmethod
     def lock_profile(lock_path: Path):
@@ -345,6 +456,261 @@ class Utility:
         if os.path.exists(lock_path):
             os.remove(lock_path)
 
+    @staticmethod
+    def get_free_port() -> int:
+        """
+        Lấy một cổng TCP còn trống trên 127.0.0.1 (do hệ điều hành cấp).
+
+        Returns:
+            int: Số cổng còn trống.
+        """
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.bind(('127.0.0.1', 0))
+            return s.getsockname()[1]
+
+    @staticmethod
+    def is_debugger_alive(address: str, timeout: float = 2) -> bool:
+        """
+        Kiểm tra trình duyệt có còn mở cổng remote debugging hay không.
+
+        Args:
+            address (str): Địa chỉ debugger dạng "127.0.0.1:port".
+            timeout (float, optional): Thời gian chờ tối đa (giây). Mặc định 2.
+
+        Returns:
+            bool: True nếu endpoint `/json/version` phản hồi, ngược lại False.
+        """
+        try:
+            response = requests.get(f'http://{address}/json/version', timeout=timeout)
+            return response.status_code == 200 and 'webSocketDebuggerUrl' in response.json()
+        except Exception:
+            return False
+
+    @staticmethod
+    def get_browser_rss(user_data_dir: str|Path) -> int|None:
+        """
+        Tính tổng RAM (RSS, bytes) của cây tiến trình trình duyệt đang dùng `user_data_dir`.
+
+        Tìm tiến trình chính (có `--user-data-dir=<user_data_dir>` và không có `--type=`),
+        sau đó cộng RSS của nó và toàn bộ tiến trình con (GPU, network, renderer, extension).
+
+        Args:
+            user_data_dir (str|Path): Thư mục user data truyền cho Chrome.
+
+        Returns:
+            int | None: Tổng RSS (bytes), None nếu không tìm thấy hoặc thiếu thư viện `psutil`.
+        """
+        try:
+            import psutil
+        except ImportError:
+            return None
+
+        target = os.path.normcase(os.path.abspath(str(user_data_dir)))
+        for proc in psutil.process_iter(['cmdline']):
+            try:
+                cmdline = proc.info['cmdline'] or []
+                if any(arg.startswith('--type=') for arg in cmdline):
+                    continue
+                for arg in cmdline:
+                    if arg.startswith('--user-data-dir=') and os.path.normcase(os.path.abspath(arg.split('=', 1)[1])) == target:
+                        total = proc.memory_info().rss
+                        for child in proc.children(recursive=True):
+                            try:
+                                total += child.memory_info().rss
+                            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                                pass
+                        return total
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return None
+
+class RunReport:
+    """
+    Báo cáo của một lần chạy: gom thông tin theo từng profile và ghi ra `report/<name>_<timestamp>.json`.
+
+    An toàn khi gọi từ nhiều luồng.
+    """
+    def __init__(self, name: str = 'run') -> None:
+        self.name = name
+        self.started_at = datetime.now()
+        self.profiles: dict[str, dict] = {}
+        self.summary: dict = {}
+        self._lock = threading.Lock()
+
+    def update(self, profile_name: str, **fields):
+        """
+        Cập nhật (ghi đè) các trường của một profile.
+        """
+        with self._lock:
+            self.profiles.setdefault(profile_name, {}).update(fields)
+
+    def get(self, profile_name: str, key: str, default=None):
+        with self._lock:
+            return self.profiles.get(profile_name, {}).get(key, default)
+
+    def save(self) -> Path|None:
+        """
+        Ghi báo cáo ra file JSON trong thư mục `report`.
+
+        Returns:
+            Path | None: Đường dẫn file báo cáo, None nếu ghi lỗi.
+        """
+        report_dir = DIR_PATH / 'report'
+        report_dir.mkdir(parents=True, exist_ok=True)
+        file_path = report_dir / f"{self.name}_{self.started_at.strftime('%Y%m%d_%H%M%S')}.json"
+        with self._lock:
+            data = {
+                'name': self.name,
+                'started_at': self.started_at.isoformat(timespec='seconds'),
+                'finished_at': datetime.now().isoformat(timespec='seconds'),
+                'summary': self.summary,
+                'profiles': self.profiles,
+            }
+        try:
+            with open(file_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2, default=str)
+        except Exception as e:
+            Utility.logger(message=f'❌ Không thể ghi báo cáo {file_path}: {e}')
+            return None
+        return file_path
+
+class ProxyChecker:
+    """
+    Kiểm tra proxy song song và lưu kết quả (độ trễ, IP ra ngoài) vào `proxy_cache.json` trong thời gian `ttl` giây.
+    File cache chỉ lưu hash của proxy và `ip:port`, không lưu user/password.
+
+    Trang kiểm tra đọc từ `PROXY_CHECK_URL` trong config.txt (mặc định `http://ip-api.com/json`),
+    có thể trỏ về một HTTP server nội bộ khi chạy thử.
+    """
+    DEFAULT_CHECK_URL = 'http://ip-api.com/json'
+
+    def __init__(self, ttl: int = 600, timeout: int = 5, max_workers: int = 16, check_url: str|None = None) -> None:
+        if check_url is None:
+            config = Utility.read_config('PROXY_CHECK_URL')
+            check_url = config[0].strip() if config and config[0].strip() else self.DEFAULT_CHECK_URL
+        self.check_url = check_url
+        self.ttl = ttl
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.cache_path = DIR_PATH / 'proxy_cache.json'
+        self._cache: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def _key(proxy_info: str) -> str:
+        return hashlib.sha256(proxy_info.encode('utf-8')).hexdigest()[:16]
+
+    def _load(self):
+        if not self.cache_path.exists():
+            return
+        try:
+            cache = json.loads(self.cache_path.read_text(encoding='utf-8'))
+        except Exception as e:
+            Utility.logger(message=f'File {self.cache_path} lỗi, bỏ qua cache proxy: {e}')
+            return
+        # File cũ lưu proxy đầy đủ (kèm user:pass) làm khóa: đổi sang hash và ghi lại ngay
+        legacy = [key for key in cache if ':' in key]
+        for key in legacy:
+            cache[self._key(key)] = dict(cache.pop(key), address=key.rpartition('@')[2])
+        self._cache = cache
+        if legacy:
+            self._save()
+
+    def _save(self):
+        with self._lock:
+            data = json.dumps(self._cache, ensure_ascii=False, indent=2)
+        try:
+            self.cache_path.write_text(data, encoding='utf-8')
+        except Exception as e:
+            Utility.logger(message=f'❌ Không thể ghi cache proxy {self.cache_path}: {e}')
+
+    def _is_fresh(self, result: dict|None) -> bool:
+        return bool(result) and time.time() - result.get('checked', 0) < self.ttl
+
+    def check(self, proxy_info: str) -> dict:
+        """
+        Kiểm tra một proxy (không dùng cache).
+
+        Returns:
+            dict: {'ok': bool, 'latency': giây | None, 'ip': IP ra ngoài | None, 'error': str | None, 'checked': timestamp}
+        """
+        result = {'ok': False, 'latency': None, 'ip': None, 'error': None, 'checked': time.time()}
+        proxies = {
+            "http": f"http://{proxy_info}",
+            "https": f"http://{proxy_info}",
+        }
+        start = time.perf_counter()
+        try:
+            response = requests.get(self.check_url, proxies=proxies, timeout=self.timeout)
+            result['latency'] = round(time.perf_counter() - start, 3)
+            if response.status_code != 200:
+                result['error'] = f'Mã lỗi: {response.status_code}'
+                return result
+            result['ok'] = True
+            try:
+                data = response.json()
+                result['ip'] = data.get('query') or data.get('ip') or data.get('origin')
+            except ValueError:
+                result['ip'] = response.text.strip()[:64] or None
+        except requests.RequestException as e:
+            result['error'] = str(e)
+        return result
+
+    def get(self, proxy_info: str) -> dict|None:
+        """
+        Lấy kết quả đã lưu nếu còn hạn.
+        """
+        with self._lock:
+            result = self._cache.get(self._key(proxy_info))
+        return result if self._is_fresh(result) else None
+
+    def check_all(self, proxies: list[str], force: bool = False) -> dict[str, dict]:
+        """
+        Kiểm tra song song các proxy khác nhau, chỉ kiểm tra lại proxy chưa có kết quả hoặc đã hết hạn.
+        In kết quả (sắp theo độ trễ để dễ xem); mỗi profile vẫn dùng đúng proxy của nó.
+
+        Args:
+            proxies (list[str]): Danh sách proxy, được lọc trùng.
+            force (bool, optional): True, bỏ qua cache và kiểm tra lại tất cả.
+        """
+        proxies = list(dict.fromkeys(proxy for proxy in proxies if proxy))
+        if not proxies:
+            return {}
+        stale = [proxy for proxy in proxies if force or not self.get(proxy)]
+        if stale:
+            Utility.logger(message=f'Kiểm tra {len(stale)}/{len(proxies)} proxy...')
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(stale))) as executor:
+                for proxy, result in zip(stale, executor.map(self.check, stale)):
+                    self._store(proxy, result)
+            self._save()
+
+        with self._lock:
+            results = {proxy: self._cache[self._key(proxy)] for proxy in proxies}
+        ranked = sorted(results.items(), key=lambda item: (not item[1]['ok'], item[1]['latency'] or float('inf')))
+        for proxy, result in ranked:
+            address = proxy.rpartition('@')[2]
+            if result['ok']:
+                print(f"   ✅ {address:<24} {result['latency']:.2f}s  IP: {result['ip']}")
+            else:
+                print(f"   ❌ {address:<24} {result['error']}")
+        return results
+
+    def is_working(self, proxy_info: str) -> bool:
+        """
+        Proxy có hoạt động không. Dùng kết quả đã lưu nếu còn hạn, ngược lại kiểm tra và lưu lại.
+        """
+        result = self.get(proxy_info)
+        if result is None:
+            result = self.check(proxy_info)
+            self._store(proxy_info, result)
+            self._save()
+        return result['ok']
+
+    def _store(self, proxy_info: str, result: dict):
+        with self._lock:
+            self._cache[self._key(proxy_info)] = dict(result, address=proxy_info.rpartition('@')[2])
+
 class TeleHelper:
     def __init__(self) -> None:
         self.valid: bool = False
@@ -406,6 +772,7 @@ class TeleHelper:
 
             return False
 
+    @traced('telegram.send_photo', 'network')
     def send_photo(self, screenshot_png, message: str = 'khởi động...'):
         """
         Gửi tin nhắn đến Telegram bot. Kiểm tra token trước khi gửi.
@@ -526,6 +893,7 @@ class AIHelper:
         new_size = (new_width, new_height)
         return image.resize(new_size, Image.Resampling.LANCZOS)
     
+    @traced('ai.ask', 'network')
     def ask(self, prompt: str, img_bytes: bytes | None = None) -> tuple[str | None, str | None]:
         """
         Gửi prompt và ảnh lên AI để phân tích
@@ -641,7 +1009,7 @@ class Chromium:
         try:
             print(f"⬇️ Đang tải {file_name}...")
             urllib.request.urlretrieve(url, file_path, reporthook=self._show_download_progress)
-            Utility.wait_time(2)
+            Utility.wait_time(2, kind='settle')
             
             if file_path.exists():
                 if file_path.stat().st_size > 0:
@@ -691,7 +1059,7 @@ class Chromium:
         """
         before_folders = set(f.name for f in self._DOWLOAD_PATH.iterdir() if f.is_dir())
 
-        timeout = time.time()+10
+        timeout = clock.PACER.now()+10
         if not (tool_extract and file_path):
             if not tool_extract:
                print(f"❌ tool_extract không thể là None")
@@ -703,10 +1071,10 @@ class Chromium:
             if tool_extract and tool_extract.exists():
                 if file_path and file_path.exists() and (file_path.stat().st_size / (1024 *1024) > 100):
                     break
-            if timeout - time.time() < 0:
+            if timeout - clock.PACER.now() < 0:
                 print(f'Lỗi không tìm thấy đủ 2 file: {self._FILE_CHROMIUM} (>100M) - {self._FILE_EXE} (500k)')
                 return None
-            Utility.wait_time(1)
+            Utility.wait_time(1, kind='poll')
 
         try:
             result = subprocess.run(